@@ -19,42 +19,177 @@
 
 """Tendermint manager."""
 
+import asyncio
 import atexit
+import base64
+import binascii
 import contextlib
+import functools
+import hashlib
 import inspect
+import itertools
 import json
 import logging
 import multiprocessing
 import os
 import platform
+import queue
 import re
+import selectors
+import shlex
 import shutil
 import signal
+import socket
 import stat
 import subprocess  # nosec:
 import sys
+import tarfile
+import tomllib
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from http import HTTPStatus
 from logging import Logger
 from pathlib import Path
-from threading import Event, Thread
-from time import sleep
-from typing import Any, Callable, Dict, List, Optional, Tuple, cast
+from threading import (
+    BoundedSemaphore,
+    Condition,
+    Event,
+    Lock,
+    Thread,
+    current_thread,
+)
+from time import monotonic, sleep, time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    cast,
+)
 
-import requests
-from flask import Flask, Response, jsonify, request
-from werkzeug.exceptions import InternalServerError, NotFound
+if TYPE_CHECKING:  # pragma: no cover
+    # flask, werkzeug and requests are imported where they are first used, so
+    # that the stop marker process and the node's startup do not wait on them
+    import requests
+    from flask import Flask, Response
+    from werkzeug.exceptions import InternalServerError, NotFound
 
 ENCODING = "utf-8"
 DEFAULT_LOG_FILE = "com.log"
 DEFAULT_TENDERMINT_LOG_FILE = "tendermint.log"
 DEFAULT_TIMEOUT = 30
-
-CONFIG_OVERRIDE = [
-    ("fast_sync = true", "fast_sync = false"),
-    ("max_num_outbound_peers = 10", "max_num_outbound_peers = 0"),
-    ("pex = true", "pex = false"),
+STARTUP_PROFILE_FLAG = "--startup-profile"
+DEFAULT_LOG_QUEUE_SIZE = 10000
+DEFAULT_LOG_BATCH_SIZE = 512
+DEFAULT_LOG_FLUSH_INTERVAL = 0.5
+DEFAULT_LOG_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 3
+DEFAULT_LOG_RING_SIZE = 5000
+LINE_READER_CHUNK_SIZE = 64 * 1024
+MAX_LINE_BYTES = 1024 * 1024
+DEFAULT_LOG_PAGE_SIZE = 1000
+MAX_LOG_WAIT = 20.0
+DEFAULT_LOG_WAITERS = 2
+LOG_STREAM_HEARTBEAT = 15.0
+DEFAULT_CRASH_BUNDLE_KEEP = 5
+
+CONFIG_OVERRIDE = {
+    ("", "fast_sync"): False,
+    ("p2p", "max_num_outbound_peers"): 0,
+    ("p2p", "pex"): False,
+}
+# the values `tendermint init` writes for the keys the tuning profiles change
+TUNING_DEFAULTS = {
+    ("", "db_backend"): "goleveldb",
+    ("mempool", "size"): 5000,
+    ("mempool", "max_txs_bytes"): 1073741824,
+    ("mempool", "cache_size"): 10000,
+    ("consensus", "timeout_propose"): "3s",
+    ("consensus", "timeout_prevote"): "1s",
+    ("consensus", "timeout_precommit"): "1s",
+    ("consensus", "timeout_commit"): "1s",
+    ("consensus", "peer_gossip_sleep_duration"): "100ms",
+    ("tx_index", "indexer"): "kv",
+    ("p2p", "send_rate"): 5120000,
+    ("p2p", "recv_rate"): 5120000,
+    ("p2p", "flush_throttle_timeout"): "100ms",
+}
+# the indexer stays on in both, agents look their transactions up by hash
+TUNING_PROFILES = {
+    "default": {},
+    "desktop-low-resource": {
+        ("mempool", "size"): 1000,
+        ("mempool", "max_txs_bytes"): 134217728,
+        ("mempool", "cache_size"): 2000,
+        ("consensus", "timeout_commit"): "2s",
+        ("consensus", "peer_gossip_sleep_duration"): "200ms",
+        ("p2p", "send_rate"): 1024000,
+        ("p2p", "recv_rate"): 1024000,
+    },
+    "server-throughput": {
+        ("mempool", "size"): 20000,
+        ("mempool", "max_txs_bytes"): 2147483648,
+        ("mempool", "cache_size"): 50000,
+        ("consensus", "timeout_propose"): "2s",
+        ("consensus", "timeout_commit"): "500ms",
+        ("consensus", "peer_gossip_sleep_duration"): "50ms",
+        ("p2p", "send_rate"): 20480000,
+        ("p2p", "recv_rate"): 20480000,
+        ("p2p", "flush_throttle_timeout"): "10ms",
+    },
+}
+
+DEFAULT_RESTART_TRIGGERS = [
+    # this occurs when we lose connection from the tm side
+    ("rpc_server_stopped", "RPC HTTP server stopped"),
+    # whenever the node is stopped because of a closed connection
+    # from on any of the tendermint modules (abci, p2p, rpc, etc)
+    # we restart the node
+    ("abci_socket_eof", "Stopping abci.socketClient for error: read message: EOF"),
 ]
-TM_STATUS_ENDPOINT = "http://localhost:26657/status"
+DEFAULT_RESTART_BACKOFF_INITIAL = 1.0
+DEFAULT_RESTART_BACKOFF_MAX = 60.0
+DEFAULT_RESTART_BACKOFF_FACTOR = 2.0
+DEFAULT_RESTART_MAX_PER_WINDOW = 5
+DEFAULT_RESTART_WINDOW = 300.0
+DEFAULT_LIVENESS_INTERVAL = 2.0
+DEFAULT_LIVENESS_STALL_DEADLINE = 60.0
+DEFAULT_LIVENESS_REQUEST_TIMEOUT = 2.0
+DEFAULT_RESOURCE_SAMPLE_INTERVAL = 10.0
+DEFAULT_SHUTDOWN_TIMEOUT = 5.0
+DEFAULT_STOP_GRACE = 5.0
+DEFAULT_KILL_WAIT = 3.0
+# share of the time left a node gets to exit on SIGTERM before it is killed
+STOP_GRACE_SHARE = 0.8
+# time the app process gets past the deadline to exit once its nodes stopped
+APP_EXIT_GRACE = 0.5
+DEFAULT_STOP_POLL_INTERVAL = 0.5
+DEFAULT_RESOURCE_SAMPLE_HISTORY = 60
+CGROUP_CPU_PERIOD = 100000
+# resource samples exposed as metrics: sample key, metric name, type and help
+SAMPLED_PROCESS_METRICS = (
+    ("open_fds", "open_fds", "gauge", "Open file descriptors of the node process."),
+    ("read_bytes", "io_read_bytes_total", "counter", "Bytes read from storage."),
+    ("write_bytes", "io_write_bytes_total", "counter", "Bytes written to storage."),
+)
+DEFAULT_RATE_WINDOW = 10
+DEFAULT_RESET_TIMEOUT = 60.0
+DEFAULT_READY_POLL_INTERVAL = 0.05
+DEFAULT_MAX_FINISHED_JOBS = 100
+DEFAULT_APP_HASH_INDEX_SIZE = 10000
+MAX_APP_HASH_RANGE = 1000
+BLOCKCHAIN_PAGE_SIZE = 20
+RESET_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
 
 _TCP = "tcp://"
 ENCODING = "utf-8"
@@ -63,6 +198,78 @@ DEFAULT_RPC_LISTEN_ADDRESS = f"{_TCP}0.0.0.0:26657"
 
 IS_DEV_MODE = False
 
+MANAGER_MODE_THREADED = "threaded"
+MANAGER_MODE_ASYNCIO = "asyncio"
+MANAGER_MODE_MULTI = "multi"
+STDERR_HANDLER_NAME = "tendermint-stderr"
+SERVER_MODE_DEVELOPMENT = "development"
+SERVER_MODE_PRODUCTION = "production"
+DEFAULT_SERVER_HOST = "localhost"
+DEFAULT_SERVER_PORT = 8080
+DEFAULT_SERVER_THREADS = 8
+DEFAULT_SERVER_REQUEST_TIMEOUT = 30.0
+DEFAULT_SERVER_KEEP_ALIVE_TIMEOUT = 5.0
+
+DUMP_MODE_COPY = "copy"
+DUMP_MODE_SNAPSHOT = "snapshot"
+DUMP_MODE_ARCHIVE = "archive"
+DUMP_OBJECTS_DIR = "objects"
+DUMP_REFS_DIR = "refs"
+DUMP_STAGING_DIR = ".staging"
+DEFAULT_DUMP_KEEP_LAST = 0
+DUMP_CHUNK_SIZE = 1024 * 1024
+STANDBY_DATA_DIR = ".data-standby"
+DISCARDED_DATA_DIR = ".data-discarded"
+DEFAULT_DISK_CHECK_INTERVAL = 300.0
+DEFAULT_DISK_MAINTENANCE_MIN_INTERVAL = 6 * 3600.0
+DEFAULT_DISK_COMPACT_TIMEOUT = 1800.0
+DEFAULT_DISK_SAMPLE_HISTORY = 48
+DISK_ACTION_COMPACT = "compact"
+DEFAULT_CONSENSUS_HISTORY = 100
+BLOCK_INTERVAL_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+CONSENSUS_ROUND_BUCKETS = (1.0, 2.0, 3.0, 5.0, 10.0)
+CONSENSUS_STEP_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PEER_SESSION_BUCKETS = (1.0, 10.0, 60.0, 300.0, 1800.0, 3600.0, 6 * 3600.0, 86400.0)
+# consensus steps in the order a height goes through them, `apply` is the
+# block execution by the ABCI app and `new_height` the `timeout_commit` wait
+CONSENSUS_STEPS = (
+    "new_height",
+    "new_round",
+    "propose",
+    "prevote",
+    "prevote_wait",
+    "precommit",
+    "precommit_wait",
+    "commit",
+    "apply",
+    "consensus",
+)
+CONSENSUS_STEP_MESSAGES = {
+    "entering new round": "new_round",
+    "entering propose step": "propose",
+    "entering prevote step": "prevote",
+    "entering prevote wait step": "prevote_wait",
+    "entering precommit step": "precommit",
+    "entering precommit wait step": "precommit_wait",
+    "entering commit step": "commit",
+    "finalizing commit of block": "apply",
+    "committed state": "new_height",
+}
+# the `enterPropose(10/0). Current: ...` messages of older releases
+LEGACY_CONSENSUS_STEPS = {
+    "NewRound": "new_round",
+    "Propose": "propose",
+    "Prevote": "prevote",
+    "PrevoteWait": "prevote_wait",
+    "Precommit": "precommit",
+    "PrecommitWait": "precommit_wait",
+    "Commit": "commit",
+}
+PEER_DISCONNECT_MESSAGES = {
+    "Stopping peer for error": "error",
+    "Stopping peer gracefully": "graceful",
+}
+
 logging.basicConfig(
     filename=os.environ.get("LOG_FILE", DEFAULT_LOG_FILE),
     level=logging.DEBUG,
@@ -81,6 +288,38 @@ def _should_skip_main_entry(argv: Optional[List[str]] = None) -> bool:
     return any(marker in joined for marker in bootstrap_markers)
 
 
+def _env_int(name: str, default: int) -> int:
+    """Read an integer from the environment, falling back to the default."""
+    value = os.environ.get(name, "")
+    if value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logging.warning(f"Invalid value {value!r} for {name}, using {default}")
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float from the environment, falling back to the default."""
+    value = os.environ.get(name, "")
+    if value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logging.warning(f"Invalid value {value!r} for {name}, using {default}")
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean from the environment, falling back to the default."""
+    value = os.environ.get(name, "")
+    if value == "":
+        return default
+    return value.lower() == "true"
+
+
 class StoppableThread(
     Thread,
 ):
@@ -99,6 +338,958 @@ class StoppableThread(
         """Check if the thread is stopped."""
         return self._stop_event.is_set()
 
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the stop event, return True if it was set."""
+        return self._stop_event.wait(timeout)
+
+
+class LogSink:  # pylint: disable=too-many-instance-attributes
+    """
+    Bounded, batched writer for the Tendermint output.
+
+    Producers only enqueue lines; a dedicated thread drains the queue in
+    batches, writes them to the console and (optionally) to a size-rotated
+    log file, and flushes periodically. When the queue is full new lines are
+    dropped and counted, so the producer never blocks on disk.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        log_file: str,
+        write_to_file: bool = False,
+        queue_size: int = DEFAULT_LOG_QUEUE_SIZE,
+        batch_size: int = DEFAULT_LOG_BATCH_SIZE,
+        flush_interval: float = DEFAULT_LOG_FLUSH_INTERVAL,
+        max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        backup_count: int = DEFAULT_LOG_BACKUP_COUNT,
+    ) -> None:
+        """
+        Initialize the sink.
+
+        :param log_file: path of the log file.
+        :param write_to_file: whether to write the lines to the log file too.
+        :param queue_size: maximum number of lines waiting to be written.
+        :param batch_size: maximum number of lines written at once.
+        :param flush_interval: maximum seconds between flushes.
+        :param max_bytes: rotate the log file when it grows past this size, 0 disables rotation.
+        :param backup_count: number of rotated files to keep.
+        """
+        self.log_file = log_file
+        self.write_to_file = write_to_file
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max(1, queue_size))
+        self._counter_lock = Lock()
+        self._file: Optional[Any] = None
+        self._file_size = 0
+        self._last_flush = monotonic()
+        self._thread: Optional[StoppableThread] = None
+
+    @classmethod
+    def from_env(cls, log_file: str, write_to_file: bool = False) -> "LogSink":
+        """Create a sink configured from the environment."""
+        return cls(
+            log_file=log_file,
+            write_to_file=write_to_file,
+            queue_size=_env_int("TM_LOG_QUEUE_SIZE", DEFAULT_LOG_QUEUE_SIZE),
+            batch_size=_env_int("TM_LOG_BATCH_SIZE", DEFAULT_LOG_BATCH_SIZE),
+            flush_interval=_env_float(
+                "TM_LOG_FLUSH_INTERVAL", DEFAULT_LOG_FLUSH_INTERVAL
+            ),
+            max_bytes=_env_int("TM_LOG_MAX_BYTES", DEFAULT_LOG_MAX_BYTES),
+            backup_count=_env_int("TM_LOG_BACKUP_COUNT", DEFAULT_LOG_BACKUP_COUNT),
+        )
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = StoppableThread(
+            target=self._run, name="tendermint-log-sink", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, line: str) -> bool:
+        """Enqueue a line without blocking, return False if it was dropped."""
+        try:
+            self._queue.put_nowait(line)
+            return True
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued line has been written."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.unfinished_tasks == 0
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(
+                lambda: self._queue.unfinished_tasks == 0, timeout
+            )
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush the pending lines and stop the writer thread."""
+        self.flush(timeout)
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread.join(timeout)
+            self._thread = None
+        self._flush_outputs()
+        self._close_file()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the sink counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+    def _run(self) -> None:
+        """Drain the queue in batches until stopped."""
+        thread = cast(StoppableThread, self._thread)
+        while not thread.stopped():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush_outputs()
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch("".join(batch))
+                self.written += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if (
+                self._queue.empty()
+                or monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush_outputs()
+        self._flush_outputs()
+
+    def _write_batch(self, data: str) -> None:
+        """Write a batch of lines to the outputs."""
+        try:
+            sys.stdout.write(data)
+        except (OSError, ValueError):
+            self.errors += 1
+        if not self.write_to_file:
+            return
+        try:
+            file = self._open_file()
+            # the size limit is in bytes, count the encoded output
+            encoded = data.encode(ENCODING, errors="replace")
+            file.write(encoded)
+            self._file_size += len(encoded)
+            if self.max_bytes > 0 and self._file_size >= self.max_bytes:
+                self._rotate()
+        except OSError:
+            self.errors += 1
+            self._close_file()
+
+    def _flush_outputs(self) -> None:
+        """Flush the console and the log file."""
+        self._last_flush = monotonic()
+        with contextlib.suppress(OSError, ValueError):
+            sys.stdout.flush()
+        if self._file is not None:
+            try:
+                self._file.flush()
+            except OSError:
+                self.errors += 1
+                self._close_file()
+
+    def _open_file(self) -> Any:
+        """Open the log file in binary append mode, if not already open."""
+        if self._file is None:
+            self._file = open(  # pylint: disable=consider-using-with
+                self.log_file, "ab"
+            )
+            self._file_size = self._file.tell()
+        return self._file
+
+    def _close_file(self) -> None:
+        """Close the log file."""
+        if self._file is not None:
+            with contextlib.suppress(OSError):
+                self._file.close()
+            self._file = None
+
+    def _rotate(self) -> None:
+        """Rotate the log file, keeping `backup_count` old copies."""
+        self._close_file()
+        if self.backup_count <= 0:
+            Path(self.log_file).write_text("", encoding=ENCODING)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.log_file}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.log_file}.{index + 1}")
+        os.replace(self.log_file, f"{self.log_file}.1")
+
+
+class LineReader:
+    """
+    Reader of the node output that can be interrupted.
+
+    On POSIX the pipe is read as bytes once a selector reports it readable,
+    complete lines are split out of a buffer and decoded a chunk at a time.
+    The selector also waits on a wake-up pipe, so `wake` gets a reader out of
+    its wait within milliseconds instead of whenever the node prints next.
+    Windows pipes do not work with selectors, so there the reader falls back
+    to blocking `readline` calls on the text stream.
+    """
+
+    def __init__(self, stream: Any) -> None:
+        """
+        Initialize the reader.
+
+        :param stream: the stdout of the node process.
+        """
+        self.stream = stream
+        self._buffer = b""
+        self._eof = False
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wake_fds: Optional[Tuple[int, int]] = None
+        if os.name == "nt":  # pragma: nocover
+            return
+        self._fd = stream.fileno()
+        os.set_blocking(self._fd, False)
+        self._wake_fds = os.pipe()
+        os.set_blocking(self._wake_fds[1], False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._fd, selectors.EVENT_READ)
+        self._selector.register(self._wake_fds[0], selectors.EVENT_READ)
+
+    def read_lines(self) -> Optional[List[str]]:
+        """
+        Wait for output and get the complete lines read.
+
+        :return: the lines, empty if the reader was woken up, None once the output closed.
+        """
+        if self._eof:
+            return None
+        if self._selector is None:  # pragma: nocover
+            line = self.stream.readline()
+            if line == "":
+                self._eof = True
+                return None
+            return [line]
+        woken = False
+        for key, _ in self._selector.select():
+            if key.fd != self._fd:
+                with contextlib.suppress(BlockingIOError):
+                    os.read(key.fd, 4096)
+                woken = True
+        if woken:
+            return self.drain()
+        try:
+            return self._read()
+        except BlockingIOError:
+            return []
+
+    def drain(self) -> Optional[List[str]]:
+        """Get the lines already in the pipe without waiting."""
+        if self._eof:
+            return None
+        if self._selector is None:  # pragma: nocover
+            return []
+        lines: List[str] = []
+        try:
+            while True:
+                read = self._read()
+                if read is None:
+                    return lines or None
+                lines += read
+        except BlockingIOError:
+            return lines
+
+    def _read(self) -> Optional[List[str]]:
+        """Read a chunk and split the complete lines out of the buffer."""
+        chunk = os.read(self._fd, LINE_READER_CHUNK_SIZE)
+        if chunk == b"":
+            self._eof = True
+            rest, self._buffer = self._buffer, b""
+            return [rest.decode(ENCODING, errors="replace")] if rest else None
+        self._buffer += chunk
+        end = self._buffer.rfind(b"\n") + 1
+        if end == 0:
+            if len(self._buffer) < MAX_LINE_BYTES:
+                return []
+            # a line this long is not going to end, pass it on as it is
+            end = len(self._buffer)
+        complete, self._buffer = self._buffer[:end], self._buffer[end:]
+        *lines, rest = complete.decode(ENCODING, errors="replace").split("\n")
+        return [line + "\n" for line in lines] + ([rest] if rest else [])
+
+    def wake(self) -> None:
+        """Get a waiting `read_lines` call to return."""
+        if self._wake_fds is not None:
+            with contextlib.suppress(BlockingIOError, OSError):
+                os.write(self._wake_fds[1], b"\0")
+
+    def close(self) -> None:
+        """Release the selector and the wake-up pipe."""
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        if self._wake_fds is not None:
+            for fd in self._wake_fds:
+                with contextlib.suppress(OSError):
+                    os.close(fd)
+            self._wake_fds = None
+
+
+class LogRing:
+    """
+    The latest lines of the node output, numbered by a sequence.
+
+    The ring keeps the last `capacity` lines in memory whatever
+    `WRITE_TO_LOG` says, so recent output can be read over the API and
+    snapshotted on crashes without reading log files. Readers ask for the
+    lines from a sequence number on and get the next number to ask for;
+    lines that fell out of the ring in the meantime are counted as missed.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_LOG_RING_SIZE) -> None:
+        """
+        Initialize the ring.
+
+        :param capacity: the number of lines to keep.
+        """
+        self.capacity = max(1, capacity)
+        self.next_seq = 0
+        self._lines: Deque[str] = deque(maxlen=self.capacity)
+        self._condition = Condition()
+
+    @classmethod
+    def from_env(cls) -> "LogRing":
+        """Create a ring configured from the environment."""
+        return cls(_env_int("TM_LOG_RING_SIZE", DEFAULT_LOG_RING_SIZE))
+
+    def append(self, line: str) -> None:
+        """Add a line, dropping the oldest one if the ring is full."""
+        with self._condition:
+            self._lines.append(line.rstrip("\n"))
+            self.next_seq += 1
+            self._condition.notify_all()
+
+    def since(
+        self, seq: Optional[int], limit: int = DEFAULT_LOG_PAGE_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Get up to `limit` lines from `seq` on.
+
+        :param seq: the first sequence number to return, None for the last `limit` lines.
+        :param limit: the maximum number of lines.
+        :return: the lines with their sequence numbers, the next sequence number and the missed lines.
+        """
+        with self._condition:
+            first = self.next_seq - len(self._lines)
+            if seq is None:
+                seq = max(first, self.next_seq - limit)
+            seq = min(max(seq, 0), self.next_seq)
+            start = max(seq, first)
+            lines = list(
+                itertools.islice(self._lines, start - first, start - first + limit)
+            )
+        return {
+            "lines": [
+                {"seq": start + index, "line": line} for index, line in enumerate(lines)
+            ],
+            "next": start + len(lines),
+            "missed": start - seq,
+        }
+
+    def wait(self, seq: int, timeout: float) -> bool:
+        """Wait until there are lines from `seq` on, return whether there are."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.next_seq > seq, timeout)
+
+    def snapshot(self) -> List[str]:
+        """Get the lines in the ring."""
+        with self._condition:
+            return list(self._lines)
+
+
+class CrashBundles:
+    """
+    Snapshots of the recent node output, taken when a restart trigger fires.
+
+    The last `keep` bundles are kept in memory and, when a directory is
+    given, written there as JSON files so they survive the manager.
+    """
+
+    def __init__(
+        self, directory: Optional[Path] = None, keep: int = DEFAULT_CRASH_BUNDLE_KEEP
+    ) -> None:
+        """
+        Initialize the store.
+
+        :param directory: the directory to write the bundles to, None to keep them in memory only.
+        :param keep: the number of bundles to keep.
+        """
+        self.directory = directory
+        self.keep = max(1, keep)
+        self._bundles: Deque[Dict[str, Any]] = deque(maxlen=self.keep)
+        self._lock = Lock()
+
+    @classmethod
+    def from_env(cls, directory: Optional[str] = None) -> "CrashBundles":
+        """Create a store from `TM_CRASH_BUNDLE_DIR`, or `directory` if given."""
+        if directory is None:
+            directory = os.environ.get("TM_CRASH_BUNDLE_DIR", "")
+        return cls(
+            Path(directory) if directory else None,
+            keep=_env_int("TM_CRASH_BUNDLE_KEEP", DEFAULT_CRASH_BUNDLE_KEEP),
+        )
+
+    def save(self, trigger: str, reason: str, lines: List[str]) -> Dict[str, Any]:
+        """Store a bundle of the lines preceding a restart."""
+        now = datetime.now()
+        bundle = {
+            "id": f"{now.strftime('%Y%m%dT%H%M%S%f')}-{trigger}",
+            "time": now.timestamp(),
+            "trigger": trigger,
+            "reason": reason.strip(),
+            "lines": lines,
+        }
+        with self._lock:
+            self._bundles.append(bundle)
+            if self.directory is None:
+                return bundle
+            self.directory.mkdir(parents=True, exist_ok=True)
+            _atomic_write_text(
+                self.directory / f"{bundle['id']}.json", json.dumps(bundle)
+            )
+            for stale in sorted(self.directory.glob("*.json"))[: -self.keep]:
+                with contextlib.suppress(OSError):
+                    stale.unlink()
+        return bundle
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Get the bundles without their lines, oldest first."""
+        with self._lock:
+            bundles = list(self._bundles)
+            if self.directory is not None and self.directory.is_dir():
+                known = {bundle["id"] for bundle in bundles}
+                for path in sorted(self.directory.glob("*.json")):
+                    if path.stem in known:
+                        continue
+                    with contextlib.suppress(OSError, ValueError):
+                        bundles.append(json.loads(path.read_text(encoding=ENCODING)))
+        bundles.sort(key=lambda bundle: bundle["time"])
+        return [
+            {key: value for key, value in bundle.items() if key != "lines"}
+            | {"lines": len(bundle["lines"])}
+            for bundle in bundles[-self.keep :]
+        ]
+
+    def get(self, bundle_id: str) -> Optional[Dict[str, Any]]:
+        """Get a bundle by id."""
+        with self._lock:
+            for bundle in self._bundles:
+                if bundle["id"] == bundle_id:
+                    return bundle
+        if self.directory is None or Path(bundle_id).name != bundle_id:
+            return None
+        try:
+            return json.loads(
+                (self.directory / f"{bundle_id}.json").read_text(encoding=ENCODING)
+            )
+        except (OSError, ValueError):
+            return None
+
+
+class PhaseTimer:
+    """Durations of consecutive phases of an operation."""
+
+    def __init__(self) -> None:
+        """Start timing."""
+        self.started = self._last = monotonic()
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> float:
+        """Close the current phase under the given name, return its duration."""
+        now = monotonic()
+        duration = now - self._last
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+        self._last = now
+        return duration
+
+    def timings(self) -> Dict[str, float]:
+        """Get the duration of every phase and the total, in seconds."""
+        return {
+            **{phase: round(duration, 6) for phase, duration in self.phases.items()},
+            "total": round(monotonic() - self.started, 6),
+        }
+
+
+class ShutdownDeadline:
+    """
+    One deadline shared by the stages of a shutdown.
+
+    Every stage waits for what is left of the overall timeout instead of a
+    fixed delay of its own, so a slow stage eats into the later ones rather
+    than adding to the total, and signals are only escalated once the
+    gentler one did not work in time. The stage durations are recorded with
+    a `PhaseTimer`. The deadline is a wall-clock time, so it can be handed to
+    a child process.
+    """
+
+    def __init__(
+        self, timeout: float = DEFAULT_SHUTDOWN_TIMEOUT, at: Optional[float] = None
+    ) -> None:
+        """
+        Initialize the deadline.
+
+        :param timeout: seconds the shutdown may take.
+        :param at: the wall-clock deadline, to share one with another process.
+        """
+        self.at = time() + timeout if at is None else at
+        self.timer = PhaseTimer()
+
+    @classmethod
+    def from_env(cls) -> "ShutdownDeadline":
+        """Create a deadline configured from the environment."""
+        return cls(_env_float("TM_SHUTDOWN_TIMEOUT", DEFAULT_SHUTDOWN_TIMEOUT))
+
+    def remaining(self, share: float = 1.0) -> float:
+        """Get `share` of the time left, in seconds."""
+        return max(0.0, self.at - time()) * share
+
+    def mark(self, stage: str) -> float:
+        """Close the current stage under the given name, return its duration."""
+        return self.timer.mark(stage)
+
+    def timings(self) -> Dict[str, float]:
+        """Get the duration of every stage and the total, in seconds."""
+        return self.timer.timings()
+
+
+class JobRegistry:
+    """Operations run in the background, whose outcome can be awaited by id."""
+
+    def __init__(self, max_finished: int = DEFAULT_MAX_FINISHED_JOBS) -> None:
+        """Initialize the registry, keeping at most `max_finished` finished jobs."""
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._done: Dict[str, Event] = {}
+        self._tasks: Dict[str, "asyncio.Task[None]"] = {}
+        self._lock = Lock()
+
+    def _add(self, kind: str) -> str:
+        """Register a pending job, return its id."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "status": "pending",
+                "result": None,
+                "error": None,
+            }
+            self._done[job_id] = Event()
+        return job_id
+
+    def submit(self, kind: str, func: Callable[[], Any]) -> str:
+        """Run a function in a background thread, return the job id."""
+        job_id = self._add(kind)
+        Thread(
+            target=self._run, args=(job_id, func), name=f"job-{kind}", daemon=True
+        ).start()
+        return job_id
+
+    def submit_async(self, kind: str, coroutine: Any) -> str:
+        """Run a coroutine as a task of the running loop, return the job id."""
+        job_id = self._add(kind)
+
+        async def run() -> None:
+            try:
+                update = {"status": "succeeded", "result": await coroutine}
+            except Exception as e:  # pylint: disable=broad-except
+                update = {"status": "failed", "error": str(e)}
+            self._finish(job_id, update)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return job_id
+
+    def _run(self, job_id: str, func: Callable[[], Any]) -> None:
+        """Run a job and record its outcome."""
+        try:
+            result = func()
+            update = {"status": "succeeded", "result": result}
+        except Exception as e:  # pylint: disable=broad-except
+            update = {"status": "failed", "error": str(e)}
+        self._finish(job_id, update)
+
+    def _finish(self, job_id: str, update: Dict[str, Any]) -> None:
+        """Record the outcome of a job, dropping the oldest finished ones."""
+        with self._lock:
+            self._jobs[job_id].update(update)
+            self._done[job_id].set()
+            finished = [key for key, event in self._done.items() if event.is_set()]
+            for key in finished[: max(0, len(finished) - self.max_finished)]:
+                del self._jobs[key]
+                del self._done[key]
+
+    def get(self, job_id: str, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """Get a job, waiting up to `wait` seconds for it to finish."""
+        with self._lock:
+            done = self._done.get(job_id)
+        if done is None:
+            return None
+        if wait > 0:
+            done.wait(wait)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else dict(job)
+
+    async def get_async(self, job_id: str, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """Get a job of `submit_async`, awaiting up to `wait` seconds for it to finish."""
+        task = self._tasks.get(job_id)
+        if task is not None and wait > 0:
+            await asyncio.wait({task}, timeout=wait)
+        return self.get(job_id)
+
+
+class Histogram:
+    """Cumulative histogram rendered in the Prometheus text format."""
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        """Initialize the histogram with the upper bounds of its buckets."""
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+
+    def render(self, name: str, labels: str = "") -> List[str]:
+        """Render the samples, `labels` is a comma separated list of `key="value"`."""
+        prefix = f"{labels}," if labels else ""
+        lines = [
+            f'{name}_bucket{{{prefix}le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+    def to_json(self) -> Dict[str, Any]:
+        """Get the count per bucket, the count and the sum of the values."""
+        with self._lock:
+            return {
+                "buckets": {
+                    str(bound): count for bound, count in zip(self.buckets, self.counts)
+                },
+                "count": self.count,
+                "sum": self.sum,
+            }
+
+
+class RateMeter:
+    """Events per second over a sliding window of one second buckets."""
+
+    def __init__(self, window: int = DEFAULT_RATE_WINDOW) -> None:
+        """Initialize the meter with the window length in seconds."""
+        self.window = window
+        self._buckets: Deque[List[int]] = deque()
+
+    def mark(self, count: int = 1) -> None:
+        """Record events."""
+        second = int(monotonic())
+        if self._buckets and self._buckets[-1][0] == second:
+            self._buckets[-1][1] += count
+            return
+        self._buckets.append([second, count])
+        while self._buckets[0][0] <= second - self.window:
+            self._buckets.popleft()
+
+    def rate(self) -> float:
+        """Get the average rate over the window."""
+        now = int(monotonic())
+        total = sum(
+            count for second, count in list(self._buckets) if second > now - self.window
+        )
+        return total / self.window
+
+
+class RestartPolicy:
+    """
+    Rate limiting for node restarts.
+
+    The first restart in a window happens immediately, later ones are
+    delayed exponentially. Once `max_restarts` restarts happened within
+    `window` seconds the circuit opens and further restarts are suppressed
+    until the oldest one falls out of the window.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        backoff_initial: float = DEFAULT_RESTART_BACKOFF_INITIAL,
+        backoff_max: float = DEFAULT_RESTART_BACKOFF_MAX,
+        backoff_factor: float = DEFAULT_RESTART_BACKOFF_FACTOR,
+        max_restarts: int = DEFAULT_RESTART_MAX_PER_WINDOW,
+        window: float = DEFAULT_RESTART_WINDOW,
+    ) -> None:
+        """
+        Initialize the policy.
+
+        :param backoff_initial: delay before the second restart in a window.
+        :param backoff_max: upper bound of the delay.
+        :param backoff_factor: multiplier applied to the delay on every restart.
+        :param max_restarts: restarts allowed within the window, 0 disables the breaker.
+        :param window: length of the window in seconds.
+        """
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.backoff_factor = backoff_factor
+        self.max_restarts = max_restarts
+        self.window = window
+        self._restarts: Deque[float] = deque()
+
+    @classmethod
+    def from_env(cls, overrides: Optional[Dict[str, Any]] = None) -> "RestartPolicy":
+        """Create a policy from the environment, with optional per-trigger overrides."""
+        overrides = overrides or {}
+        return cls(
+            backoff_initial=float(
+                overrides.get(
+                    "backoff_initial",
+                    _env_float(
+                        "TM_RESTART_BACKOFF_INITIAL", DEFAULT_RESTART_BACKOFF_INITIAL
+                    ),
+                )
+            ),
+            backoff_max=float(
+                overrides.get(
+                    "backoff_max",
+                    _env_float("TM_RESTART_BACKOFF_MAX", DEFAULT_RESTART_BACKOFF_MAX),
+                )
+            ),
+            backoff_factor=float(
+                overrides.get(
+                    "backoff_factor",
+                    _env_float(
+                        "TM_RESTART_BACKOFF_FACTOR", DEFAULT_RESTART_BACKOFF_FACTOR
+                    ),
+                )
+            ),
+            max_restarts=int(
+                overrides.get(
+                    "max_restarts",
+                    _env_int(
+                        "TM_RESTART_MAX_PER_WINDOW", DEFAULT_RESTART_MAX_PER_WINDOW
+                    ),
+                )
+            ),
+            window=float(
+                overrides.get(
+                    "window", _env_float("TM_RESTART_WINDOW", DEFAULT_RESTART_WINDOW)
+                )
+            ),
+        )
+
+    def _prune(self, now: float) -> None:
+        """Forget the restarts that fell out of the window."""
+        while self._restarts and now - self._restarts[0] > self.window:
+            self._restarts.popleft()
+
+    def next_delay(self, now: Optional[float] = None) -> Optional[float]:
+        """Get the delay before the next restart, or None if the circuit is open."""
+        now = monotonic() if now is None else now
+        self._prune(now)
+        recent = len(self._restarts)
+        if 0 < self.max_restarts <= recent:
+            return None
+        if recent == 0:
+            return 0.0
+        return min(
+            self.backoff_max, self.backoff_initial * self.backoff_factor ** (recent - 1)
+        )
+
+    def record(self, now: Optional[float] = None) -> None:
+        """Record a restart."""
+        self._restarts.append(monotonic() if now is None else now)
+
+    def status(self) -> Dict[str, Any]:
+        """Get the policy state."""
+        delay = self.next_delay()
+        return {
+            "recent_restarts": len(self._restarts),
+            "circuit_open": delay is None,
+            "next_delay": delay,
+        }
+
+
+class RestartTrigger:  # pylint: disable=too-few-public-methods
+    """A condition that restarts the node, with its restart policy and counters."""
+
+    def __init__(
+        self,
+        name: str,
+        pattern: Optional[str] = None,
+        regex: bool = False,
+        policy: Optional[RestartPolicy] = None,
+    ) -> None:
+        """
+        Initialize the trigger.
+
+        :param name: the trigger name.
+        :param pattern: text to look for in the node output, None for triggers fired by the manager.
+        :param regex: whether the pattern is a regular expression or a literal.
+        :param policy: the restart policy.
+        """
+        self.name = name
+        self.pattern = pattern
+        self.regex = regex
+        self.policy = policy or RestartPolicy.from_env()
+        self.matches = 0
+        self.restarts = 0
+        self.suppressed = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the trigger counters."""
+        return {
+            "pattern": self.pattern,
+            "matches": self.matches,
+            "restarts": self.restarts,
+            "suppressed": self.suppressed,
+            **self.policy.status(),
+        }
+
+
+class TriggerRegistry:
+    """Restart triggers matched against the node output in a single pass."""
+
+    def __init__(self, triggers: Optional[List[RestartTrigger]] = None) -> None:
+        """Initialize the registry."""
+        self._triggers: Dict[str, RestartTrigger] = {}
+        self._groups: Dict[str, RestartTrigger] = {}
+        self._matcher: Optional["re.Pattern[str]"] = None
+        for trigger in triggers or []:
+            self._triggers[trigger.name] = trigger
+        self._compile()
+
+    @classmethod
+    def from_env(
+        cls, raw: Optional[str] = None, logger: Optional[Logger] = None
+    ) -> "TriggerRegistry":
+        """
+        Create the registry from `TM_RESTART_TRIGGERS`, or `raw` if given.
+
+        The variable holds a JSON list, or the path of a JSON file with a list, of
+        objects with a `name`, a `pattern`, an optional `regex` flag and optional
+        restart policy overrides. The defaults are used when it is not set, or
+        when it cannot be read, after logging why.
+        """
+        if raw is None:
+            raw = os.environ.get("TM_RESTART_TRIGGERS", "")
+        raw = raw.strip()
+        if raw != "":
+            try:
+                if not raw.startswith("["):
+                    raw = Path(raw).read_text(encoding=ENCODING)
+                return cls(
+                    [
+                        RestartTrigger(
+                            name=entry["name"],
+                            pattern=entry["pattern"],
+                            regex=bool(entry.get("regex", False)),
+                            policy=RestartPolicy.from_env(entry),
+                        )
+                        for entry in json.loads(raw)
+                    ]
+                )
+            except (
+                OSError,
+                ValueError,
+                KeyError,
+                TypeError,
+                AttributeError,
+                re.error,
+            ) as e:
+                (logger or logging.getLogger()).error(
+                    f"Invalid restart triggers, using the defaults: {e!r}"
+                )
+        return cls(
+            [
+                RestartTrigger(name, pattern)
+                for name, pattern in DEFAULT_RESTART_TRIGGERS
+            ]
+        )
+
+    def _compile(self) -> None:
+        """Compile the patterns into one alternation."""
+        parts = []
+        self._groups = {}
+        for index, trigger in enumerate(self._triggers.values()):
+            if trigger.pattern is None:
+                continue
+            group = f"_trigger{index}"
+            pattern = trigger.pattern if trigger.regex else re.escape(trigger.pattern)
+            parts.append(f"(?P<{group}>{pattern})")
+            self._groups[group] = trigger
+        self._matcher = re.compile("|".join(parts)) if parts else None
+
+    def add(self, trigger: RestartTrigger) -> RestartTrigger:
+        """Register a trigger, replacing any trigger with the same name."""
+        self._triggers[trigger.name] = trigger
+        self._compile()
+        return trigger
+
+    def get(self, name: str) -> Optional[RestartTrigger]:
+        """Get a trigger by name."""
+        return self._triggers.get(name)
+
+    def match(self, line: str) -> Optional[RestartTrigger]:
+        """Get the trigger matching the line, if any, and count the match."""
+        if self._matcher is None:
+            return None
+        found = self._matcher.search(line)
+        if found is None:
+            return None
+        trigger = self._groups.get(cast(str, found.lastgroup))
+        if trigger is None:
+            group = next(
+                name
+                for name, value in found.groupdict().items()
+                if value is not None and name in self._groups
+            )
+            trigger = self._groups[group]
+        trigger.matches += 1
+        return trigger
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the counters of every trigger."""
+        return {name: trigger.stats() for name, trigger in self._triggers.items()}
+
 
 class TendermintParams:  # pylint: disable=too-few-public-methods
     """Tendermint node parameters."""
@@ -146,6 +1337,12 @@ class TendermintParams:  # pylint: disable=too-few-public-methods
             ")"
         )
 
+    @property
+    def rpc_url(self) -> str:
+        """Get the HTTP URL of the RPC server, reachable from this host."""
+        non_routable, loopback = "0.0.0.0", "127.0.0.1"  # nosec
+        return self.rpc_laddr.replace("tcp", "http").replace(non_routable, loopback)
+
     def build_node_command(self, debug: bool = False) -> List[str]:
         """Build the 'node' command."""
         p2p_seeds = ",".join(self.p2p_seeds) if self.p2p_seeds else ""
@@ -165,583 +1362,4810 @@ class TendermintParams:  # pylint: disable=too-few-public-methods
             cmd += ["--home", self.home]
         return cmd
 
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "TendermintParams":
+        """Get the parameters of the node the manager's environment describes."""
+        return cls(
+            proxy_app=env["PROXY_APP"],
+            p2p_laddr=env["P2P_LADDR"],
+            rpc_laddr=env["RPC_LADDR"],
+            consensus_create_empty_blocks=env["CREATE_EMPTY_BLOCKS"] == "true",
+            home=env["TMHOME"],
+            use_grpc=env["USE_GRPC"] == "true",
+        )
+
     @staticmethod
     def get_node_command_kwargs() -> Dict:
         """Get the node command kwargs"""
         kwargs = {
-            "bufsize": 1,
-            "universal_newlines": True,
+            "bufsize": 0,
             "stdout": subprocess.PIPE,
             "stderr": subprocess.STDOUT,
         }
         if platform.system() == "Windows":  # pragma: nocover
+            # selectors do not work on Windows pipes, the output is read by line
+            kwargs.update(bufsize=1, universal_newlines=True)
             kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP  # type: ignore
         else:
             kwargs["preexec_fn"] = os.setsid  # type: ignore
         return kwargs
 
 
-class TendermintNode:
-    """A class to manage a Tendermint node."""
+class TendermintRPC:
+    """Client for the node's RPC server, reusing pooled connections."""
 
-    def __init__(
-        self,
-        params: TendermintParams,
-        logger: Optional[Logger] = None,
-        write_to_log: bool = False,
-    ):
+    def __init__(self, url: str, timeout: float = DEFAULT_TIMEOUT) -> None:
         """
-        Initialize a Tendermint node.
+        Initialize the client.
 
-        :param params: the parameters.
-        :param logger: the logger.
-        :param write_to_log: Write to log file.
+        :param url: the RPC server URL.
+        :param timeout: the default request timeout.
         """
-        self.params = params
-        self._process: Optional[subprocess.Popen] = None
-        self._monitoring: Optional[StoppableThread] = None
-        self._stopping = False
-        self.logger = logger or logging.getLogger()
-        self.log_file = os.environ.get("LOG_FILE", DEFAULT_TENDERMINT_LOG_FILE)
-        self.write_to_log = write_to_log
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._session: Optional["requests.Session"] = None
+
+    @property
+    def session(self) -> "requests.Session":
+        """Get the pooled session, importing requests on first use."""
+        if self._session is None:
+            import requests  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+            session = requests.Session()
+            session.mount(
+                "http://",
+                requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4),
+            )
+            self._session = session
+        return self._session
 
-    def _build_init_command(self) -> List[str]:
-        """Build the 'init' command."""
-        cmd = [
-            "tendermint",
-            "init",
-        ]
-        if self.params.home is not None:  # pragma: nocover
-            cmd += ["--home", self.params.home]
-        return cmd
+    def get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> "requests.Response":
+        """Call an RPC endpoint."""
+        return self.session.get(
+            f"{self.url}/{path}",
+            params=params,
+            timeout=self.timeout if timeout is None else timeout,
+        )
 
-    def init(self) -> None:
-        """Initialize Tendermint node."""
-        cmd = self._build_init_command()
-        subprocess.call(cmd)  # nosec
+    def status(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Get the `result` of the `/status` endpoint, ValueError on an error reply."""
+        body = self.get("status", timeout=timeout).json()
+        if "result" not in body:
+            raise ValueError(body.get("error", {}).get("data", "no result"))
+        return body["result"]
 
-    def _monitor_tendermint_process(
-        self,
-    ) -> None:
-        """Check server status."""
-        if self._monitoring is None:
-            raise ValueError("Monitoring is not running")
-        self.log("Monitoring thread started\n")
-        while not self._monitoring.stopped():
-            try:
-                if self._process is not None and self._process.stdout is not None:
-                    line = self._process.stdout.readline()
-                    self.log(line)
-                    for trigger in [
-                        # this occurs when we lose connection from the tm side
-                        "RPC HTTP server stopped",
-                        # whenever the node is stopped because of a closed connection
-                        # from on any of the tendermint modules (abci, p2p, rpc, etc)
-                        # we restart the node
-                        "Stopping abci.socketClient for error: read message: EOF",
-                    ]:
-                        if self._monitoring.stopped():
-                            break
-                        if line.find(trigger) >= 0:
-                            self._stop_tm_process()
-                            # we can only reach this step if monitoring was activated
-                            # so we make sure that after reset the monitoring continues
-                            self._start_tm_process()
-                            self.log(
-                                f"Restarted the HTTP RPC server, as a connection was dropped with message:\n\t\t {line}\n"
-                            )
-            except Exception as e:  # pylint: disable=broad-except
-                self.log(f"Error!: {str(e)}")
-        self.log("Monitoring thread terminated\n")
+    def close(self) -> None:
+        """Close the pooled connections."""
+        if self._session is not None:
+            self._session.close()
 
-    def _start_tm_process(self, debug: bool = False) -> None:
-        """Start a Tendermint node process."""
-        if self._process is not None or self._stopping:  # pragma: nocover
-            return
-        cmd = self.params.build_node_command(debug)
-        kwargs = self.params.get_node_command_kwargs()
 
-        if os.name != "nt":
-            kwargs.update(dict(preexec_fn=os.setpgrp))
+def _rpc_errors() -> Tuple[type, ...]:
+    """Get the errors of a failed RPC call, requests' and ValueError for error replies."""
+    import requests  # pylint: disable=import-outside-toplevel,redefined-outer-name
 
-        self.log(f"Starting Tendermint: {cmd}\n")
-        self._process = (
-            subprocess.Popen(  # nosec # pylint: disable=consider-using-with,W1509
-                cmd, **kwargs
-            )
-        )
-        if os.name == "nt":
-            self._wh = WinHelper()  # pylint: disable=attribute-defined-outside-init
-            self._wh.assign_to_job(self._process.pid)
+    return requests.RequestException, ValueError
 
-        self.log("Tendermint process started\n")
 
-    def _start_monitoring_thread(self) -> None:
-        """Start a monitoring thread."""
-        if self._monitoring is not None and self._monitoring.is_alive():
-            return
-        self._monitoring = StoppableThread(target=self._monitor_tendermint_process)
-        self._monitoring.start()
+class NodeIdentity:
+    """
+    Cached validator key and peer id of the node.
 
-    def start(self, debug: bool = False) -> None:
-        """Start a Tendermint node process."""
-        self._start_tm_process(debug)
-        self._start_monitoring_thread()
+    The validator key is re-read only when `priv_validator_key.json` changes on
+    disk. The peer id is derived from `node_key.json` the same way Tendermint
+    does (hex of the first 20 bytes of the sha256 of the ed25519 public key),
+    falling back to the node's `/status` when the key cannot be decoded. Both
+    are dropped whenever the node (re)starts, since the home may have been
+    re-initialised.
+    """
 
-    def _stop_tm_process(self) -> None:
-        """Stop a Tendermint node process."""
-        if self._process is None or self._stopping:
-            return
+    def __init__(self, home: Path, rpc: TendermintRPC) -> None:
+        """
+        Initialize the cache.
 
-        self._stopping = True
-        if platform.system() == "Windows":
-            self._win_stop_tm()
-        else:
-            # this will raise an exception if the process
-            # is not terminated within the specified timeout
-            self._unix_stop_tm()
+        :param home: the Tendermint home directory.
+        :param rpc: the node's RPC client, used when the peer id cannot be derived.
+        """
+        self.home = home
+        self.rpc = rpc
+        self._lock = Lock()
+        self._validator_key: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
+        self._peer_id: Optional[Tuple[Tuple[int, int], str]] = None
 
-        self._stopping = False
-        self._process = None
-        self.log("Tendermint process stopped\n")
+    @staticmethod
+    def _file_key(path: Path) -> Tuple[int, int]:
+        """Get the change key of a file."""
+        stat_result = path.stat()
+        return stat_result.st_mtime_ns, stat_result.st_size
+
+    def invalidate(self) -> None:
+        """Drop the cached values."""
+        with self._lock:
+            self._validator_key = None
+            self._peer_id = None
+
+    def validator_key(self) -> Dict[str, Any]:
+        """Get the validator key, without its private part."""
+        path = self.home / "config" / "priv_validator_key.json"
+        file_key = self._file_key(path)
+        with self._lock:
+            if self._validator_key is not None and self._validator_key[0] == file_key:
+                return dict(self._validator_key[1])
+        data = json.loads(path.read_text(encoding=ENCODING))
+        del data["priv_key"]
+        with self._lock:
+            self._validator_key = (file_key, data)
+        return dict(data)
+
+    def cached_peer_id(self) -> Tuple[Tuple[int, int], Optional[str]]:
+        """
+        Get the peer id without asking the node.
 
-    def _win_stop_tm(self) -> None:  # pragma: no cover
-        """Stop a Tendermint node process on Windows."""
-        os.kill(self._process.pid, signal.CTRL_C_EVENT)  # type: ignore  # pylint: disable=no-member
+        :return: the change key of `node_key.json` and the peer id, None if it must be read from the node's `/status`.
+        """
+        path = self.home / "config" / "node_key.json"
+        file_key = self._file_key(path)
+        with self._lock:
+            if self._peer_id is not None and self._peer_id[0] == file_key:
+                return file_key, self._peer_id[1]
         try:
-            self._process.wait(timeout=5)  # type: ignore
-        except subprocess.TimeoutExpired:  # nosec
-            os.kill(self._process.pid, signal.CTRL_BREAK_EVENT)  # type: ignore  # pylint: disable=no-member
-
-    def _unix_stop_tm(self) -> None:
-        """Stop a Tendermint node process on Unix."""
-        self._process.send_signal(signal.SIGTERM)  # type: ignore
+            node_key = json.loads(path.read_text(encoding=ENCODING))["priv_key"]
+            if node_key["type"] != "tendermint/PrivKeyEd25519":
+                raise ValueError(f"Unsupported node key type {node_key['type']}")
+            # ed25519 private keys are stored as seed || public key
+            public_key = base64.b64decode(node_key["value"])[32:]
+            peer_id = hashlib.sha256(public_key).digest()[:20].hex()
+        except (KeyError, ValueError, binascii.Error):
+            return file_key, None
+        self.remember_peer_id(file_key, peer_id)
+        return file_key, peer_id
+
+    def remember_peer_id(self, file_key: Tuple[int, int], peer_id: str) -> None:
+        """Cache the peer id of a version of `node_key.json`."""
+        with self._lock:
+            self._peer_id = (file_key, peer_id)
+
+    def peer_id(self) -> str:
+        """Get the node's peer id."""
+        file_key, peer_id = self.cached_peer_id()
+        if peer_id is None:
+            peer_id = self.rpc.status()["node_info"]["id"]
+            self.remember_peer_id(file_key, peer_id)
+        return peer_id
+
+    def params(self) -> Dict[str, Any]:
+        """Get the params served by `/params`."""
+        params = self.validator_key()
+        params["peer_id"] = self.peer_id()
+        return params
+
+    def warm_up(self) -> None:
+        """Fill the cache, ignoring errors."""
         try:
-            self._process.wait(timeout=5)  # type: ignore
-        except subprocess.TimeoutExpired:  # nosec
-            self.log("Tendermint process did not stop gracefully\n")
-
-        # if the process is still running poll will return None
-        poll = self._process.poll()  # type: ignore
-        if poll is not None:
-            return
+            self.params()
+        except Exception:  # pylint: disable=broad-except
+            pass
 
-        self._process.terminate()  # type: ignore
-        self._process.wait(3)  # type: ignore
 
-    def _stop_monitoring_thread(self) -> None:
-        """Stop a monitoring process."""
-        if self._monitoring is not None:
-            self._monitoring.stop()  # set stop event
-            self._monitoring.join(timeout=20)
+class AppHashIndex:  # pylint: disable=too-many-instance-attributes
+    """
+    Bounded index of the committed app hashes by height.
 
-    def stop(self) -> None:
-        """Stop a Tendermint node process."""
-        self._stop_monitoring_thread()
-        self._stop_tm_process()
+    Committed app hashes never change, so they are read once from the node's
+    `/blockchain` headers (20 per call) and then served from memory. The index
+    is filled as the liveness supervisor sees new blocks and on demand for
+    missed heights; the oldest heights are evicted beyond `capacity`. When a
+    `path` is given the index is appended to a JSON lines file and reloaded at
+    startup. It must be cleared when the chain is reset.
+    """
 
-    @staticmethod
-    def _write_to_console(line: str) -> None:
-        """Write line to console."""
-        sys.stdout.write(str(line))
-        sys.stdout.flush()
+    def __init__(
+        self,
+        rpc: TendermintRPC,
+        capacity: int = DEFAULT_APP_HASH_INDEX_SIZE,
+        path: Optional[Path] = None,
+    ) -> None:
+        """
+        Initialize the index.
+
+        :param rpc: the node's RPC client.
+        :param capacity: the maximum number of heights kept.
+        :param path: the file persisting the index, if any.
+        """
+        self.rpc = rpc
+        self.capacity = capacity
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._hashes: Dict[int, str] = {}
+        self._heights: Deque[int] = deque()
+        self._lock = Lock()
+        self._persisted = 0
+        if path is not None:
+            self._load(path)
+
+    @classmethod
+    def from_env(cls, rpc: TendermintRPC, path: Optional[str] = None) -> "AppHashIndex":
+        """Create an index configured from the environment, `path` overrides the file."""
+        if path is None:
+            path = os.environ.get("TM_APP_HASH_INDEX_FILE")
+        return cls(
+            rpc,
+            capacity=_env_int("TM_APP_HASH_INDEX_SIZE", DEFAULT_APP_HASH_INDEX_SIZE),
+            path=Path(path) if path else None,
+        )
+
+    def _load(self, path: Path) -> None:
+        """Load a persisted index, ignoring a torn last line."""
+        if not path.is_file():
+            return
+        with open(path, encoding=ENCODING) as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                    self._add(int(entry["height"]), entry["app_hash"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+        self._persisted = len(self._hashes)
+        self._compact()
+
+    def _add(self, height: int, app_hash: str) -> bool:
+        """Add a height, evicting the oldest ones beyond the capacity."""
+        if height in self._hashes:
+            return False
+        self._hashes[height] = app_hash
+        self._heights.append(height)
+        while len(self._heights) > self.capacity:
+            self._hashes.pop(self._heights.popleft(), None)
+        return True
+
+    def _compact(self) -> None:
+        """Rewrite the index file once it holds twice the kept heights."""
+        if self.path is None or self._persisted <= 2 * self.capacity:
+            return
+        temp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}")
+        with open(temp, "w", encoding=ENCODING) as file:
+            for height in self._heights:
+                file.write(
+                    json.dumps({"height": height, "app_hash": self._hashes[height]})
+                    + "\n"
+                )
+        os.replace(temp, self.path)
+        self._persisted = len(self._heights)
+
+    def record(self, headers: List[Dict[str, Any]]) -> int:
+        """Record block headers, returning the number of new heights."""
+        added = []
+        with self._lock:
+            for header in headers:
+                height = int(header["height"])
+                if self._add(height, header["app_hash"]):
+                    added.append((height, header["app_hash"]))
+            if self.path is not None and added:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding=ENCODING) as file:
+                    for height, app_hash in added:
+                        file.write(
+                            json.dumps({"height": height, "app_hash": app_hash}) + "\n"
+                        )
+                self._persisted += len(added)
+                self._compact()
+        return len(added)
+
+    def fetch(
+        self, min_height: Optional[int] = None, max_height: Optional[int] = None
+    ) -> int:
+        """Record the headers of up to 20 blocks, returning the latest height."""
+        params = {}
+        if min_height is not None:
+            params["minHeight"] = min_height
+        if max_height is not None:
+            params["maxHeight"] = max_height
+        response = self.rpc.get("blockchain", params=params).json()
+        if "result" not in response:
+            raise ValueError(response.get("error", {}).get("data", "no result"))
+        result = response["result"]
+        self.record([meta["header"] for meta in result["block_metas"]])
+        return int(result["last_height"])
+
+    def pending_pages(
+        self, latest_height: int, max_pages: int = 5
+    ) -> List[Tuple[int, int]]:
+        """Get the `/blockchain` pages missing after the highest recorded height."""
+        with self._lock:
+            highest = self._heights[-1] if self._heights else 0
+        next_height = max(highest + 1, latest_height - self.capacity + 1, 1)
+        pages = []
+        while next_height <= latest_height and len(pages) < max_pages:
+            max_height = min(next_height + BLOCKCHAIN_PAGE_SIZE - 1, latest_height)
+            pages.append((next_height, max_height))
+            next_height = max_height + 1
+        return pages
+
+    def catch_up(self, latest_height: int, max_requests: int = 5) -> None:
+        """Record the heights up to `latest_height` missing after the highest one."""
+        for min_height, max_height in self.pending_pages(latest_height, max_requests):
+            self.fetch(min_height, max_height)
+
+    def lookup(self, height: int) -> Optional[str]:
+        """Get the app hash of a height if it is recorded, counting hits and misses."""
+        with self._lock:
+            app_hash = self._hashes.get(height)
+        if app_hash is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return app_hash
+
+    def get(self, height: Optional[int] = None) -> Optional[str]:
+        """Get the app hash of a height, or of the latest block."""
+        if height is None:
+            height = self.fetch()
+        app_hash = self.lookup(height)
+        if app_hash is not None:
+            return app_hash
+        self.fetch(height, height + BLOCKCHAIN_PAGE_SIZE - 1)
+        with self._lock:
+            return self._hashes.get(height)
+
+    def missing(self, from_height: int, to_height: int) -> List[int]:
+        """Get the heights in `[from_height, to_height]` not recorded, counting hits and misses."""
+        with self._lock:
+            missing = [
+                height
+                for height in range(from_height, to_height + 1)
+                if height not in self._hashes
+            ]
+        self.hits += to_height - from_height + 1 - len(missing)
+        self.misses += len(missing)
+        return missing
+
+    def recorded(self, from_height: int, to_height: int) -> Dict[int, str]:
+        """Get the recorded app hashes of the heights in `[from_height, to_height]`."""
+        with self._lock:
+            return {
+                height: self._hashes[height]
+                for height in range(from_height, to_height + 1)
+                if height in self._hashes
+            }
+
+    def range(self, from_height: int, to_height: int) -> Dict[int, str]:
+        """Get the app hashes of the heights in `[from_height, to_height]`."""
+        missing = self.missing(from_height, to_height)
+        while missing:
+            next_height = missing[0]
+            max_height = min(next_height + BLOCKCHAIN_PAGE_SIZE - 1, to_height)
+            try:
+                last_height = self.fetch(next_height, max_height)
+            except ValueError:
+                # the range goes past the latest block
+                break
+            if last_height <= max_height:
+                break
+            missing = [height for height in missing if height > max_height]
+        return self.recorded(from_height, to_height)
+
+    def clear(self) -> None:
+        """Forget every height, e.g. after the chain was reset."""
+        with self._lock:
+            self._hashes.clear()
+            self._heights.clear()
+            if self.path is not None and self.path.exists():
+                self.path.unlink()
+            self._persisted = 0
+
+    def status(self) -> Dict[str, Any]:
+        """Get the index state."""
+        with self._lock:
+            return {
+                "size": len(self._heights),
+                "capacity": self.capacity,
+                "lowest": min(self._hashes) if self._hashes else None,
+                "highest": max(self._hashes) if self._hashes else None,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
 
-    def _write_to_file(self, line: str) -> None:
-        """Write line to console."""
-        with open(self.log_file, "a", encoding=ENCODING) as file:
-            file.write(line)
+
+class ManagedNode(Protocol):  # pylint: disable=too-few-public-methods
+    """
+    The state of a node manager that its checks, metrics and routes use.
+
+    `TendermintNode` and `AsyncTendermintNode` both provide it. The liveness
+    and disk checks call `restart_on_trigger` and `maintain_data_dir` from
+    their threads only for `TendermintNode`; the asyncio manager runs the
+    checks in its own tasks and awaits its versions of both.
+    """
+
+    params: TendermintParams
+    logger: Logger
+    started_at: Optional[float]
+    stdout_lines: int
+    stdout_rate: "RateMeter"
+    log_sink: "LogSink"
+    log_ring: "LogRing"
+    crash_bundles: "CrashBundles"
+    triggers: "TriggerRegistry"
+    supervisor: "LivenessSupervisor"
+    consensus: "ConsensusAnalytics"
+    identity: NodeIdentity
+    app_hashes: "AppHashIndex"
+    genesis: "GenesisManager"
+    data_reset: "DataDirReset"
+    resources: "ResourceMonitor"
+    disk: "DiskWatchdog"
+
+    @property
+    def pid(self) -> Optional[int]:
+        """Get the pid of the node process, if running."""
 
     def log(self, line: str) -> None:
-        """Open and write a line to the log file."""
-        self._write_to_console(line=line)
-        if self.write_to_log:
-            self._write_to_file(line=line)
+        """Write a line of the node output."""
 
-    def prune_blocks(self) -> int:
-        """Prune blocks from the Tendermint state"""
-        return subprocess.call(  # nosec:
-            [
-                "tendermint",
-                "--home",
-                str(self.params.home),
-                "unsafe-reset-all",
-            ]
+    def restart_on_trigger(self, trigger: "RestartTrigger", reason: str) -> Any:
+        """Restart the node process if the trigger's restart policy allows it."""
+
+    def maintain_data_dir(self, action: str) -> Any:
+        """Stop the node, maintain its data dir and start it again."""
+
+
+class LivenessSupervisor:  # pylint: disable=too-many-instance-attributes
+    """
+    Restart the node when its block height stops progressing.
+
+    The supervisor polls `/status` and tracks the latest block height and the
+    catch-up state. Stall detection is armed once the height has progressed
+    since the node (re)started, so a node waiting for its peers is left
+    alone. An armed node whose height does not change for `stall_deadline`
+    seconds, while not catching up, is restarted through the `block_stall`
+    trigger and so follows the same restart policy as the log triggers.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        node: ManagedNode,
+        interval: float = DEFAULT_LIVENESS_INTERVAL,
+        stall_deadline: float = DEFAULT_LIVENESS_STALL_DEADLINE,
+        request_timeout: float = DEFAULT_LIVENESS_REQUEST_TIMEOUT,
+        enabled: bool = True,
+    ) -> None:
+        """
+        Initialize the supervisor.
+
+        :param node: the supervised node.
+        :param interval: seconds between polls.
+        :param stall_deadline: seconds without a new block before restarting.
+        :param request_timeout: timeout of a single poll.
+        :param enabled: whether stalls restart the node, polling happens regardless.
+        """
+        self.node = node
+        self.interval = interval
+        self.stall_deadline = stall_deadline
+        self.enabled = enabled
+        self.rpc = TendermintRPC(node.params.rpc_url, timeout=request_timeout)
+        self.trigger = node.triggers.add(RestartTrigger("block_stall"))
+        self.latest_block_height: Optional[int] = None
+        self.latest_block_time: Optional[str] = None
+        self.catching_up: Optional[bool] = None
+        self.last_progress: Optional[float] = None
+        self.rpc_errors = 0
+        self._armed = False
+        self._baseline_height: Optional[int] = None
+        self._started_at: Optional[float] = None
+        self._reported_stall: Optional[Tuple[Optional[float], Optional[float]]] = None
+        self._thread: Optional[StoppableThread] = None
+
+    @classmethod
+    def from_env(cls, node: ManagedNode) -> "LivenessSupervisor":
+        """Create a supervisor configured from the environment."""
+        return cls(
+            node,
+            interval=_env_float("TM_LIVENESS_INTERVAL", DEFAULT_LIVENESS_INTERVAL),
+            stall_deadline=_env_float(
+                "TM_LIVENESS_STALL_DEADLINE", DEFAULT_LIVENESS_STALL_DEADLINE
+            ),
+            request_timeout=_env_float(
+                "TM_LIVENESS_REQUEST_TIMEOUT", DEFAULT_LIVENESS_REQUEST_TIMEOUT
+            ),
+            # without empty blocks an idle, healthy chain does not progress
+            enabled=_env_bool(
+                "TM_LIVENESS_ENABLED", node.params.consensus_create_empty_blocks
+            ),
         )
 
-    def reset_genesis_file(
+    def start(self) -> None:
+        """Start the polling thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = StoppableThread(
+            target=self._run, name="tendermint-liveness", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the polling thread, waiting at most `timeout` seconds for it."""
+        if self._thread is not None:
+            self._thread.stop()
+            wait = self.interval + self.rpc.timeout
+            self._thread.join(timeout=wait if timeout is None else min(wait, timeout))
+            self._thread = None
+
+    def _run(self) -> None:
+        """Poll until stopped."""
+        thread = cast(StoppableThread, self._thread)
+        while not thread.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:  # pylint: disable=broad-except
+                self.node.log(f"Liveness check failed: {e}\n")
+
+    def poll(self) -> None:
+        """Poll the node status and restart the node if it stalled."""
+        if self.node.started_at is None:
+            return
+        try:
+            sync_info: Optional[Dict[str, Any]] = self.rpc.status().get("sync_info")
+        except _rpc_errors():
+            sync_info = None
+        height = self.observe(sync_info)
+        if height is not None:
+            try:
+                self.node.app_hashes.catch_up(height)
+            except _rpc_errors() as e:
+                self.node.log(f"Could not index app hashes: {e}\n")
+
+        reason = self.check_stall()
+        if reason is not None:
+            self.node.restart_on_trigger(self.trigger, reason)
+
+    def observe(self, sync_info: Optional[Dict[str, Any]]) -> Optional[int]:
+        """
+        Record a `/status` sync info, or a failed poll when it is None.
+
+        :param sync_info: the `sync_info` of the node status.
+        :return: the latest block height, if the poll succeeded.
+        """
+        now = monotonic()
+        started_at = self.node.started_at
+        if started_at != self._started_at:
+            self._started_at = started_at
+            self._armed = False
+            self._baseline_height = None
+            self.last_progress = now
+
+        try:
+            height = int(cast(Dict[str, Any], sync_info)["latest_block_height"])
+        except (ValueError, KeyError, TypeError):
+            self.rpc_errors += 1
+            return None
+        sync_info = cast(Dict[str, Any], sync_info)
+        self.catching_up = bool(sync_info.get("catching_up", False))
+        self.latest_block_time = sync_info.get("latest_block_time")
+        if height != self.latest_block_height:
+            self.latest_block_height = height
+            self.last_progress = now
+        if self._baseline_height is None:
+            self._baseline_height = height
+        elif height > self._baseline_height:
+            self._armed = True
+        return height
+
+    def check_stall(self) -> Optional[str]:
+        """
+        Get why the node stalled, if it should be restarted for it.
+
+        A stall is logged and handed to the restart policy once, later polls
+        only retry when the policy allows a restart again, so a suppressed
+        restart is not logged on every poll.
+        """
+        reason = self.stall_reason()
+        if reason is None:
+            return None
+        stall = (self._started_at, self.last_progress)
+        if stall != self._reported_stall:
+            self._reported_stall = stall
+            self.node.log(f"Node stalled: {reason}\n")
+        elif self.trigger.policy.next_delay() is None:
+            return None
+        return reason if self.enabled else None
+
+    def stall_reason(self) -> Optional[str]:
+        """Get why the node is considered stalled, if it is."""
+        now = monotonic()
+        if not self.stalled(now):
+            return None
+        return (
+            f"block height {self.latest_block_height} did not change "
+            f"for {now - cast(float, self.last_progress):.1f}s"
+        )
+
+    def stalled(self, now: Optional[float] = None) -> bool:
+        """Check whether the node stopped producing blocks."""
+        if not self._armed or self.catching_up or self.last_progress is None:
+            return False
+        now = monotonic() if now is None else now
+        return now - self.last_progress > self.stall_deadline
+
+    def status(self) -> Dict[str, Any]:
+        """Get the supervisor state."""
+        return {
+            "enabled": self.enabled,
+            "armed": self._armed,
+            "latest_block_height": self.latest_block_height,
+            "latest_block_time": self.latest_block_time,
+            "catching_up": self.catching_up,
+            "seconds_since_progress": (
+                None if self.last_progress is None else monotonic() - self.last_progress
+            ),
+            "rpc_errors": self.rpc_errors,
+        }
+
+
+class GenesisManager:
+    """
+    In-memory model of `genesis.json`.
+
+    The parsed genesis is kept in memory and re-read only when the file
+    changes on disk, e.g. after `tendermint init`. Mutations are applied to
+    the model and persisted through a single atomic write.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        Initialize the manager.
+
+        :param path: the genesis file.
+        """
+        self.path = path
+        self._lock = Lock()
+        self._genesis: Dict[str, Any] = {}
+        self._file_key: Optional[Tuple[int, int]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        """Get the genesis, re-reading it if the file changed."""
+        stat_result = self.path.stat()
+        file_key = (stat_result.st_mtime_ns, stat_result.st_size)
+        if file_key != self._file_key:
+            self._genesis = json.loads(self.path.read_text(encoding=ENCODING))
+            self._file_key = file_key
+        return self._genesis
+
+    def _save(self, genesis: Dict[str, Any]) -> None:
+        """Persist the genesis."""
+        _atomic_write_text(self.path, json.dumps(genesis, indent=2))
+        stat_result = self.path.stat()
+        self._genesis = genesis
+        self._file_key = (stat_result.st_mtime_ns, stat_result.st_size)
+
+    def get(self) -> Dict[str, Any]:
+        """Get a copy of the genesis."""
+        with self._lock:
+            return json.loads(json.dumps(self._load()))
+
+    def defaults(self) -> Dict[str, str]:
+        """Get the defaults used by hard resets."""
+        with self._lock:
+            return dict(genesis_time=self._load().get("genesis_time"))
+
+    def reset(self, genesis_time: str, initial_height: str, chain_id: str) -> None:
+        """Set the genesis time, initial height and chain id."""
+        with self._lock:
+            genesis = dict(self._load())
+            genesis["genesis_time"] = genesis_time
+            genesis["initial_height"] = initial_height
+            genesis["chain_id"] = chain_id
+            self._save(genesis)
+
+    def replace(self, genesis: Dict[str, Any]) -> None:
+        """Replace the whole genesis."""
+        with self._lock:
+            self._save(genesis)
+
+
+def is_initialized(home: Path) -> bool:
+    """
+    Check whether `tendermint init` would leave a home unchanged.
+
+    `init` only creates the node and validator keys, the genesis, the config
+    and the validator signing state when they are missing.
+    """
+    config_path = home / "config" / "config.toml"
+    if not all(
+        path.is_file()
+        for path in (
+            config_path,
+            home / "config" / "genesis.json",
+            home / "config" / "node_key.json",
+            home / "config" / "priv_validator_key.json",
+            home / "data" / "priv_validator_state.json",
+        )
+    ):
+        return False
+    try:
+        config = TendermintConfig.load(config_path)
+        for section, key in CONFIG_OVERRIDE:
+            config.get(section, key)
+    except (OSError, KeyError, ValueError):
+        # fall back to running `init` as before
+        return False
+    return True
+
+
+class ResourceLimits:
+    """
+    Optional CPU and memory limits of the node process, Linux only.
+
+    When `cgroup_parent` is a delegated cgroup v2 directory the node runs in a
+    child cgroup of it with `memory.max` and `cpu.max` set. The parent must be
+    writable by the manager and hold no processes itself, as cgroup v2 only
+    enables controllers for cgroups without processes of their own. Otherwise
+    the memory limit falls back to `RLIMIT_DATA` and the CPU limit, a rate
+    rlimits cannot express, is not applied.
+
+    The limits are applied by the manager once the node process is spawned,
+    writing its pid to `cgroup.procs` and setting its rlimits with
+    `prlimit`, since running Python code between fork and exec of a
+    multithreaded process can deadlock. Rlimits above the manager's hard
+    limit, which an unprivileged process cannot raise, are lowered to it.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
         self,
-        genesis_time: str,
-        initial_height: str,
-        period_count: str,
+        memory_bytes: int = 0,
+        cpus: float = 0.0,
+        max_open_files: int = 0,
+        cgroup_parent: Optional[Path] = None,
+        name: str = "tendermint",
     ) -> None:
-        """Reset genesis file."""
+        """
+        Initialize the limits.
 
-        genesis_file = Path(str(self.params.home), "config", "genesis.json")
-        genesis_config = json.loads(genesis_file.read_text(encoding=ENCODING))
-        genesis_config["genesis_time"] = genesis_time
-        genesis_config["initial_height"] = initial_height
-        genesis_config["chain_id"] = f"autonolas-{period_count}"
-        genesis_file.write_text(json.dumps(genesis_config, indent=2), encoding=ENCODING)
+        :param memory_bytes: memory limit in bytes, 0 for none.
+        :param cpus: CPU limit in cores, 0 for none.
+        :param max_open_files: open file limit, 0 for none.
+        :param cgroup_parent: the cgroup v2 directory to create the node cgroup in.
+        :param name: the name of the node cgroup.
+        """
+        self.memory_bytes = memory_bytes
+        self.cpus = cpus
+        self.max_open_files = max_open_files
+        self.cgroup_parent = cgroup_parent
+        self.name = name
+        self.cgroup: Optional[Path] = None
+        self.error: Optional[str] = None
+        self.rlimits: Dict[int, int] = {}
+        self.clamped: List[str] = []
+
+    @classmethod
+    def from_env(cls, home: Path) -> "ResourceLimits":
+        """Create the limits of the node in `home` from the environment."""
+        cgroup_parent = os.environ.get("TM_NODE_CGROUP", "")
+        return cls(
+            memory_bytes=_env_int("TM_NODE_MEMORY_LIMIT", 0),
+            cpus=_env_float("TM_NODE_CPU_LIMIT", 0.0),
+            max_open_files=_env_int("TM_NODE_MAX_OPEN_FILES", 0),
+            cgroup_parent=Path(cgroup_parent) if cgroup_parent else None,
+            # one cgroup per home, so the nodes of a multi-node manager are apart
+            name="tendermint-"
+            + hashlib.sha256(str(home.resolve()).encode()).hexdigest()[:12],
+        )
 
+    @property
+    def enabled(self) -> bool:
+        """Whether any limit is set, and the platform supports limits."""
+        limited = self.memory_bytes > 0 or self.cpus > 0 or self.max_open_files > 0
+        return limited and sys.platform.startswith("linux")
+
+    def prepare(self) -> None:
+        """Create the node cgroup, falling back to rlimits if that fails, and check the rlimits."""
+        self.cgroup = None
+        self.error = None
+        self.rlimits = {}
+        self.clamped = []
+        if not self.enabled:
+            return
+        self._prepare_cgroup()
+        self._prepare_rlimits()
 
-def load_genesis() -> Any:
-    """Load genesis file."""
-    return json.loads(
-        Path(os.environ["TMHOME"], "config", "genesis.json").read_text(
-            encoding=ENCODING
+    def _prepare_cgroup(self) -> None:
+        """Create the node cgroup, if a parent is set and a limit needs one."""
+        if self.cgroup_parent is None:
+            return
+        if self.memory_bytes <= 0 and self.cpus <= 0:
+            return
+        cgroup = self.cgroup_parent / self.name
+        try:
+            controllers = ["+memory"] if self.memory_bytes > 0 else []
+            controllers += ["+cpu"] if self.cpus > 0 else []
+            (self.cgroup_parent / "cgroup.subtree_control").write_text(
+                " ".join(controllers), encoding=ENCODING
+            )
+            cgroup.mkdir(exist_ok=True)
+            if self.memory_bytes > 0:
+                (cgroup / "memory.max").write_text(
+                    str(self.memory_bytes), encoding=ENCODING
+                )
+            if self.cpus > 0:
+                (cgroup / "cpu.max").write_text(
+                    f"{int(self.cpus * CGROUP_CPU_PERIOD)} {CGROUP_CPU_PERIOD}",
+                    encoding=ENCODING,
+                )
+        except OSError as e:
+            self.error = f"Could not set up cgroup {cgroup}: {e}"
+            return
+        self.cgroup = cgroup
+
+    def _prepare_rlimits(self) -> None:
+        """Get the rlimits to set, lowered to the hard limits of the manager."""
+        import resource  # pylint: disable=import-outside-toplevel
+
+        wanted = {}
+        if self.cgroup is None and self.memory_bytes > 0:
+            wanted[resource.RLIMIT_DATA] = ("memory", self.memory_bytes)
+        if self.max_open_files > 0:
+            wanted[resource.RLIMIT_NOFILE] = ("open files", self.max_open_files)
+        for kind, (name, value) in wanted.items():
+            _, hard = resource.getrlimit(kind)
+            if hard != resource.RLIM_INFINITY and value > hard:
+                self.clamped.append(f"{name} limit {value} lowered to {hard}")
+                value = hard
+            self.rlimits[kind] = value
+
+    def before_spawn(self, log: Callable[[str], None]) -> None:
+        """Prepare the limits of the next node process, logging any fallback."""
+        self.prepare()
+        if self.error is not None:
+            log(f"{self.error}, falling back to rlimits\n")
+        for clamped in self.clamped:
+            log(f"Resource limit above the hard limit, {clamped}\n")
+
+    def after_spawn(self, pid: int, log: Callable[[str], None]) -> None:
+        """Apply the limits to a spawned node process, logging any failure."""
+        if not self.enabled:
+            return
+        try:
+            self.apply(pid)
+        except OSError as e:
+            log(f"Could not apply the resource limits: {e}\n")
+
+    def apply(self, pid: int) -> None:
+        """Apply the limits to a spawned node process, run in the manager."""
+        import resource  # pylint: disable=import-outside-toplevel
+
+        if self.cgroup is not None:
+            (self.cgroup / "cgroup.procs").write_text(str(pid), encoding=ENCODING)
+        for kind, value in self.rlimits.items():
+            resource.prlimit(pid, kind, (value, value))
+
+    def usage(self) -> Dict[str, Any]:
+        """Get the accounting of the node cgroup, if the node runs in one."""
+        if self.cgroup is None:
+            return {}
+        usage: Dict[str, Any] = {}
+        with contextlib.suppress(OSError, ValueError):
+            usage["memory_bytes"] = int(
+                (self.cgroup / "memory.current").read_text(encoding=ENCODING)
+            )
+        for name, keys in (
+            ("memory.events", ("oom", "oom_kill")),
+            ("cpu.stat", ("usage_usec", "nr_throttled", "throttled_usec")),
+        ):
+            with contextlib.suppress(OSError, ValueError):
+                text = (self.cgroup / name).read_text(encoding=ENCODING)
+                for line in text.splitlines():
+                    key, _, value = line.partition(" ")
+                    if key in keys:
+                        usage[key] = int(value)
+        return usage
+
+    def status(self) -> Dict[str, Any]:
+        """Get the configured limits and how they are enforced."""
+        if not self.enabled:
+            enforcement = "none"
+        elif self.cgroup is not None:
+            enforcement = "cgroup"
+        else:
+            enforcement = "rlimit"
+        return {
+            "memory_bytes": self.memory_bytes or None,
+            "cpus": self.cpus or None,
+            "max_open_files": self.max_open_files or None,
+            "enforcement": enforcement,
+            "cgroup": None if self.cgroup is None else str(self.cgroup),
+            "error": self.error,
+        }
+
+
+class ResourceMonitor:
+    """
+    Sample the resource usage of the node process from `/proc`.
+
+    Every `interval` seconds the RSS, CPU time, open file descriptors, threads
+    and disk I/O of the node are read, and the CPU usage since the previous
+    sample of the same process is derived from them. The last `history`
+    samples are kept. Sampling is a handful of small `/proc` reads, so the
+    default interval costs next to nothing; an interval of 0 disables it.
+    """
+
+    def __init__(
+        self,
+        pid: Callable[[], Optional[int]],
+        limits: ResourceLimits,
+        interval: float = DEFAULT_RESOURCE_SAMPLE_INTERVAL,
+        history: int = DEFAULT_RESOURCE_SAMPLE_HISTORY,
+    ) -> None:
+        """
+        Initialize the monitor.
+
+        :param pid: returns the pid of the node process, None if it is not running.
+        :param limits: the limits of the node.
+        :param interval: seconds between samples, 0 to disable sampling.
+        :param history: the number of samples to keep.
+        """
+        self.pid = pid
+        self.limits = limits
+        self.interval = interval
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=max(1, history))
+        self._previous: Optional[Tuple[int, float, float]] = None
+        self._thread: Optional[StoppableThread] = None
+
+    @classmethod
+    def from_env(
+        cls, pid: Callable[[], Optional[int]], limits: ResourceLimits
+    ) -> "ResourceMonitor":
+        """Create a monitor configured from the environment."""
+        return cls(
+            pid,
+            limits,
+            interval=_env_float(
+                "TM_RESOURCE_SAMPLE_INTERVAL", DEFAULT_RESOURCE_SAMPLE_INTERVAL
+            ),
+            history=_env_int(
+                "TM_RESOURCE_SAMPLE_HISTORY", DEFAULT_RESOURCE_SAMPLE_HISTORY
+            ),
         )
-    )
 
+    @property
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Get the latest sample."""
+        return self.samples[-1] if self.samples else None
+
+    def sample(self) -> Optional[Dict[str, Any]]:
+        """Sample the node process, if it is running."""
+        pid = self.pid()
+        if pid is None:
+            self._previous = None
+            return None
+        sample = _read_proc_resources(pid)
+        if sample is None:
+            return None
+        now = monotonic()
+        if self._previous is not None and self._previous[0] == pid:
+            _, then, cpu_seconds = self._previous
+            sample["cpu_percent"] = round(
+                100 * (sample["cpu_seconds"] - cpu_seconds) / max(now - then, 1e-9), 2
+            )
+        self._previous = (pid, now, sample["cpu_seconds"])
+        sample.update({"pid": pid, "time": datetime.now().timestamp()})
+        cgroup = self.limits.usage()
+        if cgroup:
+            sample["cgroup"] = cgroup
+        self.samples.append(sample)
+        return sample
+
+    def start(self) -> None:
+        """Start the sampling thread."""
+        if self.interval <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = StoppableThread(
+            target=self._run, name="tendermint-resources", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the sampling thread, waiting at most `timeout` seconds for it."""
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread.join(
+                timeout=(
+                    self.interval if timeout is None else min(self.interval, timeout)
+                )
+            )
+            self._thread = None
+
+    def _run(self) -> None:
+        """Sample until stopped."""
+        thread = cast(StoppableThread, self._thread)
+        while not thread.wait(self.interval):
+            self.sample()
+
+    def status(self) -> Dict[str, Any]:
+        """Get the limits and the recent samples."""
+        return {
+            "interval": self.interval,
+            "limits": self.limits.status(),
+            "latest": self.latest,
+            "samples": list(self.samples),
+        }
 
-def get_defaults() -> Dict[str, str]:
-    """Get defaults from genesis file."""
-    genesis = load_genesis()
-    return dict(genesis_time=genesis.get("genesis_time"))
+
+def _data_paths(home: Path) -> Tuple[Path, Path, Path]:
+    """Read the data dir, validator state and address book paths of a home from its config."""
+    paths = {
+        ("", "db_dir"): "data",
+        ("", "priv_validator_state_file"): "data/priv_validator_state.json",
+        ("p2p", "addr_book_file"): "config/addrbook.json",
+    }
+    try:
+        config: Optional[TendermintConfig] = TendermintConfig.load(
+            home / "config" / "config.toml"
+        )
+    except FileNotFoundError:
+        # not initialised yet, tendermint's defaults apply
+        config = None
+    for (section, key), default in paths.items():
+        try:
+            paths[(section, key)] = str(
+                default if config is None else config.get(section, key)
+            )
+        except KeyError:
+            pass
+    # relative paths are relative to the home, absolute ones replace it
+    return (
+        home / paths[("", "db_dir")],
+        home / paths[("", "priv_validator_state_file")],
+        home / paths[("p2p", "addr_book_file")],
+    )
 
 
-def override_config_toml() -> None:
-    """Update sync method."""
+class DataDirReset:
+    """
+    In-process equivalent of `tendermint unsafe-reset-all`.
 
-    config_path = str(Path(os.environ["TMHOME"]) / "config" / "config.toml")
-    logging.info(config_path)
-    with open(config_path, "r", encoding=ENCODING) as fp:
-        config = fp.read()
+    The reset removes the data directory and the address book and writes a
+    fresh validator signing state, keeping the keys, the config and the
+    genesis. Their paths are read from `config.toml` (`db_dir`,
+    `priv_validator_state_file` and `p2p.addr_book_file`) on every reset. In
+    standby mode an empty data directory is prepared in the background next
+    to the data directory, so a reset is two renames on one filesystem: the
+    old data directory is moved aside and deleted off the critical path.
+    """
+
+    def __init__(self, home: Path, standby: bool = False) -> None:
+        """
+        Initialize the reset.
 
-    for old, new in CONFIG_OVERRIDE:
-        config = config.replace(old, new)
+        :param home: the Tendermint home directory.
+        :param standby: whether to keep an empty data directory ready.
+        """
+        self.home = home
+        self.standby = standby
+        self.swaps = 0
+        self.wipes = 0
+        self._lock = Lock()
+        self._worker: Optional[Thread] = None
+        self._resolve()
+
+    def _resolve(self) -> None:
+        """Read the data dir, validator state and address book paths from the config."""
+        self.data_dir, self.state_file, self.addr_book = _data_paths(self.home)
+        self.standby_dir = self.data_dir.parent / STANDBY_DATA_DIR
+
+    def _state_in(self, data_dir: Path) -> Optional[Path]:
+        """Get where the validator state goes in a data dir, None if it is kept outside."""
+        try:
+            return data_dir / self.state_file.relative_to(self.data_dir)
+        except ValueError:
+            return None
+
+    @classmethod
+    def from_env(cls, home: Path) -> "DataDirReset":
+        """Create a reset configured from the environment."""
+        return cls(home, standby=_env_bool("TM_RESET_STANDBY", False))
+
+    def _prepare(self) -> None:
+        """Create the standby data directory and delete the moved aside ones."""
+        with self._lock:
+            self._resolve()
+            if not self.standby_dir.is_dir():
+                staging = self.standby_dir.with_name(
+                    f"{STANDBY_DATA_DIR}.{uuid.uuid4().hex}"
+                )
+                staging.mkdir(parents=True)
+                state_file = self._state_in(staging)
+                if state_file is not None:
+                    _write_validator_state_file(state_file)
+                os.chmod(staging, 0o700)
+                os.replace(staging, self.standby_dir)
+            parent = self.data_dir.parent
+        for path in parent.glob(f"{DISCARDED_DATA_DIR}.*"):
+            shutil.rmtree(path, ignore_errors=True)
+
+    def prepare(self) -> None:
+        """Prepare the standby data directory in the background."""
+        if not self.standby:
+            return
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = Thread(
+            target=self._prepare, name="tendermint-standby-data", daemon=True
+        )
+        self._worker.start()
+
+    def reset(self) -> None:
+        """Reset the node state, the node must be stopped."""
+        with self._lock:
+            self._resolve()
+            if self.standby and self.standby_dir.is_dir():
+                if self.data_dir.exists():
+                    os.replace(
+                        self.data_dir,
+                        self.data_dir.with_name(
+                            f"{DISCARDED_DATA_DIR}.{uuid.uuid4().hex}"
+                        ),
+                    )
+                os.replace(self.standby_dir, self.data_dir)
+                self.swaps += 1
+            else:
+                if self.data_dir.exists():
+                    shutil.rmtree(self.data_dir)
+                self.data_dir.mkdir(parents=True)
+                os.chmod(self.data_dir, 0o700)
+                self.wipes += 1
+            if self._state_in(self.data_dir) is None or not self.state_file.exists():
+                _write_validator_state_file(self.state_file)
+            with contextlib.suppress(FileNotFoundError):
+                self.addr_book.unlink()
+        self.prepare()
+
+
+def _tree_size(path: Path) -> int:
+    """Get the size of the files under a path, following no links."""
+    try:
+        if not path.is_dir() or path.is_symlink():
+            return path.lstat().st_size
+        with os.scandir(path) as entries:
+            return sum(_tree_size(Path(entry.path)) for entry in entries)
+    except FileNotFoundError:
+        # removed while we walked, e.g. a compacted LevelDB table
+        return 0
+
+
+def _parse_time_window(value: str) -> Optional[Tuple[int, int]]:
+    """Parse an `HH:MM-HH:MM` local time window into minutes of the day."""
+    value = value.strip()
+    if value == "":
+        return None
+    match = re.fullmatch(r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})", value)
+    if match is None:
+        raise ValueError(f"Invalid maintenance window {value!r}, expected HH:MM-HH:MM")
+    hours_start, minutes_start, hours_end, minutes_end = map(int, match.groups())
+    return hours_start * 60 + minutes_start, hours_end * 60 + minutes_end
+
+
+class DiskWatchdog:  # pylint: disable=too-many-instance-attributes
+    """
+    Keep the size of the node data dir in check.
+
+    Every `interval` seconds the data dir, `db_dir` in `config.toml`, is
+    measured, per store. Once it reaches `compact_threshold` bytes, the next
+    check within the maintenance window stops the node, compacts its LevelDB
+    stores with `compact_command`, which gets `--home` appended, and starts
+    the node again. Tendermint v0.34 ships no compaction command, so
+    compaction is off unless one is set. The data dir is never pruned here:
+    that needs a new genesis agreed with the app, which only `/hard_reset`
+    gets. Maintenance runs at most once every `min_interval` seconds. It
+    takes the reset lock of the node, which gentle and hard resets hold too,
+    so it never overlaps any reset; a check that comes during a reset leaves
+    the maintenance to the next one.
+    """
 
-    with open(config_path, "w+", encoding=ENCODING) as fp:
-        fp.write(config)
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        node: ManagedNode,
+        interval: float = DEFAULT_DISK_CHECK_INTERVAL,
+        compact_threshold: int = 0,
+        window: Optional[Tuple[int, int]] = None,
+        min_interval: float = DEFAULT_DISK_MAINTENANCE_MIN_INTERVAL,
+        compact_command: str = "",
+        compact_timeout: float = DEFAULT_DISK_COMPACT_TIMEOUT,
+        history: int = DEFAULT_DISK_SAMPLE_HISTORY,
+    ) -> None:
+        """
+        Initialize the watchdog.
+
+        :param node: the node whose data dir is watched.
+        :param interval: seconds between measurements, 0 to disable the watchdog.
+        :param compact_threshold: data dir size that triggers a compaction, 0 to never compact.
+        :param window: the local time window maintenance may run in, in minutes of the day, any time if None.
+        :param min_interval: minimum seconds between two maintenance runs.
+        :param compact_command: the command compacting the LevelDB stores of a home, empty to never compact.
+        :param compact_timeout: seconds the compaction may take before it is killed.
+        :param history: the number of measurements to keep.
+        """
+        self.node = node
+        self.home = Path(node.params.home or os.environ["TMHOME"])
+        self.interval = interval
+        self.compact_threshold = compact_threshold
+        self.window = window
+        self.min_interval = min_interval
+        self.compact_command = compact_command
+        self.compact_timeout = compact_timeout
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=max(2, history))
+        self.maintenance: Deque[Dict[str, Any]] = deque(maxlen=max(2, history))
+        self.counts = {DISK_ACTION_COMPACT: 0}
+        self._last_maintenance: Optional[float] = None
+        self._thread: Optional[StoppableThread] = None
+
+    @classmethod
+    def from_env(cls, node: ManagedNode) -> "DiskWatchdog":
+        """Create a watchdog configured from the environment."""
+        return cls(
+            node,
+            interval=_env_float("TM_DISK_CHECK_INTERVAL", DEFAULT_DISK_CHECK_INTERVAL),
+            compact_threshold=_env_int("TM_DISK_COMPACT_THRESHOLD", 0),
+            window=_parse_time_window(os.environ.get("TM_DISK_MAINTENANCE_WINDOW", "")),
+            min_interval=_env_float(
+                "TM_DISK_MAINTENANCE_MIN_INTERVAL",
+                DEFAULT_DISK_MAINTENANCE_MIN_INTERVAL,
+            ),
+            compact_command=os.environ.get("TM_DISK_COMPACT_COMMAND", ""),
+            compact_timeout=_env_float(
+                "TM_DISK_COMPACT_TIMEOUT", DEFAULT_DISK_COMPACT_TIMEOUT
+            ),
+        )
 
+    @property
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Get the latest measurement."""
+        return self.samples[-1] if self.samples else None
+
+    def measure(self) -> Dict[str, Any]:
+        """Measure the data dir and each store in it."""
+        data_dir = _data_paths(self.home)[0]
+        stores: Dict[str, int] = {}
+        with contextlib.suppress(FileNotFoundError):
+            with os.scandir(data_dir) as entries:
+                for entry in entries:
+                    stores[entry.name] = _tree_size(Path(entry.path))
+        sample = {
+            "time": datetime.now().timestamp(),
+            "total_bytes": sum(stores.values()),
+            "stores": stores,
+        }
+        self.samples.append(sample)
+        return sample
+
+    def growth_per_hour(self) -> Optional[float]:
+        """Get how fast the data dir grew since the last maintenance, in bytes per hour."""
+        if len(self.samples) < 2:
+            return None
+        first, last = self.samples[0], self.samples[-1]
+        elapsed = last["time"] - first["time"]
+        if elapsed <= 0:
+            return None
+        return round((last["total_bytes"] - first["total_bytes"]) * 3600 / elapsed, 1)
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        """Check whether maintenance may run now."""
+        if self.window is None:
+            return True
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        start, end = self.window
+        if start <= end:
+            return start <= minute < end
+        # the window spans midnight
+        return minute >= start or minute < end
+
+    def due(self) -> Optional[str]:
+        """Get the maintenance the latest measurement calls for, if it may run now."""
+        sample = self.latest
+        if sample is None or not self.in_window():
+            return None
+        if (
+            self._last_maintenance is not None
+            and monotonic() - self._last_maintenance < self.min_interval
+        ):
+            return None
+        if self.compact_command and 0 < self.compact_threshold <= sample["total_bytes"]:
+            return DISK_ACTION_COMPACT
+        return None
 
-def update_peers(validators: List[Dict], config_path: Path) -> None:
-    """Fix peers."""
+    def maintain(self, action: str) -> Dict[str, Any]:
+        """
+        Compact the data dir, while the node is stopped.
 
-    config_text = config_path.read_text(encoding="utf-8")
+        :param action: `DISK_ACTION_COMPACT`.
+        :return: the record of the run, with the sizes before and after it.
+        """
+        started = monotonic()
+        record: Dict[str, Any] = {
+            "action": action,
+            "time": datetime.now().timestamp(),
+            "before_bytes": _tree_size(_data_paths(self.home)[0]),
+            "error": None,
+        }
+        cmd = shlex.split(self.compact_command) + ["--home", str(self.home)]
+        try:
+            result = subprocess.run(  # nosec
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=self.compact_timeout,
+                check=False,
+            )
+            if result.returncode != 0:
+                output = result.stdout.decode(ENCODING, errors="replace")
+                record["error"] = (
+                    f"{cmd[0]} exited with {result.returncode}: {output[-500:]}"
+                )
+        except (OSError, subprocess.SubprocessError) as e:
+            record["error"] = str(e)
+        self._last_maintenance = monotonic()
+        self.counts[action] += 1
+        # the growth rate is measured from one maintenance to the next
+        self.samples.clear()
+        record["after_bytes"] = self.measure()["total_bytes"]
+        record["duration"] = round(monotonic() - started, 3)
+        self.maintenance.append(record)
+        return record
+
+    def check(self) -> Optional[str]:
+        """Measure the data dir and run the maintenance it calls for, if any."""
+        self.measure()
+        action = self.due()
+        if action is not None:
+            self.node.maintain_data_dir(action)
+        return action
+
+    def start(self) -> None:
+        """Start the watchdog thread."""
+        if self.interval <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.warn_no_command()
+        self._thread = StoppableThread(
+            target=self._run, name="tendermint-disk", daemon=True
+        )
+        self._thread.start()
 
-    new_peer_string = 'persistent_peers = "'
-    for peer in validators:
-        hostname = peer["hostname"]
-        if hostname in ("localhost", "0.0.0.0"):  # nosec
-            # This (tendermint) node will be running in a docker container and no other node
-            # will be running in the same container. If we receive either localhost or 0.0.0.0,
-            # we make an assumption that the address belongs to a node running on the
-            # same machine with a different docker container and different p2p port so,
-            # we replace the hostname with the docker's internal host url.
-            hostname = "localhost"
-        new_peer_string += (
-            peer["peer_id"] + "@" + hostname + ":" + str(peer["p2p_port"]) + ","
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the watchdog thread, waiting at most `timeout` seconds for it."""
+        if self._thread is None or self._thread is current_thread():
+            # the node is stopped for a maintenance run of the watchdog itself
+            return
+        self._thread.stop()
+        self._thread.join(
+            timeout=self.interval if timeout is None else min(self.interval, timeout)
         )
-    new_peer_string = new_peer_string[:-1] + '"\n'
+        self._thread = None
+
+    def warn_no_command(self) -> None:
+        """Log that compaction is off when a threshold is set without a command."""
+        if self.compact_threshold > 0 and not self.compact_command:
+            self.node.log(
+                "TM_DISK_COMPACT_THRESHOLD is set without TM_DISK_COMPACT_COMMAND, "
+                "the data dir will not be compacted\n"
+            )
 
-    updated_config = re.sub('persistent_peers = ".*\n', new_peer_string, config_text)
-    config_path.write_text(updated_config, encoding="utf-8")
+    def _run(self) -> None:
+        """Check until stopped."""
+        thread = cast(StoppableThread, self._thread)
+        while not thread.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:  # pylint: disable=broad-except
+                self.node.log(f"Data dir check failed: {e}\n")
+
+    def status(self) -> Dict[str, Any]:
+        """Get the thresholds, the recent measurements and maintenance runs."""
+        return {
+            "interval": self.interval,
+            "compact_threshold": self.compact_threshold,
+            "compact_command": self.compact_command or None,
+            "window": (
+                None
+                if self.window is None
+                else "-".join(f"{m // 60:02d}:{m % 60:02d}" for m in self.window)
+            ),
+            "in_window": self.in_window(),
+            "due": self.due(),
+            "latest": self.latest,
+            "growth_bytes_per_hour": self.growth_per_hour(),
+            "maintenance": list(self.maintenance),
+            "counts": dict(self.counts),
+        }
 
 
-def update_external_address(external_address: str, config_path: Path) -> None:
-    """Update the external address."""
-    config_text = config_path.read_text(encoding="utf-8")
-    new_external_address = f'external_address = "{external_address}"\n'
-    updated_config = re.sub(
-        'external_address = ".*\n', new_external_address, config_text
+class TendermintLogParser:
+    """
+    Parse lines of the node output into structured events.
+
+    Both the `plain` and the `json` log formats are understood. An event has
+    the level, the timestamp, the module, the message and the other fields of
+    the line, plus the height, round and consensus step the line is about,
+    None where it does not tell them. The `plain` format writes local time
+    without an offset, so its timestamps are read in the local time zone of
+    the manager, which shares the host with the node.
+    """
+
+    _plain_regex = re.compile(
+        r"([DIEW])\[(\d{4}-\d{2}-\d{2})\|(\d{2}:\d{2}:\d{2}(?:\.\d+)?)\]\s(.*)"
     )
-    config_path.write_text(updated_config, encoding="utf-8")
+    _fields_start_regex = re.compile(r"\s[\w.\-]+=")
+    _field_regex = re.compile(r'([\w.\-]+)=("(?:[^"\\]|\\.)*"|\S*)')
+    _legacy_step_regex = re.compile(r"enter(\w+)\((\d+)/(\d+)\)")
+    _proposal_regex = re.compile(r"Proposal\{(\d+)/(\d+)")
 
+    @staticmethod
+    def _unquote(value: str) -> str:
+        """Unquote a logfmt value."""
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+        return value
 
-def update_genesis_config(data: Dict) -> None:
-    """Update genesis.json file for the tendermint node."""
+    @staticmethod
+    def _local_time(date: str, clock: str) -> Optional[float]:
+        """Parse the local date and time of a `plain` line into a timestamp."""
+        seconds, _, fraction = clock.partition(".")
+        try:
+            parsed = datetime.strptime(f"{date}T{seconds}", "%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            return None
+        return parsed.timestamp() + float(f"0.{fraction or 0}")
+
+    @classmethod
+    def _split(cls, line: str) -> Optional[Tuple[str, Optional[float], str, Dict]]:
+        """Split a line into its level, timestamp, message and fields."""
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return None
+            if not isinstance(record, dict):
+                return None
+            fields = {key: str(value) for key, value in record.items()}
+            message = fields.pop("_msg", None) or fields.pop("msg", "")
+            return (
+                fields.pop("level", "")[:1].upper(),
+                _parse_block_time(fields.pop("ts", None)),
+                message,
+                fields,
+            )
+        match = cls._plain_regex.match(line)
+        if match is None:
+            return None
+        level, date, clock, rest = match.groups()
+        start = cls._fields_start_regex.search(rest)
+        if start is None:
+            message, fields = rest.strip(), {}
+        else:
+            message = rest[: start.start()].strip()
+            fields = {
+                key: cls._unquote(value)
+                for key, value in cls._field_regex.findall(rest[start.start() :])
+            }
+        return level, cls._local_time(date, clock), message, fields
 
-    genesis_file = Path(os.environ["TMHOME"]) / "config" / "genesis.json"
-    genesis_data = {}
-    genesis_data["genesis_time"] = data["genesis_config"]["genesis_time"]
-    genesis_data["chain_id"] = data["genesis_config"]["chain_id"]
-    genesis_data["initial_height"] = "0"
-    genesis_data["consensus_params"] = data["genesis_config"]["consensus_params"]
-    genesis_data["validators"] = [
-        {
-            "address": validator["address"],
-            "pub_key": validator["pub_key"],
-            "power": validator["power"],
-            "name": validator["name"],
+    @classmethod
+    def parse(cls, line: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse a line.
+
+        :param line: the line.
+        :return: the event, None if the line is not a Tendermint log line.
+        """
+        parts = cls._split(line.strip())
+        if parts is None:
+            return None
+        level, timestamp, message, fields = parts
+        height, round_ = fields.get("height", ""), fields.get("round", "")
+        step = CONSENSUS_STEP_MESSAGES.get(message)
+        legacy = cls._legacy_step_regex.match(message)
+        if legacy is not None and legacy.group(1) in LEGACY_CONSENSUS_STEPS:
+            step = LEGACY_CONSENSUS_STEPS[legacy.group(1)]
+            height, round_ = legacy.group(2), legacy.group(3)
+        proposal = cls._proposal_regex.match(fields.get("proposal", ""))
+        if proposal is not None:
+            height, round_ = height or proposal.group(1), round_ or proposal.group(2)
+        return {
+            "time": timestamp,
+            "level": level,
+            "module": fields.pop("module", None),
+            "message": message,
+            "height": int(height) if height.isdigit() else None,
+            "round": int(round_) if round_.isdigit() else None,
+            "step": step,
+            "fields": fields,
         }
-        for validator in data["validators"]
-    ]
-    genesis_data["app_hash"] = ""
-    genesis_file.write_text(json.dumps(genesis_data, indent=2), encoding=ENCODING)
 
 
-class PeriodDumper:
-    """Dumper for tendermint data."""
+class ConsensusAnalytics:  # pylint: disable=too-many-instance-attributes
+    """
+    Consensus latency analytics derived from the node output.
+
+    The lines are parsed into events by `TendermintLogParser`. The time
+    between two consecutive committed heights is the block interval, and the
+    highest round seen for a height gives its number of rounds. The time
+    between two step transitions is spent in the earlier step. `apply` runs
+    from "finalizing commit of block" to "committed state", while the ABCI
+    app executes and commits the block. `new_height` runs from there to the
+    next round.
+
+    The step transitions are logged at debug level only. Without `log_level`
+    including `consensus:debug`, the block intervals, apply times, rounds of
+    the proposals and peer disconnects are still derived. Until a step
+    transition is seen, the time from "committed state" to the next
+    "finalizing commit of block" is booked as `consensus`.
+
+    Peer disconnects are counted per reason, and the time since the peer was
+    added is its session. The timestamps are those of the lines, the time
+    they were read when they have none. Parsing is off unless enabled, and
+    only the lines these analytics need are parsed.
+    """
+
+    _interesting_regex = re.compile(
+        r"entering |enter[A-Z]\w*\(|finalizing commit of block|committed state"
+        r"|received proposal|Added peer|Stopping peer"
+    )
+    _peer_id_regex = re.compile(r"\}\s+(\w+)\s+(?:in|out)\}")
+
+    def __init__(
+        self, enabled: bool = False, history: int = DEFAULT_CONSENSUS_HISTORY
+    ) -> None:
+        """
+        Initialize the analytics.
+
+        :param enabled: whether the lines are parsed.
+        :param history: the number of committed heights to keep the breakdown of.
+        """
+        self.enabled = enabled
+        self.events = 0
+        self.block_interval = Histogram(BLOCK_INTERVAL_BUCKETS)
+        self.rounds = Histogram(CONSENSUS_ROUND_BUCKETS)
+        self.steps = {
+            step: Histogram(CONSENSUS_STEP_BUCKETS) for step in CONSENSUS_STEPS
+        }
+        self.peer_sessions = Histogram(PEER_SESSION_BUCKETS)
+        self.disconnects = {reason: 0 for reason in PEER_DISCONNECT_MESSAGES.values()}
+        self.heights: Deque[Dict[str, Any]] = deque(maxlen=max(1, history))
+        self.recent_disconnects: Deque[Dict[str, Any]] = deque(maxlen=max(1, history))
+        self._step: Optional[Tuple[str, float]] = None
+        self._debug_steps = False
+        self._height_steps: Dict[str, float] = {}
+        self._max_rounds: Dict[int, int] = {}
+        self._last_commit: Optional[Tuple[int, float]] = None
+        self._peers: Dict[str, float] = {}
+        self._lock = Lock()
+
+    @classmethod
+    def from_env(cls) -> "ConsensusAnalytics":
+        """Create the analytics configured from the environment."""
+        return cls(
+            enabled=_env_bool("TM_CONSENSUS_ANALYTICS", False),
+            history=_env_int("TM_CONSENSUS_HISTORY", DEFAULT_CONSENSUS_HISTORY),
+        )
+
+    def feed(self, line: str) -> None:
+        """Derive the analytics from a line of the node output."""
+        if not self.enabled or self._interesting_regex.search(line) is None:
+            return
+        event = TendermintLogParser.parse(line)
+        if event is not None:
+            self.observe(event, time())
+
+    def observe(self, event: Dict[str, Any], received_at: float) -> None:
+        """
+        Derive the analytics from an event.
+
+        :param event: the event, as `TendermintLogParser.parse` returns it.
+        :param received_at: the time the event was read, used if it has no timestamp.
+        """
+        at = event["time"] if event["time"] is not None else received_at
+        height, message = event["height"], event["message"]
+        with self._lock:
+            self.events += 1
+            if height is not None and event["round"] is not None:
+                self._max_rounds[height] = max(
+                    self._max_rounds.get(height, 0), event["round"]
+                )
+            if event["step"] is not None:
+                self._enter(event["step"], at)
+            if message == "committed state" and height is not None:
+                self._commit(height, at)
+            elif message == "Added peer":
+                self._peers[self._peer_id(event["fields"].get("peer", ""))] = at
+            elif message in PEER_DISCONNECT_MESSAGES:
+                self._disconnect(PEER_DISCONNECT_MESSAGES[message], event, at)
+
+    def _enter(self, step: str, at: float) -> None:
+        """Account the time spent in the current step and enter the next one."""
+        if step not in ("apply", "new_height"):
+            self._debug_steps = True
+        if self._step is not None:
+            current, started = self._step
+            if current == "new_height" and not self._debug_steps:
+                # without the debug steps the whole next height is in there
+                current = "consensus"
+            duration = max(0.0, at - started)
+            self.steps[current].observe(duration)
+            self._height_steps[current] = (
+                self._height_steps.get(current, 0.0) + duration
+            )
+        self._step = (step, at)
+
+    def _commit(self, height: int, at: float) -> None:
+        """Account a committed height."""
+        rounds = self._max_rounds.pop(height, 0) + 1
+        for stale in [known for known in self._max_rounds if known < height]:
+            del self._max_rounds[stale]
+        self.rounds.observe(rounds)
+        interval = None
+        if self._last_commit is not None and self._last_commit[0] == height - 1:
+            interval = max(0.0, at - self._last_commit[1])
+            self.block_interval.observe(interval)
+        self._last_commit = (height, at)
+        self.heights.append(
+            {
+                "height": height,
+                "committed_at": at,
+                "interval": None if interval is None else round(interval, 6),
+                "rounds": rounds,
+                "steps": {
+                    step: round(seconds, 6)
+                    for step, seconds in self._height_steps.items()
+                },
+            }
+        )
+        self._height_steps = {}
+
+    def _disconnect(self, reason: str, event: Dict[str, Any], at: float) -> None:
+        """Account a peer disconnect."""
+        self.disconnects[reason] += 1
+        peer = self._peer_id(event["fields"].get("peer", ""))
+        added = self._peers.pop(peer, None) if peer else None
+        session = None if added is None else max(0.0, at - added)
+        if session is not None:
+            self.peer_sessions.observe(session)
+        self.recent_disconnects.append(
+            {
+                "at": at,
+                "reason": reason,
+                "peer": peer or None,
+                "error": event["fields"].get("err"),
+                "session": session,
+            }
+        )
+
+    @classmethod
+    def _peer_id(cls, peer: str) -> str:
+        """Get the id of a peer out of its description."""
+        match = cls._peer_id_regex.search(peer)
+        return peer if match is None else match.group(1)
+
+    def restarted(self) -> None:
+        """Forget the state of the previous node process."""
+        with self._lock:
+            self._step = None
+            self._debug_steps = False
+            self._height_steps = {}
+            self._max_rounds.clear()
+            self._last_commit = None
+            self._peers.clear()
+
+    def status(self) -> Dict[str, Any]:
+        """Get the histograms, the breakdown of the recent heights and disconnects."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "events": self.events,
+                "step": None if self._step is None else self._step[0],
+                "block_interval": self.block_interval.to_json(),
+                "rounds": self.rounds.to_json(),
+                "steps": {step: hist.to_json() for step, hist in self.steps.items()},
+                "peer_disconnects": dict(self.disconnects),
+                "peer_sessions": self.peer_sessions.to_json(),
+                "heights": list(self.heights),
+                "recent_disconnects": list(self.recent_disconnects),
+            }
+
+
+class TendermintNode:
+    """A class to manage a Tendermint node."""
+
+    def __init__(
+        self,
+        params: TendermintParams,
+        logger: Optional[Logger] = None,
+        write_to_log: bool = False,
+        log_file: Optional[str] = None,
+        triggers: Optional[TriggerRegistry] = None,
+        app_hash_index_file: Optional[str] = None,
+        crash_bundle_dir: Optional[str] = None,
+    ):
+        """
+        Initialize a Tendermint node.
+
+        :param params: the parameters.
+        :param logger: the logger.
+        :param write_to_log: Write to log file.
+        :param log_file: the log file, `LOG_FILE` by default.
+        :param triggers: the restart triggers, `TM_RESTART_TRIGGERS` by default.
+        :param app_hash_index_file: the app-hash index file, `TM_APP_HASH_INDEX_FILE` by default, empty to keep it in memory only.
+        :param crash_bundle_dir: the crash bundle directory, `TM_CRASH_BUNDLE_DIR` by default, empty to keep them in memory only.
+        """
+        self.params = params
+        self._process: Optional[subprocess.Popen] = None
+        self._monitoring: Optional[StoppableThread] = None
+        self._reader: Optional[LineReader] = None
+        self._stopping = False
+        self.logger = logger or logging.getLogger()
+        self.log_file = log_file or os.environ.get(
+            "LOG_FILE", DEFAULT_TENDERMINT_LOG_FILE
+        )
+        self.write_to_log = write_to_log
+        self.log_sink = LogSink.from_env(self.log_file, write_to_file=write_to_log)
+        self.log_sink.start()
+        self.log_ring = LogRing.from_env()
+        self.crash_bundles = CrashBundles.from_env(crash_bundle_dir)
+        self.triggers = triggers or TriggerRegistry.from_env(logger=self.logger)
+        self._restart_lock = Lock()
+        self._restarting: Optional[Thread] = None
+        self._stop_requested = Event()
+        self.started_at: Optional[float] = None
+        self.supervisor = LivenessSupervisor.from_env(self)
+        self.stdout_lines = 0
+        self.stdout_rate = RateMeter()
+        self.consensus = ConsensusAnalytics.from_env()
+        self.rpc = TendermintRPC(params.rpc_url)
+        self.identity = NodeIdentity(
+            Path(params.home or os.environ["TMHOME"]), self.rpc
+        )
+        self.app_hashes = AppHashIndex.from_env(self.rpc, app_hash_index_file)
+        self.genesis = GenesisManager(
+            Path(params.home or os.environ["TMHOME"], "config", "genesis.json")
+        )
+        self.data_reset = DataDirReset.from_env(
+            Path(params.home or os.environ["TMHOME"])
+        )
+        self.limits = ResourceLimits.from_env(Path(params.home or os.environ["TMHOME"]))
+        self.resources = ResourceMonitor.from_env(lambda: self.pid, self.limits)
+        self.disk = DiskWatchdog.from_env(self)
+        self._reset_lock = Lock()
+
+    def _build_init_command(self) -> List[str]:
+        """Build the 'init' command."""
+        cmd = [
+            "tendermint",
+            "init",
+        ]
+        if self.params.home is not None:  # pragma: nocover
+            cmd += ["--home", self.params.home]
+        return cmd
+
+    def init(self) -> None:
+        """Initialize Tendermint node, unless its home already is."""
+        if is_initialized(Path(self.params.home or os.environ["TMHOME"])):
+            self.log("Tendermint home already initialized, skipping init\n")
+            return
+        cmd = self._build_init_command()
+        subprocess.call(cmd)  # nosec
+
+    def _monitor_tendermint_process(
+        self,
+    ) -> None:
+        """Check server status."""
+        if self._monitoring is None:
+            raise ValueError("Monitoring is not running")
+        self.log("Monitoring thread started\n")
+        reader: Optional[LineReader] = None
+        while not self._monitoring.stopped():
+            try:
+                process = self._process
+                if process is None or process.stdout is None:
+                    self._monitoring.wait(DEFAULT_READY_POLL_INTERVAL)
+                    continue
+                if reader is None or reader.stream is not process.stdout:
+                    if reader is not None:
+                        reader.close()
+                    reader = self._reader = LineReader(process.stdout)
+                lines = reader.read_lines()
+                if lines is None:
+                    # the process closed its output, wait for it to be replaced
+                    self._monitoring.wait(DEFAULT_READY_POLL_INTERVAL)
+                    continue
+                self._handle_lines(lines, process)
+            except Exception as e:  # pylint: disable=broad-except
+                self.log(f"Error!: {str(e)}")
+        if reader is not None:
+            # the output the process wrote while stopping
+            self._handle_lines(reader.drain() or [], None)
+            reader.close()
+        self.log("Monitoring thread terminated\n")
+
+    def _handle_lines(
+        self, lines: List[str], process: Optional[subprocess.Popen]
+    ) -> None:
+        """Log lines of the node output and restart on the triggers they match."""
+        for line in lines:
+            self.log(line)
+            self.stdout_lines += 1
+            self.stdout_rate.mark()
+            self.consensus.feed(line)
+            if process is None or process is not self._process:
+                # the process was replaced while we were reading,
+                # its shutdown output must not trigger a restart
+                continue
+            trigger = self.triggers.match(line)
+            if (
+                trigger is not None
+                and not cast(StoppableThread, self._monitoring).stopped()
+            ):
+                self._schedule_restart(trigger, line, process)
+
+    def _schedule_restart(
+        self, trigger: RestartTrigger, reason: str, process: subprocess.Popen
+    ) -> None:
+        """
+        Restart the node on a trigger from a thread of its own.
+
+        The restart may be delayed by the backoff of the trigger's policy, the
+        monitoring thread keeps reading the output meanwhile so the pipe never
+        fills up. Triggers firing while a restart is pending are dropped, the
+        process they fired for is replaced by then.
+        """
+        if self._restarting is not None and self._restarting.is_alive():
+            return
+        self._restarting = Thread(
+            target=self.restart_on_trigger,
+            args=(trigger, reason, process),
+            name="tendermint-restart",
+            daemon=True,
+        )
+        self._restarting.start()
+
+    def restart_on_trigger(
+        self,
+        trigger: RestartTrigger,
+        reason: str,
+        process: Optional[subprocess.Popen] = None,
+    ) -> bool:
+        """
+        Restart the node process if the trigger's restart policy allows it.
+
+        :param trigger: the trigger that fired.
+        :param reason: the message explaining the restart.
+        :param process: the process the trigger fired for, the restart is skipped if it was already replaced.
+        :return: whether the node was restarted.
+        """
+        with self._restart_lock:
+            if self._stop_requested.is_set():
+                return False
+            if process is not None and process is not self._process:
+                return False
+            delay = trigger.policy.next_delay()
+            if delay is None:
+                trigger.suppressed += 1
+                self.log(
+                    f"Restart for trigger {trigger.name} suppressed, "
+                    f"{trigger.policy.max_restarts} restarts in the last {trigger.policy.window}s\n"
+                )
+                return False
+            if delay > 0:
+                self.log(
+                    f"Delaying restart for trigger {trigger.name} by {delay:.1f}s\n"
+                )
+                if self._stop_requested.wait(delay):
+                    return False
+            trigger.policy.record()
+            trigger.restarts += 1
+            try:
+                self.crash_bundles.save(trigger.name, reason, self.log_ring.snapshot())
+            except OSError as e:
+                self.log(f"Could not save the crash bundle: {e}\n")
+            self._stop_tm_process()
+            # we can only reach this step if monitoring was activated
+            # so we make sure that after reset the monitoring continues
+            self._start_tm_process()
+            self.log(
+                f"Restarted the node on trigger {trigger.name}, with message:\n\t\t {reason}\n"
+            )
+            return True
+
+    def _start_tm_process(self, debug: bool = False) -> None:
+        """Start a Tendermint node process."""
+        if self._process is not None or self._stopping:  # pragma: nocover
+            return
+        cmd = self.params.build_node_command(debug)
+        kwargs = self.params.get_node_command_kwargs()
+
+        if os.name != "nt":
+            # a new process group, set up without running Python in the child
+            kwargs.pop("preexec_fn", None)
+            kwargs["process_group"] = 0
+            self.limits.before_spawn(self.log)
+
+        self.log(f"Starting Tendermint: {cmd}\n")
+        self._process = (
+            subprocess.Popen(  # nosec # pylint: disable=consider-using-with,W1509
+                cmd, **kwargs
+            )
+        )
+        if os.name == "nt":
+            self._wh = WinHelper()  # pylint: disable=attribute-defined-outside-init
+            self._wh.assign_to_job(self._process.pid)
+        else:
+            self.limits.after_spawn(self._process.pid, self.log)
+
+        self.started_at = monotonic()
+        self.identity.invalidate()
+        self.consensus.restarted()
+        if self._reader is not None:
+            # the old output may stay open in orphaned children, move on to the new one
+            self._reader.wake()
+        self.log("Tendermint process started\n")
+
+    def _start_monitoring_thread(self) -> None:
+        """Start a monitoring thread."""
+        if self._monitoring is not None and self._monitoring.is_alive():
+            return
+        self._monitoring = StoppableThread(target=self._monitor_tendermint_process)
+        self._monitoring.start()
+
+    def start(self, debug: bool = False) -> None:
+        """Start a Tendermint node process."""
+        self._stop_requested.clear()
+        self._start_tm_process(debug)
+        self._start_monitoring_thread()
+        self.supervisor.start()
+        self.resources.start()
+        self.disk.start()
+        self.data_reset.prepare()
+
+    def _stop_tm_process(
+        self,
+        timer: Optional[PhaseTimer] = None,
+        deadline: Optional[ShutdownDeadline] = None,
+    ) -> None:
+        """Stop a Tendermint node process, within the deadline if given."""
+        if self._process is None or self._stopping:
+            return
+
+        self._stopping = True
+        timer = timer or PhaseTimer()
+        try:
+            if platform.system() == "Windows":
+                self._win_stop_tm()
+            else:
+                # this will raise an exception if the process
+                # is not terminated within the specified timeout
+                self._unix_stop_tm(timer, deadline)
+        finally:
+            self._stopping = False
+        timer.mark("process_exit")
+
+        self._process = None
+        self.started_at = None
+        self.log("Tendermint process stopped\n")
+
+    def _win_stop_tm(self) -> None:  # pragma: no cover
+        """Stop a Tendermint node process on Windows."""
+        os.kill(self._process.pid, signal.CTRL_C_EVENT)  # type: ignore  # pylint: disable=no-member
+        try:
+            self._process.wait(timeout=5)  # type: ignore
+        except subprocess.TimeoutExpired:  # nosec
+            os.kill(self._process.pid, signal.CTRL_BREAK_EVENT)  # type: ignore  # pylint: disable=no-member
+
+    def _unix_stop_tm(
+        self, timer: PhaseTimer, deadline: Optional[ShutdownDeadline] = None
+    ) -> None:
+        """Stop a Tendermint node process and its process group on Unix."""
+        process = cast(subprocess.Popen, self._process)
+        _signal_process_group(process.pid, signal.SIGTERM)
+        timer.mark("signal")
+        grace = (
+            DEFAULT_STOP_GRACE
+            if deadline is None
+            else deadline.remaining(STOP_GRACE_SHARE)
+        )
+        try:
+            # returns as soon as the process exits, the timeout is only an upper bound
+            process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:  # nosec
+            self.log("Tendermint process did not stop gracefully\n")
+
+        # if the process is still running poll will return None
+        poll = process.poll()
+        if poll is not None:
+            return
+
+        timer.mark("grace")
+        _signal_process_group(process.pid, signal.SIGKILL)
+        process.wait(_kill_wait(deadline))
+
+    def _stop_monitoring_thread(self, timeout: float = 20.0) -> None:
+        """Stop a monitoring process."""
+        if self._monitoring is not None:
+            self._monitoring.stop()  # set stop event
+            if self._reader is not None:
+                self._reader.wake()
+            self._monitoring.join(timeout=timeout)
+
+    def stop(
+        self,
+        timer: Optional[PhaseTimer] = None,
+        deadline: Optional[ShutdownDeadline] = None,
+    ) -> None:
+        """
+        Stop a Tendermint node process, within the deadline if given.
+
+        The monitoring thread is told to stop first, so the shutdown output does
+        not fire restart triggers, and woken up and joined once the process
+        exited, after reading what the process printed while stopping.
+        """
+        timer = timer or (PhaseTimer() if deadline is None else deadline.timer)
+        self._stop_requested.set()
+        if self._monitoring is not None:
+            self._monitoring.stop()
+        with self._restart_lock:
+            self._stop_tm_process(timer, deadline)
+        self._stop_monitoring_thread(20.0 if deadline is None else deadline.remaining())
+        timer.mark("monitor_exit")
+        for checker in (self.supervisor, self.resources, self.disk):
+            checker.stop(None if deadline is None else deadline.remaining())
+        timer.mark("checkers_exit")
+        self.log_sink.flush(timeout=1.0 if deadline is None else deadline.remaining())
+
+    def wait_until_ready(self, timeout: float = DEFAULT_RESET_TIMEOUT) -> bool:
+        """Wait until the RPC server answers `/status`."""
+        deadline = monotonic() + timeout
+        while True:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return False
+            if self._process is None or self._process.poll() is not None:
+                return False
+            try:
+                self.rpc.status(timeout=min(remaining, DEFAULT_TIMEOUT))
+                return True
+            except _rpc_errors():
+                sleep(min(remaining, DEFAULT_READY_POLL_INTERVAL))
+
+    def reset(
+        self, timeout: Optional[float] = DEFAULT_RESET_TIMEOUT, debug: bool = False
+    ) -> Dict[str, float]:
+        """
+        Restart the node and wait until its RPC server is ready.
+
+        :param timeout: seconds to wait for the RPC server after the restart, None to not wait.
+        :param debug: whether to start the node with debug logging.
+        :return: the duration of every phase, in seconds, with `rpc_ready` only if the RPC answered in time.
+        """
+        with self._reset_lock:
+            timer = PhaseTimer()
+            self.stop(timer)
+            self.start(debug=debug)
+            timer.mark("spawn")
+            if timeout is None:
+                return timer.timings()
+            if not self.wait_until_ready(timeout):
+                self.log(f"Tendermint RPC not ready after {timeout}s\n")
+                return timer.timings()
+            timer.mark("rpc_ready")
+            return timer.timings()
+
+    def maintain_data_dir(self, action: str) -> Dict[str, float]:
+        """
+        Stop the node, maintain its data dir and start it again.
+
+        :param action: `DISK_ACTION_COMPACT`.
+        :return: the duration of every phase, in seconds, empty if the node was not running or a reset was.
+        """
+        if not self._reset_lock.acquire(blocking=False):
+            # a reset is running, the next check tries again
+            return {}
+        try:
+            if self._process is None:
+                # stopped meanwhile, for the exit
+                return {}
+            timer = PhaseTimer()
+            self.log(f"Data dir maintenance: {action}\n")
+            self.stop(timer)
+            try:
+                record = self.disk.maintain(action)
+            finally:
+                timer.mark(action)
+                self.start()
+                timer.mark("spawn")
+            self.log(f"Data dir maintenance done: {record}\n")
+            return timer.timings()
+        finally:
+            self._reset_lock.release()
+
+    def hard_reset(
+        self, args: Mapping[str, str], dump: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Stop the node, prune its blocks, reset its genesis and start it again.
+
+        :param args: the `/hard_reset` arguments, with the new genesis.
+        :param dump: called once the node is stopped, before the blocks are pruned.
+        """
+        with self._reset_lock:
+            self.stop()
+            if dump is not None:
+                dump()
+            if self.prune_blocks():
+                self.start()
+                raise RuntimeError("Could not perform `unsafe-reset-all` successfully!")
+            _reset_genesis(self, args)
+            self.start()
+
+    @property
+    def pid(self) -> Optional[int]:
+        """Get the pid of the node process, if running."""
+        process = self._process
+        return None if process is None else process.pid
+
+    def log(self, line: str) -> None:
+        """Queue a line for the console and the log file, and keep it in the ring."""
+        line = str(line)
+        self.log_ring.append(line)
+        self.log_sink.write(line)
+
+    def prune_blocks(self) -> int:
+        """Prune blocks from the Tendermint state and forget their app hashes"""
+        try:
+            self.data_reset.reset()
+        except OSError as e:
+            self.log(f"Error resetting the Tendermint state: {e}\n")
+            return 1
+        self.app_hashes.clear()
+        return 0
+
+    def reset_genesis_file(
+        self,
+        genesis_time: str,
+        initial_height: str,
+        period_count: str,
+    ) -> None:
+        """Reset genesis file."""
+        self.genesis.reset(genesis_time, initial_height, f"autonolas-{period_count}")
+
+
+def _write_validator_state_file(path: Path) -> None:
+    """Write a fresh validator signing state, as `unsafe-reset-all` does."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({"height": "0", "round": 0, "step": 0}, indent=2),
+        encoding=ENCODING,
+    )
+
+
+def _write_priv_validator_state(data_dir: Path) -> None:
+    """Write a fresh validator signing state in a data dir at the default path."""
+    _write_validator_state_file(data_dir / "priv_validator_state.json")
+
+
+def _genesis_path() -> Path:
+    """Get the genesis file of the node home."""
+    return Path(os.environ["TMHOME"], "config", "genesis.json")
+
+
+def load_genesis() -> Any:
+    """Load genesis file."""
+    return GenesisManager(_genesis_path()).get()
+
+
+def get_defaults() -> Dict[str, str]:
+    """Get defaults from genesis file."""
+    genesis = load_genesis()
+    return dict(genesis_time=genesis.get("genesis_time"))
+
+
+def _toml_value(value: Any) -> str:
+    """Format a value as a TOML literal."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_toml_value(item) for item in value) + "]"
+    return json.dumps(str(value))
+
+
+class TendermintConfig:
+    """
+    Editable model of `config.toml`.
+
+    The file is parsed once into lines and a `(section, key) -> line` map, so
+    values can be changed in place without touching comments or layout.
+    `save` writes the file only when a value changed, through a temporary
+    file renamed over the original, and returns the changed keys.
+    """
+
+    _section_regex = re.compile(r"^\s*\[([^\]]+)\]\s*$")
+    _key_regex = re.compile(r"^(\s*)([A-Za-z0-9_\-]+)(\s*=\s*)(.*?)\s*$")
+
+    def __init__(self, path: Path, text: str) -> None:
+        """
+        Initialize the model.
+
+        :param path: the file the model is saved to.
+        :param text: the file contents.
+        """
+        self.path = path
+        self._lines = text.splitlines(keepends=True)
+        self._keys: Dict[Tuple[str, str], int] = {}
+        self._sections: Dict[str, int] = {}
+        self.changed: List[str] = []
+        self._index()
+
+    def _index(self) -> None:
+        """Map the sections and keys to their line numbers."""
+        self._keys.clear()
+        self._sections.clear()
+        section = ""
+        for number, line in enumerate(self._lines):
+            match = self._section_regex.match(line)
+            if match is not None:
+                section = match.group(1).strip()
+                self._sections.setdefault(section, number)
+                continue
+            match = self._key_regex.match(line)
+            if match is not None:
+                self._keys[(section, match.group(2))] = number
+
+    @classmethod
+    def load(cls, path: Path) -> "TendermintConfig":
+        """Parse a config file."""
+        return cls(path, path.read_text(encoding=ENCODING))
+
+    @staticmethod
+    def _name(section: str, key: str) -> str:
+        """Get the dotted name of a key."""
+        return f"{section}.{key}" if section else key
+
+    def get(self, section: str, key: str) -> Any:
+        """Get a value, `section` is empty for top level keys."""
+        match = self._key_regex.match(self._lines[self._keys[(section, key)]])
+        return tomllib.loads(f"value = {cast(re.Match, match).group(4)}")["value"]
+
+    def _add(self, section: str, key: str, value: Any) -> None:
+        """Add a key after the last key of its section, creating the section."""
+        line = f"{key} = {_toml_value(value)}\n"
+        numbers = [
+            number for (name, _), number in self._keys.items() if name == section
+        ]
+        if numbers:
+            self._lines.insert(max(numbers) + 1, line)
+        elif section == "":
+            self._lines.insert(min(self._sections.values(), default=0), line)
+        elif section in self._sections:
+            self._lines.insert(self._sections[section] + 1, line)
+        else:
+            if self._lines and not self._lines[-1].endswith("\n"):
+                self._lines[-1] += "\n"
+            self._lines.extend(["\n", f"[{section}]\n", line])
+        self._index()
+
+    def set(self, section: str, key: str, value: Any) -> None:
+        """
+        Set a value, `section` is empty for top level keys.
+
+        A key missing from the file, such as one a newer Tendermint version
+        introduced, is added to its section.
+        """
+        if (section, key) not in self._keys:
+            self._add(section, key, value)
+        elif self.get(section, key) == value:
+            return
+        else:
+            number = self._keys[(section, key)]
+            match = cast(re.Match, self._key_regex.match(self._lines[number]))
+            self._lines[number] = (
+                f"{match.group(1)}{key}{match.group(3)}{_toml_value(value)}\n"
+            )
+        name = self._name(section, key)
+        if name not in self.changed:
+            self.changed.append(name)
+
+    def save(self) -> List[str]:
+        """Write the file if a value changed, returning the changed keys."""
+        changed, self.changed = self.changed, []
+        if changed:
+            _atomic_write_text(self.path, "".join(self._lines))
+        return changed
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    """Replace a file with `text` so readers never see a partial file."""
+    temp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    try:
+        with open(temp, "w", encoding=ENCODING) as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        with contextlib.suppress(FileNotFoundError):
+            shutil.copymode(path, temp)
+        os.replace(temp, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            temp.unlink()
+
+
+class TuningProfile:
+    """
+    A named set of `config.toml` values suited to a kind of host.
+
+    A profile sets the keys of `TUNING_DEFAULTS`, the database backend, the
+    mempool size and cache, the consensus timeouts, the indexer and the p2p
+    rates, starting from the values `tendermint init` writes. The manager
+    applies it over `CONFIG_OVERRIDE` before every start, so switching back to
+    `default` restores the original values.
+    """
+
+    def __init__(self, name: str, values: Dict[Tuple[str, str], Any]) -> None:
+        """
+        Initialize the profile.
+
+        :param name: the profile name.
+        :param values: the `(section, key) -> value` changes on top of `TUNING_DEFAULTS`.
+        """
+        self.name = name
+        self.values = {**TUNING_DEFAULTS, **values}
+
+    @staticmethod
+    def load_custom(raw: Optional[str] = None) -> Dict[str, Dict[Tuple[str, str], Any]]:
+        """
+        Load the profiles `TM_TUNING_PROFILES` defines, or `raw` if given.
+
+        The variable holds a JSON object, or the path of a JSON file with one,
+        mapping profile names to objects of dotted keys, such as `mempool.size`
+        or `db_backend`, to values.
+        """
+        if raw is None:
+            raw = os.environ.get("TM_TUNING_PROFILES", "")
+        raw = raw.strip()
+        if raw == "":
+            return {}
+        if not raw.startswith("{"):
+            raw = Path(raw).read_text(encoding=ENCODING)
+        profiles = {}
+        for name, values in json.loads(raw).items():
+            profiles[name] = {}
+            for dotted, value in values.items():
+                if not isinstance(value, (str, int, float, bool)):
+                    raise ValueError(f"Invalid value {value!r} for {dotted} in {name}")
+                section, _, key = dotted.rpartition(".")
+                profiles[name][(section, key)] = value
+        return profiles
+
+    @classmethod
+    def from_env(cls, name: Optional[str] = None) -> Optional["TuningProfile"]:
+        """
+        Get the profile `TM_TUNING_PROFILE` names, or `name` if given.
+
+        The name is one of `TUNING_PROFILES` or of the profiles
+        `TM_TUNING_PROFILES` adds. None is returned when no profile is set, the
+        config then keeps whatever values it has.
+        """
+        if name is None:
+            name = os.environ.get("TM_TUNING_PROFILE", "")
+        name = name.strip()
+        if name == "":
+            return None
+        profiles = {**TUNING_PROFILES, **cls.load_custom()}
+        if name not in profiles:
+            raise ValueError(
+                f"Unknown tuning profile {name!r}, expected one of {sorted(profiles)}"
+            )
+        return cls(name, profiles[name])
+
+    def apply(self, config: TendermintConfig) -> None:
+        """Set the profile values in a config."""
+        for (section, key), value in self.values.items():
+            config.set(section, key, value)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Get the name and the dotted keys and values of the profile."""
+        return {
+            "name": self.name,
+            "values": {
+                f"{section}.{key}" if section else key: value
+                for (section, key), value in self.values.items()
+            },
+        }
+
+
+def override_config_toml(
+    home: Optional[Path] = None, profile: Optional[TuningProfile] = None
+) -> List[str]:
+    """Update sync method, and apply the tuning profile if one is given."""
+
+    config_path = Path(home or os.environ["TMHOME"]) / "config" / "config.toml"
+    logging.info(config_path)
+    config = TendermintConfig.load(config_path)
+    for (section, key), value in CONFIG_OVERRIDE.items():
+        config.set(section, key, value)
+    if profile is not None:
+        profile.apply(config)
+    return config.save()
+
+
+def _persistent_peers(validators: List[Dict]) -> str:
+    """Build the `persistent_peers` value of the validators."""
+    peers = []
+    for peer in validators:
+        hostname = peer["hostname"]
+        if hostname in ("localhost", "0.0.0.0"):  # nosec
+            # This (tendermint) node will be running in a docker container and no other node
+            # will be running in the same container. If we receive either localhost or 0.0.0.0,
+            # we make an assumption that the address belongs to a node running on the
+            # same machine with a different docker container and different p2p port so,
+            # we replace the hostname with the docker's internal host url.
+            hostname = "localhost"
+        peers.append(peer["peer_id"] + "@" + hostname + ":" + str(peer["p2p_port"]))
+    return ",".join(peers)
+
+
+def update_p2p_config(
+    validators: List[Dict], external_address: str, config_path: Path
+) -> List[str]:
+    """Update the peers and the external address in one pass."""
+    config = TendermintConfig.load(config_path)
+    config.set("p2p", "persistent_peers", _persistent_peers(validators))
+    config.set("p2p", "external_address", external_address)
+    return config.save()
+
+
+def update_peers(validators: List[Dict], config_path: Path) -> List[str]:
+    """Fix peers."""
+    config = TendermintConfig.load(config_path)
+    config.set("p2p", "persistent_peers", _persistent_peers(validators))
+    return config.save()
+
+
+def update_external_address(external_address: str, config_path: Path) -> List[str]:
+    """Update the external address."""
+    config = TendermintConfig.load(config_path)
+    config.set("p2p", "external_address", external_address)
+    return config.save()
+
+
+def update_genesis_config(data: Dict, genesis: Optional[GenesisManager] = None) -> None:
+    """Update genesis.json file for the tendermint node."""
+
+    genesis_data: Dict[str, Any] = {}
+    genesis_data["genesis_time"] = data["genesis_config"]["genesis_time"]
+    genesis_data["chain_id"] = data["genesis_config"]["chain_id"]
+    genesis_data["initial_height"] = "0"
+    genesis_data["consensus_params"] = data["genesis_config"]["consensus_params"]
+    genesis_data["validators"] = [
+        {
+            "address": validator["address"],
+            "pub_key": validator["pub_key"],
+            "power": validator["power"],
+            "name": validator["name"],
+        }
+        for validator in data["validators"]
+    ]
+    genesis_data["app_hash"] = ""
+    (genesis or GenesisManager(_genesis_path())).replace(genesis_data)
+
+
+class PeriodDumper:  # pylint: disable=too-many-instance-attributes
+    """
+    Dumper for tendermint data.
+
+    In `copy` mode every period is a full copy of the home directory. In
+    `snapshot` mode file contents are stored once in a content-addressed
+    `objects` directory and each period is a tree of hardlinks to them; files
+    whose size, mtime and inode did not change since the previous dump are
+    linked without being read again, so only changed files are copied. The
+    objects a period uses are listed under `objects/refs`, and objects no
+    remaining period lists are deleted with the periods, whether they were
+    linked or copied into them. In `archive` mode every period is a
+    compressed tarball.
+
+    Every dump is followed by the retention policy (keep the last N periods
+    and/or stay below a total size). In background mode `dump_period` only
+    moves the data directory into a staging area and returns; a worker thread
+    then writes the dump and applies the policy.
+    """
+
+    resets: int
+    dump_dir: Path
+    logger: logging.Logger
+    mode: str
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        logger: logging.Logger,
+        dump_dir: Optional[Path] = None,
+        mode: str = DUMP_MODE_COPY,
+        background: bool = False,
+        compression: Optional[str] = None,
+        keep_last: int = DEFAULT_DUMP_KEEP_LAST,
+        max_bytes: int = 0,
+        home: Optional[Path] = None,
+        node_id: Optional[str] = None,
+    ) -> None:
+        """Initialize object."""
+
+        if mode not in (DUMP_MODE_COPY, DUMP_MODE_SNAPSHOT, DUMP_MODE_ARCHIVE):
+            raise ValueError(f"Unknown dump mode {mode!r}")
+        self.logger = logger
+        self.dump_dir = Path(dump_dir or "/tm_state")
+        self.mode = mode
+        self.background = background
+        self.compression = compression or (
+            "zst" if "zst" in tarfile.TarFile.OPEN_METH else "gz"
+        )
+        self.keep_last = keep_last
+        self.max_bytes = max_bytes
+        self.home = home
+        self.node_id = node_id
+        # relative path -> ((size, mtime, inode), digest) of the previous snapshot
+        self._index: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+        self._jobs: "queue.Queue[Tuple[int, Path]]" = queue.Queue()
+        self._pending: List[int] = []
+        self._completed: Deque[Dict[str, Any]] = deque(maxlen=DEFAULT_MAX_FINISHED_JOBS)
+        self._failed: Deque[Dict[str, Any]] = deque(maxlen=DEFAULT_MAX_FINISHED_JOBS)
+        self._status_lock = Lock()
+        self._worker: Optional[StoppableThread] = None
+
+        self.dump_dir.mkdir(parents=True, exist_ok=True)
+        # keep the dumps of previous runs, subject to the retention policy
+        self._rmtree(self.dump_dir / DUMP_STAGING_DIR)
+        periods = self._periods()
+        self.resets = periods[-1][0] + 1 if periods else 0
+        self.apply_retention()
+
+    @classmethod
+    def from_env(
+        cls,
+        logger: logging.Logger,
+        dump_dir: Path,
+        home: Optional[Path] = None,
+        node_id: Optional[str] = None,
+    ) -> "PeriodDumper":
+        """Create a dumper configured from the environment."""
+        return cls(
+            logger=logger,
+            dump_dir=dump_dir,
+            home=home,
+            node_id=node_id,
+            mode=os.environ.get("TM_DUMP_MODE", DUMP_MODE_COPY),
+            background=_env_bool("TM_DUMP_BACKGROUND", False),
+            compression=os.environ.get("TM_DUMP_COMPRESSION") or None,
+            keep_last=_env_int("TM_DUMP_KEEP_LAST", DEFAULT_DUMP_KEEP_LAST),
+            max_bytes=_env_int("TM_DUMP_MAX_BYTES", 0),
+        )
+
+    @staticmethod
+    def readonly_handler(
+        func: Callable, path: str, execinfo: Any  # pylint: disable=unused-argument
+    ) -> None:
+        """If permission is readonly, we change and retry."""
+        try:
+            os.chmod(path, stat.S_IWRITE)
+            func(path)
+        except (FileNotFoundError, OSError):
+            pass
+
+    def _rmtree(self, path: Path) -> None:
+        """Remove a directory tree, including read-only files."""
+        if not path.is_dir():
+            return
+        rmtree_kwargs: Dict[str, Callable] = {}
+        if "onexc" in inspect.signature(shutil.rmtree).parameters:
+            rmtree_kwargs["onexc"] = self.readonly_handler
+        else:
+            # Keep compatibility with Python versions where only `onerror` exists.
+            rmtree_kwargs["onerror"] = self.readonly_handler
+        cast(Callable[..., None], shutil.rmtree)(str(path), **rmtree_kwargs)
+
+    def dump_period(self) -> None:
+        """
+        Dump tendermint run data for replay
+
+        Must be called with the node stopped, right before its data is reset:
+        in background mode the data directory is moved away and replaced by an
+        empty one.
+        """
+        period = self.resets
+        self.resets += 1
+        home = Path(self.home or os.environ["TMHOME"])
+        try:
+            if self.background:
+                staged = self._stage(period, home)
+                with self._status_lock:
+                    self._pending.append(period)
+                self._jobs.put((period, staged))
+                self._start_worker()
+                self.logger.info(f"Handed off data for period {period}")
+                return
+            self._write(period, home, move=False)
+        except OSError as e:
+            self.logger.info(
+                f"Error occurred while dumping data for period {period}: {e}"
+            )
+
+    def _target(self, period: int) -> Path:
+        """Get the dump location of this node for a period."""
+        store_dir = self.dump_dir / f"period_{period}"
+        store_dir.mkdir(exist_ok=True)
+        return store_dir / ("node" + (self.node_id or os.environ["ID"]))
+
+    @staticmethod
+    def _ignored(name: str) -> bool:
+        """Check whether a directory entry is scratch space of `DataDirReset`."""
+        return name.startswith((STANDBY_DATA_DIR, DISCARDED_DATA_DIR))
+
+    def _stage(self, period: int, home: Path) -> Path:
+        """Move the home's data into the staging area, copying the config."""
+        staged = self.dump_dir / DUMP_STAGING_DIR / f"period_{period}"
+        staged.mkdir(parents=True)
+        for name in os.listdir(home):
+            if self._ignored(name):
+                continue
+            source = home / name
+            if name == "data":
+                try:
+                    os.rename(source, staged / name)
+                except OSError:
+                    # different filesystems, fall back to copying
+                    shutil.copytree(source, staged / name)
+                    continue
+                _write_priv_validator_state(source)
+            elif source.is_dir():
+                shutil.copytree(source, staged / name, ignore=self._ignore_names)
+            else:
+                shutil.copy2(source, staged / name)
+        return staged
+
+    def _ignore_names(self, _: str, names: List[str]) -> List[str]:
+        """Pick the entries `shutil.copytree` skips."""
+        return [name for name in names if self._ignored(name)]
+
+    def _dump(self, period: int, source: Path, move: bool) -> Dict[str, Any]:
+        """Write the dump of a period from a home directory."""
+        started = monotonic()
+        target = self._target(period)
+        if self.mode == DUMP_MODE_SNAPSHOT:
+            stats: Dict[str, Any] = self.snapshot(source, target, move=move)
+            self.logger.info(
+                f"Dumped data for period {period}: {stats['copied']} files copied "
+                f"({stats['bytes_copied']} bytes), {stats['linked']} unchanged files linked"
+            )
+        elif self.mode == DUMP_MODE_ARCHIVE:
+            archive = target.with_name(f"{target.name}.tar.{self.compression}")
+            with tarfile.open(archive, f"w:{self.compression}") as tar:
+                tar.add(
+                    str(source),
+                    arcname=target.name,
+                    filter=lambda info: (
+                        None if self._ignored(Path(info.name).name) else info
+                    ),
+                )
+            stats = {"path": str(archive), "bytes": archive.stat().st_size}
+            self.logger.info(f"Dumped data for period {period} to {archive}")
+        else:
+            if move:
+                os.replace(source, target)
+            else:
+                shutil.copytree(source, str(target), ignore=self._ignore_names)
+            stats = {}
+            self.logger.info(f"Dumped data for period {period}")
+        stats["seconds"] = round(monotonic() - started, 6)
+        return stats
+
+    def _write(self, period: int, source: Path, move: bool) -> None:
+        """Dump a period, record the outcome and apply the retention policy."""
+        try:
+            stats = self._dump(period, source, move=move)
+            with self._status_lock:
+                self._completed.append({"period": period, **stats})
+            self.apply_retention()
+        except Exception as e:  # pylint: disable=broad-except
+            self.logger.exception(f"Could not dump data for period {period}")
+            with self._status_lock:
+                self._failed.append({"period": period, "error": str(e)})
+
+    def _start_worker(self) -> None:
+        """Start the background worker."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = StoppableThread(
+            target=self._work, name="tendermint-period-dumper", daemon=True
+        )
+        self._worker.start()
+
+    def _work(self) -> None:
+        """Write the handed off periods until stopped."""
+        worker = cast(StoppableThread, self._worker)
+        while not worker.stopped():
+            try:
+                period, staged = self._jobs.get(timeout=DEFAULT_LOG_FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            try:
+                self._write(period, staged, move=True)
+            finally:
+                self._rmtree(staged)
+                with self._status_lock:
+                    self._pending.remove(period)
+                self._jobs.task_done()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every handed off period has been written."""
+        with self._jobs.all_tasks_done:
+            return self._jobs.all_tasks_done.wait_for(
+                lambda: self._jobs.unfinished_tasks == 0, timeout
+            )
+
+    def status(self) -> Dict[str, Any]:
+        """Get the pending, completed and failed dumps."""
+        with self._status_lock:
+            return {
+                "mode": self.mode,
+                "background": self.background,
+                "pending": list(self._pending),
+                "completed": list(self._completed),
+                "failed": list(self._failed),
+                "periods": [period for period, _ in self._periods()],
+                "bytes": self._disk_usage(),
+                "retention": {"keep_last": self.keep_last, "max_bytes": self.max_bytes},
+            }
+
+    def _periods(self) -> List[Tuple[int, Path]]:
+        """Get the dumped periods, oldest first."""
+        periods = []
+        for path in self.dump_dir.iterdir():
+            match = re.fullmatch(r"period_(\d+)", path.name)
+            if match is not None and path.is_dir():
+                periods.append((int(match.group(1)), path))
+        return sorted(periods)
+
+    def _disk_usage(self) -> int:
+        """Get the size of the dumps, counting hardlinked files once."""
+        seen = set()
+        total = 0
+        for root, _, files in os.walk(self.dump_dir):
+            for name in files:
+                with contextlib.suppress(OSError):
+                    stat_result = os.lstat(os.path.join(root, name))
+                    if stat_result.st_ino not in seen:
+                        seen.add(stat_result.st_ino)
+                        total += stat_result.st_size
+        return total
+
+    def apply_retention(self) -> None:
+        """Delete the oldest periods beyond `keep_last` or `max_bytes`."""
+        periods = self._periods()
+        # measured once, then reduced by what every deletion frees
+        usage = self._disk_usage() if self.max_bytes > 0 else 0
+        deleted = False
+        while len(periods) > 1:
+            over_count = 0 < self.keep_last < len(periods)
+            over_size = self.max_bytes > 0 and usage > self.max_bytes
+            if not (over_count or over_size):
+                break
+            period, path = periods.pop(0)
+            usage -= self._remove_period(path)
+            if self.max_bytes > 0:
+                usage -= self._collect_objects()
+            deleted = True
+            self.logger.info(f"Deleted the dump of period {period}")
+        if deleted and self.max_bytes <= 0:
+            self._collect_objects()
+
+    def _remove_period(self, path: Path) -> int:
+        """Delete a period, return the bytes freed by it."""
+        freed = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                with contextlib.suppress(OSError):
+                    stat_result = os.lstat(os.path.join(root, name))
+                    # files linked from the object store stay on disk
+                    if stat_result.st_nlink <= 1:
+                        freed += stat_result.st_size
+        self._rmtree(path)
+        return freed
+
+    def _refs_path(self, target: Path) -> Path:
+        """Get the file listing the objects a period of a node uses."""
+        return (
+            self.dump_dir
+            / DUMP_OBJECTS_DIR
+            / DUMP_REFS_DIR
+            / f"{target.parent.name}.{target.name}"
+        )
+
+    def _collect_objects(self) -> int:
+        """Delete the stored objects no remaining period uses, return the bytes freed."""
+        objects = self.dump_dir / DUMP_OBJECTS_DIR
+        if not objects.is_dir():
+            return 0
+        periods = {path.name for _, path in self._periods()}
+        referenced: Set[str] = set()
+        refs_dir = objects / DUMP_REFS_DIR
+        if refs_dir.is_dir():
+            for refs in refs_dir.iterdir():
+                if refs.name.startswith("."):
+                    # being written
+                    continue
+                if refs.name.split(".", 1)[0] not in periods:
+                    with contextlib.suppress(OSError):
+                        refs.unlink()
+                    continue
+                referenced.update(refs.read_text(encoding=ENCODING).split())
+        freed = 0
+        for prefix in objects.iterdir():
+            if prefix.name == DUMP_REFS_DIR or not prefix.is_dir():
+                continue
+            for path in prefix.iterdir():
+                if path.name in referenced:
+                    continue
+                with contextlib.suppress(OSError):
+                    stat_result = os.lstat(path)
+                    os.chmod(path, stat.S_IWRITE)
+                    os.unlink(path)
+                    if stat_result.st_nlink <= 1:
+                        freed += stat_result.st_size
+        return freed
+
+    def snapshot(
+        self, source: Path, target: Path, move: bool = False
+    ) -> Dict[str, int]:
+        """Materialise `source` under `target` from the object store."""
+        stats = {"linked": 0, "copied": 0, "bytes_copied": 0}
+        index: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+        for root, dirs, files in os.walk(source):
+            dirs[:] = [name for name in dirs if not self._ignored(name)]
+            relative_root = Path(root).relative_to(source)
+            (target / relative_root).mkdir(parents=True, exist_ok=True)
+            for name in files:
+                path = Path(root, name)
+                relative = str(relative_root / name)
+                stat_result = path.stat()
+                if not stat.S_ISREG(stat_result.st_mode):
+                    continue
+                key = (
+                    stat_result.st_size,
+                    stat_result.st_mtime_ns,
+                    stat_result.st_ino,
+                )
+                previous = self._index.get(relative)
+                if (
+                    previous is not None
+                    and previous[0] == key
+                    and self._object_path(previous[1]).exists()
+                ):
+                    digest = previous[1]
+                    stats["linked"] += 1
+                else:
+                    digest = self._store_object(path, move=move)
+                    stats["copied"] += 1
+                    stats["bytes_copied"] += stat_result.st_size
+                index[relative] = (key, digest)
+                self._link_object(digest, target / relative)
+        refs = self._refs_path(target)
+        refs.parent.mkdir(parents=True, exist_ok=True)
+        digests = sorted({digest for _, digest in index.values()})
+        _atomic_write_text(refs, "".join(f"{digest}\n" for digest in digests))
+        self._index = index
+        return stats
+
+    def _object_path(self, digest: str) -> Path:
+        """Get the path of an object in the store."""
+        return self.dump_dir / DUMP_OBJECTS_DIR / digest[:2] / digest
+
+    def _store_object(self, path: Path, move: bool = False) -> str:
+        """Add a file to the object store, hashing it on the way."""
+        objects = self.dump_dir / DUMP_OBJECTS_DIR
+        objects.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        if move:
+            # the file is ours, hash it and move it in place without copying
+            temp = path
+            with open(path, "rb") as source:
+                for chunk in iter(lambda: source.read(DUMP_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        else:
+            temp = objects / f".tmp-{uuid.uuid4().hex}"
+            with open(path, "rb") as source, open(temp, "wb") as destination:
+                for chunk in iter(lambda: source.read(DUMP_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    destination.write(chunk)
+        stored = self._object_path(digest.hexdigest())
+        if stored.exists():
+            temp.unlink()
+        else:
+            stored.parent.mkdir(exist_ok=True)
+            os.replace(temp, stored)
+            # objects are shared between periods, they must never be modified
+            os.chmod(stored, stat.S_IREAD)
+        return digest.hexdigest()
+
+    def _link_object(self, digest: str, destination: Path) -> None:
+        """Hardlink an object into a period, copying it if links are not supported."""
+        stored = self._object_path(digest)
+        try:
+            os.link(stored, destination)
+        except OSError:
+            shutil.copy2(stored, destination)
+
+
+def _signal_process_group(pid: int, sig: int) -> None:
+    """Signal the process group a process leads, or the process if it leads none."""
+    with contextlib.suppress(ProcessLookupError):
+        if os.getpgid(pid) == pid:
+            os.killpg(pid, sig)
+        else:
+            os.kill(pid, sig)
+
+
+def _kill_wait(deadline: Optional[ShutdownDeadline]) -> float:
+    """
+    Get how long to wait for a killed process to be reaped.
+
+    The deadline may be spent by then, but a killed process exits at once and
+    has to be reaped before the manager goes on, so it gets the kill wait.
+    """
+    if deadline is None:
+        return DEFAULT_KILL_WAIT
+    return max(deadline.remaining(), DEFAULT_KILL_WAIT)
+
+
+def _read_proc_stats(pid: int) -> Optional[Dict[str, float]]:
+    """Read the resident memory and CPU time of a process from `/proc`."""
+    try:
+        stat_text = Path(f"/proc/{pid}/stat").read_text(encoding=ENCODING)
+        stat_fields = stat_text.rsplit(")", 1)[1].split()
+        resident_pages = int(
+            Path(f"/proc/{pid}/statm").read_text(encoding=ENCODING).split()[1]
+        )
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    # fields are counted from the process state, utime and stime are the 12th and 13th
+    return {
+        "rss_bytes": float(resident_pages * os.sysconf("SC_PAGE_SIZE")),
+        "cpu_seconds": (int(stat_fields[11]) + int(stat_fields[12])) / ticks,
+    }
+
+
+def _read_proc_resources(pid: int) -> Optional[Dict[str, Any]]:
+    """Read the resident memory, CPU time, open files, threads and I/O of a process."""
+    stats = _read_proc_stats(pid)
+    if stats is None:
+        return None
+    resources: Dict[str, Any] = {
+        "rss_bytes": int(stats["rss_bytes"]),
+        "cpu_seconds": stats["cpu_seconds"],
+    }
+    with contextlib.suppress(OSError):
+        resources["open_fds"] = len(os.listdir(f"/proc/{pid}/fd"))
+    with contextlib.suppress(OSError, IndexError, ValueError):
+        stat_text = Path(f"/proc/{pid}/stat").read_text(encoding=ENCODING)
+        resources["threads"] = int(stat_text.rsplit(")", 1)[1].split()[17])
+    # /proc/<pid>/io is only readable by the owner of the process
+    with contextlib.suppress(OSError, ValueError):
+        for line in Path(f"/proc/{pid}/io").read_text(encoding=ENCODING).splitlines():
+            key, _, value = line.partition(":")
+            if key in ("read_bytes", "write_bytes"):
+                resources[key] = int(value)
+    return resources
+
+
+def _parse_block_time(value: Optional[str]) -> Optional[float]:
+    """Parse an RFC 3339 block time with nanoseconds into a timestamp."""
+    if not value:
+        return None
+    match = re.match(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d+))?", value)
+    if match is None:
+        return None
+    seconds = datetime.strptime(match.group(1) + "+0000", "%Y-%m-%dT%H:%M:%S%z")
+    return seconds.timestamp() + float(f"0.{match.group(2) or 0}")
+
+
+class ManagerMetrics:
+    """Metrics of the node manager, rendered in the Prometheus text format."""
+
+    def __init__(self, node: ManagedNode) -> None:
+        """Initialize the metrics for a node."""
+        self.node = node
+        self.reset_latency = {
+            kind: Histogram(RESET_LATENCY_BUCKETS) for kind in ("gentle", "hard")
+        }
+        self.reset_failures = {"gentle": 0, "hard": 0}
+
+    def observe_reset(self, kind: str, duration: float, success: bool) -> None:
+        """Record the outcome of a reset."""
+        self.reset_latency[kind].observe(duration)
+        if not success:
+            self.reset_failures[kind] += 1
+
+    @staticmethod
+    def _metric(
+        lines: List[str], name: str, kind: str, description: str, samples: List[str]
+    ) -> None:
+        """Append a metric family."""
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    def _render_consensus(self, lines: List[str]) -> None:
+        """Append the metrics derived from the node output."""
+        consensus = self.node.consensus
+        self._metric(
+            lines,
+            "tendermint_block_interval_seconds",
+            "histogram",
+            "Time between two consecutive committed heights.",
+            consensus.block_interval.render("tendermint_block_interval_seconds"),
+        )
+        self._metric(
+            lines,
+            "tendermint_consensus_rounds",
+            "histogram",
+            "Rounds it took to commit a height.",
+            consensus.rounds.render("tendermint_consensus_rounds"),
+        )
+        self._metric(
+            lines,
+            "tendermint_consensus_step_duration_seconds",
+            "histogram",
+            "Time spent in each consensus step, `apply` is the block execution by the app.",
+            [
+                line
+                for step, histogram in consensus.steps.items()
+                for line in histogram.render(
+                    "tendermint_consensus_step_duration_seconds", f'step="{step}"'
+                )
+            ],
+        )
+        self._metric(
+            lines,
+            "tendermint_peer_disconnects_total",
+            "counter",
+            "Peer disconnects per reason.",
+            [
+                f'tendermint_peer_disconnects_total{{reason="{reason}"}} {count}'
+                for reason, count in consensus.disconnects.items()
+            ],
+        )
+        self._metric(
+            lines,
+            "tendermint_peer_session_seconds",
+            "histogram",
+            "Time peers stayed connected before a disconnect.",
+            consensus.peer_sessions.render("tendermint_peer_session_seconds"),
+        )
+
+    def render(self) -> str:
+        """Render all the metrics."""
+        lines: List[str] = []
+        triggers = self.node.triggers.stats()
+        self._metric(
+            lines,
+            "tendermint_restarts_total",
+            "counter",
+            "Node restarts per trigger.",
+            [
+                f'tendermint_restarts_total{{trigger="{name}"}} {stats["restarts"]}'
+                for name, stats in triggers.items()
+            ],
+        )
+        self._metric(
+            lines,
+            "tendermint_restarts_suppressed_total",
+            "counter",
+            "Node restarts suppressed by the restart policy, per trigger.",
+            [
+                f'tendermint_restarts_suppressed_total{{trigger="{name}"}} {stats["suppressed"]}'
+                for name, stats in triggers.items()
+            ],
+        )
+        self._metric(
+            lines,
+            "tendermint_reset_failures_total",
+            "counter",
+            "Failed resets per kind.",
+            [
+                f'tendermint_reset_failures_total{{kind="{kind}"}} {count}'
+                for kind, count in self.reset_failures.items()
+            ],
+        )
+        self._metric(
+            lines,
+            "tendermint_reset_duration_seconds",
+            "histogram",
+            "Reset latency per kind, the count is the number of resets.",
+            [
+                line
+                for kind, histogram in self.reset_latency.items()
+                for line in histogram.render(
+                    "tendermint_reset_duration_seconds", f'kind="{kind}"'
+                )
+            ],
+        )
+        pid = self.node.pid
+        self._metric(
+            lines,
+            "tendermint_up",
+            "gauge",
+            "Whether the node process is running.",
+            [f"tendermint_up {0 if pid is None else 1}"],
+        )
+        proc = None if pid is None else _read_proc_stats(pid)
+        if proc is not None:
+            self._metric(
+                lines,
+                "tendermint_process_resident_memory_bytes",
+                "gauge",
+                "Resident memory of the node process.",
+                [f"tendermint_process_resident_memory_bytes {proc['rss_bytes']}"],
+            )
+            self._metric(
+                lines,
+                "tendermint_process_cpu_seconds_total",
+                "counter",
+                "CPU time of the node process since it started.",
+                [f"tendermint_process_cpu_seconds_total {proc['cpu_seconds']}"],
+            )
+        sample = self.node.resources.latest
+        if sample is not None and sample["pid"] == pid:
+            for key, name, kind, description in SAMPLED_PROCESS_METRICS:
+                if key in sample:
+                    self._metric(
+                        lines,
+                        f"tendermint_process_{name}",
+                        kind,
+                        description,
+                        [f"tendermint_process_{name} {sample[key]}"],
+                    )
+        self._metric(
+            lines,
+            "tendermint_stdout_lines_total",
+            "counter",
+            "Lines read from the node output.",
+            [f"tendermint_stdout_lines_total {self.node.stdout_lines}"],
+        )
+        self._metric(
+            lines,
+            "tendermint_stdout_lines_per_second",
+            "gauge",
+            f"Lines read from the node output per second, over {self.node.stdout_rate.window}s.",
+            [f"tendermint_stdout_lines_per_second {self.node.stdout_rate.rate()}"],
+        )
+        self._metric(
+            lines,
+            "tendermint_log_lines_dropped_total",
+            "counter",
+            "Lines dropped because the log queue was full.",
+            [f"tendermint_log_lines_dropped_total {self.node.log_sink.dropped}"],
+        )
+        disk = self.node.disk
+        if disk.latest is not None:
+            self._metric(
+                lines,
+                "tendermint_data_dir_bytes",
+                "gauge",
+                "Size of the node data dir at the latest check.",
+                [f"tendermint_data_dir_bytes {disk.latest['total_bytes']}"],
+            )
+        self._metric(
+            lines,
+            "tendermint_data_dir_maintenance_total",
+            "counter",
+            "Data dir maintenance runs per action.",
+            [
+                f'tendermint_data_dir_maintenance_total{{action="{action}"}} {count}'
+                for action, count in disk.counts.items()
+            ],
+        )
+        if self.node.consensus.enabled:
+            self._render_consensus(lines)
+        supervisor = self.node.supervisor
+        if supervisor.latest_block_height is not None:
+            self._metric(
+                lines,
+                "tendermint_block_height",
+                "gauge",
+                "Latest block height.",
+                [f"tendermint_block_height {supervisor.latest_block_height}"],
+            )
+        block_time = _parse_block_time(supervisor.latest_block_time)
+        if block_time is not None:
+            self._metric(
+                lines,
+                "tendermint_seconds_since_last_block",
+                "gauge",
+                "Seconds since the time of the latest block.",
+                [
+                    f"tendermint_seconds_since_last_block {max(0.0, datetime.now().timestamp() - block_time)}"
+                ],
+            )
+        return "\n".join(lines) + "\n"
+
+
+def startup_profile_enabled() -> bool:
+    """Check whether the startup phases should be reported."""
+    return STARTUP_PROFILE_FLAG in sys.argv or _env_bool("TM_STARTUP_PROFILE", False)
+
+
+def report_startup_profile(
+    node: "TendermintNode", startup: PhaseTimer, timeout: float
+) -> None:
+    """Print the startup phases once the node's RPC server answers."""
+    if node.wait_until_ready(timeout):
+        startup.mark("rpc_ready")
+    print(json.dumps({"startup_profile": startup.timings()}), flush=True)
+
+
+def _log_query(args: Mapping[str, str]) -> Tuple[Optional[int], int, float]:
+    """Parse the `since`, `limit` and `wait` arguments of `/logs`."""
+    since = int(args["since"]) if args.get("since", "") != "" else None
+    limit = max(1, int(args.get("limit", DEFAULT_LOG_PAGE_SIZE)))
+    wait = min(max(0.0, float(args.get("wait", "0"))), MAX_LOG_WAIT)
+    return since, limit, wait
+
+
+def _log_chunk(page: Dict[str, Any]) -> str:
+    """Format a page of the log ring as JSON lines."""
+    entries = ([{"missed": page["missed"]}] if page["missed"] else []) + page["lines"]
+    return "".join(json.dumps(entry) + "\n" for entry in entries)
+
+
+# The helpers below hold the route logic `create_app` and `create_async_app`
+# share: they take the request arguments and return the JSON body, with the
+# status code where it is not 200, and leave the framework to the apps.
+
+
+def _add_stderr_handler(logger: Logger) -> None:
+    """Route a logger to stderr, once even when several apps share it."""
+    if any(handler.get_name() == STDERR_HANDLER_NAME for handler in logger.handlers):
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.set_name(STDERR_HANDLER_NAME)
+    handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s %(threadName)s : %(message)s"
+        )
+    )
+    logger.addHandler(handler)
+
+
+def _json_routes(
+    node: ManagedNode,
+    period_dumper: "PeriodDumper",
+    tuning_profile: Optional[TuningProfile],
+) -> Dict[str, Callable[[], Any]]:
+    """Get the read-only routes of the control API, by path."""
+    return {
+        # the pending, completed and failed period dumps
+        "/dumps": period_dumper.status,
+        # the resource limits and the recent usage samples of the node
+        "/resources": node.resources.status,
+        # the data dir size, its growth and the maintenance runs
+        "/disk": node.disk.status,
+        # the consensus latency histograms and the recent heights
+        "/consensus": node.consensus.status,
+        # the tuning profile applied to the config, null when none is
+        "/tuning_profile": lambda: (
+            None if tuning_profile is None else tuning_profile.to_json()
+        ),
+        # the crash bundles, without their lines
+        "/crash_bundles": lambda: {"bundles": node.crash_bundles.summaries()},
+    }
+
+
+def _params_failure() -> Dict[str, Any]:
+    """Get the `/params` body of a failed read."""
+    return {"params": {}, "status": False, "error": "Failed to read tendermint params."}
+
+
+def _update_params(raw: str, node: ManagedNode, logger: Logger) -> Dict[str, Any]:
+    """Apply a `POST /params` body: the genesis, the peers and the external address."""
+    try:
+        data: Dict = json.loads(raw)
+        logger.debug(f"Data update requested with data={data}")
+        logger.info("Updating genesis config.")
+        update_genesis_config(data=data, genesis=node.genesis)
+        # the hashes indexed so far belong to the previous chain
+        node.app_hashes.clear()
+        logger.info("Updating peristent peers.")
+        changed = update_p2p_config(
+            validators=data["validators"],
+            external_address=data["external_address"],
+            config_path=Path(cast(str, node.params.home)) / "config" / "config.toml",
+        )
+        logger.info(f"Changed config keys: {changed}")
+        return {"status": True, "error": None, "changed": changed}
+    except (FileNotFoundError, json.JSONDecodeError, PermissionError, KeyError):
+        logger.exception("Failed to update tendermint params.")
+        return {"status": False, "error": "Failed to update tendermint params."}
+
+
+def _app_hashes_range(args: Mapping[str, str]) -> Tuple[int, int]:
+    """Parse the `from` and `to` arguments of `/app_hashes`."""
+    try:
+        from_height, to_height = int(args["from"]), int(args["to"])
+    except (KeyError, ValueError) as e:
+        raise ValueError("`from` and `to` must be block heights.") from e
+    if not 0 <= to_height - from_height < MAX_APP_HASH_RANGE:
+        raise ValueError(f"At most {MAX_APP_HASH_RANGE} heights can be requested.")
+    return from_height, to_height
+
+
+def _app_hashes_body(hashes: Dict[int, str]) -> Dict[str, Any]:
+    """Get the `/app_hashes` body of the hashes found."""
+    return {
+        "app_hashes": [
+            {"height": height, "app_hash": app_hash}
+            for height, app_hash in hashes.items()
+        ]
+    }
+
+
+def _gentle_reset_body(timings: Dict[str, float], wait_ready: bool) -> Dict[str, Any]:
+    """Get the timings of a gentle reset and whether the RPC answered, None if not awaited."""
+    return {"timings": timings, "ready": "rpc_ready" in timings if wait_ready else None}
+
+
+def _reset_genesis(node: ManagedNode, args: Mapping[str, str]) -> None:
+    """Reset the genesis of a pruned node, as the `/hard_reset` arguments ask."""
+    defaults = node.genesis.defaults()
+    node.genesis.reset(
+        args.get("genesis_time", defaults["genesis_time"]),
+        # default should be 1: https://github.com/tendermint/tendermint/pull/5191/files
+        args.get("initial_height", "1"),
+        f"autonolas-{args.get('period_count', '0')}",
+    )
+
+
+def _crash_bundle(node: ManagedNode, bundle_id: str) -> Tuple[Dict[str, Any], int]:
+    """Get a crash bundle with the node output preceding the restart."""
+    bundle = node.crash_bundles.get(bundle_id)
+    if bundle is None:
+        return {"error": "Unknown crash bundle."}, HTTPStatus.NOT_FOUND
+    return bundle, HTTPStatus.OK
+
+
+def create_app(  # pylint: disable=too-many-statements,too-many-locals
+    debug: bool = False,
+    env: Optional[Mapping[str, str]] = None,
+) -> Tuple["Flask", TendermintNode]:
+    """
+    Create the Tendermint server app
+
+    :param debug: whether to start the node with debug logging.
+    :param env: the node settings, the process environment by default.
+    :return: the app and the node it controls.
+    """
+    startup = PhaseTimer()
+    # pylint: disable-next=import-outside-toplevel,redefined-outer-name
+    from flask import Flask, Response, jsonify, request
+
+    startup.mark("imports")
+    env = os.environ if env is None else env
+    write_to_log = env.get("WRITE_TO_LOG", "false").lower() == "true"
+    tendermint_params = TendermintParams.from_env(env)
+
+    app = Flask(__name__)  # pylint: disable=redefined-outer-name
+    # Route app.logger to stderr so exception logs land in the parent process's
+    # tm.log (deployment_runner pipes this subprocess's stderr there); without
+    # this they'd go to com.log, which isn't collected for support bundles.
+    # The logger is shared by the apps of a multi-node manager, add the handler once.
+    _add_stderr_handler(app.logger)
+    app.logger.setLevel(logging.DEBUG)  # pylint: disable=no-member
+    app._is_on_exit = (  # pylint: disable=protected-access
+        False  # ugly but better than global ver
+    )
+    period_dumper = PeriodDumper.from_env(
+        logger=app.logger,
+        dump_dir=Path(env["TMSTATE"]),
+        home=Path(env["TMHOME"]),
+        node_id=env["ID"],
+    )
+    tendermint_node = TendermintNode(
+        tendermint_params,
+        logger=app.logger,
+        write_to_log=write_to_log,
+        log_file=env.get("LOG_FILE"),
+        triggers=TriggerRegistry.from_env(
+            env.get("TM_RESTART_TRIGGERS"), logger=app.logger
+        ),
+        app_hash_index_file=env.get("TM_APP_HASH_INDEX_FILE", ""),
+        crash_bundle_dir=env.get("TM_CRASH_BUNDLE_DIR", ""),
+    )
+    metrics = ManagerMetrics(tendermint_node)
+    jobs = JobRegistry()
+    reset_timeout = _env_float("TM_RESET_TIMEOUT", DEFAULT_RESET_TIMEOUT)
+    # a gentle reset waits for the RPC of the restarted node, unless turned off
+    # per request with `wait_ready=false` or by default with the variable
+    reset_wait_ready = _env_bool("TM_RESET_WAIT_READY", True)
+    # /logs requests that wait or stream, each holding a server thread
+    log_waiters = BoundedSemaphore(
+        max(0, _env_int("TM_LOG_MAX_WAITERS", DEFAULT_LOG_WAITERS))
+    )
+    tuning_profile = TuningProfile.from_env(env.get("TM_TUNING_PROFILE", ""))
+    tendermint_node.init()
+    startup.mark("init")
+    changed = override_config_toml(Path(env["TMHOME"]), tuning_profile)
+    if changed:
+        app.logger.info(f"Changed config keys: {changed}")  # pylint: disable=no-member
+    startup.mark("config")
+    tendermint_node.start(debug=debug)
+    startup.mark("spawn")
+    Thread(
+        target=tendermint_node.identity.warm_up, name="params-warm-up", daemon=True
+    ).start()
+    if startup_profile_enabled():
+        Thread(
+            target=report_startup_profile,
+            args=(tendermint_node, startup, reset_timeout),
+            name="startup-profile",
+            daemon=True,
+        ).start()
+
+    @app.get("/params")
+    def get_params() -> Dict:
+        """Get tendermint params."""
+        try:
+            return {
+                "params": tendermint_node.identity.params(),
+                "status": True,
+                "error": None,
+            }
+        except (OSError, json.JSONDecodeError):
+            app.logger.exception(  # pylint: disable=no-member
+                "Failed to read tendermint params."
+            )
+            return _params_failure()
+
+    @app.post("/params")
+    def update_params() -> Dict:
+        """Update validator params."""
+        return _update_params(
+            request.get_data().decode(ENCODING), tendermint_node, app.logger
+        )
+
+    def run_gentle_reset(wait_ready: bool) -> Dict[str, Any]:
+        """Restart the node, optionally wait for its RPC, and record the outcome."""
+        reset_started = monotonic()
+        try:
+            timings = tendermint_node.reset(
+                timeout=reset_timeout if wait_ready else None
+            )
+        except Exception:
+            metrics.observe_reset("gentle", monotonic() - reset_started, False)
+            raise
+        metrics.observe_reset("gentle", timings["total"], True)
+        return _gentle_reset_body(timings, wait_ready)
+
+    @app.route("/gentle_reset")
+    def gentle_reset() -> Tuple[Any, int]:
+        """Reset the tendermint node gently."""
+        if app._is_on_exit:  # pylint: disable=protected-access
+            raise RuntimeError("server exit now")
+        wait_ready = (
+            request.args.get("wait_ready", str(reset_wait_ready)).lower() == "true"
+        )
+        if request.args.get("async", "false").lower() == "true":
+            job_id = jobs.submit(
+                "gentle_reset", functools.partial(run_gentle_reset, wait_ready)
+            )
+            return (
+                jsonify(
+                    {"message": "Reset scheduled.", "status": True, "job_id": job_id}
+                ),
+                HTTPStatus.ACCEPTED,
+            )
+        try:
+            body = run_gentle_reset(wait_ready)
+            return (
+                jsonify({"message": "Reset successful.", "status": True, **body}),
+                HTTPStatus.OK,
+            )
+        except Exception:  # pylint: disable=W0703
+            app.logger.exception(  # pylint: disable=no-member
+                "Gentle reset failed."
+            )
+            return (
+                jsonify({"message": "Reset failed.", "status": False}),
+                HTTPStatus.OK,
+            )
+
+    @app.get("/jobs/<job_id>")
+    def get_job(job_id: str) -> Tuple[Any, int]:
+        """Get a background job, optionally waiting `wait` seconds for it to finish."""
+        try:
+            wait = min(float(request.args.get("wait", "0")), reset_timeout)
+        except ValueError:
+            wait = 0
+        job = jobs.get(job_id, wait=wait)
+        if job is None:
+            return jsonify({"error": "Unknown job."}), HTTPStatus.NOT_FOUND
+        return jsonify(job), HTTPStatus.OK
+
+    @app.route("/app_hash")
+    def app_hash() -> Tuple[Any, int]:
+        """Get the app hash."""
+        try:
+            height = request.args.get("height")
+            app_hash_ = tendermint_node.app_hashes.get(
+                int(height) if height is not None else None
+            )
+            if app_hash_ is None:
+                # no block at that height, answered like any other failure
+                return jsonify({"error": "Could not get the app hash."}), 200
+            return jsonify({"app_hash": app_hash_}), HTTPStatus.OK
+        except Exception:  # pylint: disable=W0703
+            app.logger.exception(  # pylint: disable=no-member
+                "Could not get the app hash."
+            )
+            return (
+                jsonify({"error": "Could not get the app hash."}),
+                200,
+            )
+
+    @app.get("/app_hashes")
+    def app_hashes() -> Tuple[Any, int]:
+        """Get the app hashes of the heights in `[from, to]`."""
+        try:
+            from_height, to_height = _app_hashes_range(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+        try:
+            hashes = tendermint_node.app_hashes.range(from_height, to_height)
+        except Exception:  # pylint: disable=W0703
+            app.logger.exception(  # pylint: disable=no-member
+                "Could not get the app hashes."
+            )
+            return jsonify({"error": "Could not get the app hashes."}), HTTPStatus.OK
+        return jsonify(_app_hashes_body(hashes)), HTTPStatus.OK
+
+    @app.route("/hard_reset")
+    def hard_reset() -> Tuple[Any, int]:
+        """Reset the node forcefully, and prune the blocks"""
+        if app._is_on_exit:  # pylint: disable=protected-access
+            raise RuntimeError("server exit now")
+        reset_started = monotonic()
+        try:
+            tendermint_node.hard_reset(
+                request.args, period_dumper.dump_period if IS_DEV_MODE else None
+            )
+            metrics.observe_reset("hard", monotonic() - reset_started, True)
+            return (
+                jsonify({"message": "Reset successful.", "status": True}),
+                HTTPStatus.OK,
+            )
+        except Exception:  # pylint: disable=W0703
+            metrics.observe_reset("hard", monotonic() - reset_started, False)
+            app.logger.exception(  # pylint: disable=no-member
+                "Hard reset failed."
+            )
+            return (
+                jsonify({"message": "Reset failed.", "status": False}),
+                HTTPStatus.OK,
+            )
+
+    @app.get("/genesis")
+    def get_genesis() -> Tuple[Any, int]:
+        """Get the current genesis."""
+        try:
+            return jsonify(tendermint_node.genesis.get()), HTTPStatus.OK
+        except (FileNotFoundError, json.JSONDecodeError):
+            app.logger.exception(  # pylint: disable=no-member
+                "Could not read the genesis."
+            )
+            return jsonify({"error": "Could not read the genesis."}), HTTPStatus.OK
+
+    def json_route(getter: Callable[[], Any]) -> Callable[[], Tuple[Any, int]]:
+        """Serve the value of a getter as JSON."""
+        return lambda: (jsonify(getter()), HTTPStatus.OK)
+
+    for path, getter in _json_routes(
+        tendermint_node, period_dumper, tuning_profile
+    ).items():
+        app.add_url_rule(path, path, json_route(getter), methods=["GET"])
+
+    @app.get("/logs")
+    def get_logs() -> Any:
+        """
+        Get the recent node output from the log ring.
+
+        `since` is the sequence number to read from, without it the last `limit`
+        lines are returned. With `wait` the request waits up to that many
+        seconds for lines after `since`. With `stream=true` the lines are sent
+        as JSON lines until the client disconnects.
+
+        Waiting and streaming hold a server thread, so only `TM_LOG_MAX_WAITERS`
+        such requests are served at once, well below the server threads, and
+        the others get a 503.
+        """
+        try:
+            since, limit, wait = _log_query(request.args)
+        except ValueError:
+            return (
+                jsonify({"error": "`since`, `limit` and `wait` must be numbers."}),
+                HTTPStatus.BAD_REQUEST,
+            )
+        ring = tendermint_node.log_ring
+        streaming = request.args.get("stream", "false").lower() == "true"
+        if not streaming and (wait <= 0 or since is None):
+            return jsonify(ring.since(since, limit)), HTTPStatus.OK
+        if not log_waiters.acquire(blocking=False):
+            return (
+                jsonify({"error": "Too many clients waiting on the logs."}),
+                HTTPStatus.SERVICE_UNAVAILABLE,
+            )
+        if not streaming:
+            try:
+                ring.wait(cast(int, since), wait)
+            finally:
+                log_waiters.release()
+            return jsonify(ring.since(since, limit)), HTTPStatus.OK
+
+        def stream(seq: Optional[int]) -> Iterator[str]:
+            while not app._is_on_exit:  # pylint: disable=protected-access
+                page = ring.since(seq, limit)
+                seq = page["next"]
+                if page["lines"] or page["missed"]:
+                    yield _log_chunk(page)
+                elif not ring.wait(seq, LOG_STREAM_HEARTBEAT):
+                    # lets the server notice clients that went away
+                    yield "\n"
+
+        response = Response(stream(since), mimetype="application/x-ndjson")
+        response.call_on_close(log_waiters.release)
+        return response
+
+    @app.get("/crash_bundles/<bundle_id>")
+    def get_crash_bundle(bundle_id: str) -> Tuple[Any, int]:
+        """Get a crash bundle with the node output preceding the restart."""
+        body, status = _crash_bundle(tendermint_node, bundle_id)
+        return jsonify(body), status
+
+    @app.get("/metrics")
+    def get_metrics() -> Response:
+        """Get the manager metrics in the Prometheus text format."""
+        return Response(
+            metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    @app.errorhandler(HTTPStatus.NOT_FOUND)  # type: ignore
+    def handle_notfound(e: "NotFound") -> Response:
+        """Handle server error."""
+        app.logger.info(e)  # pylint: disable=E
+        return Response(
+            "Not Found", status=HTTPStatus.NOT_FOUND, mimetype="application/json"
+        )
+
+    @app.errorhandler(HTTPStatus.INTERNAL_SERVER_ERROR)  # type: ignore
+    def handle_server_error(e: "InternalServerError") -> Response:
+        """Handle server error."""
+        app.logger.info(e)  # pylint: disable=E
+        return Response(
+            "Error Closing Node",
+            status=HTTPStatus.INTERNAL_SERVER_ERROR,
+            mimetype="application/json",
+        )
+
+    return app, tendermint_node
+
+
+def _free_port() -> int:
+    """Get a TCP port nothing listens on."""
+    with contextlib.closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
+        sock.bind(("", 0))
+        return sock.getsockname()[1]
+
+
+def load_node_specs(raw: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Load the nodes of a multi-node manager from `TM_NODES`, or `raw` if given.
+
+    The variable holds a JSON list, or the path of a JSON file with a list, of
+    objects with an `id`, a `home` and a `proxy_app`, and optionally a `state`
+    dump directory, `p2p_laddr` and `rpc_laddr` addresses (free ports are
+    allocated when missing), `create_empty_blocks`, `use_grpc`, `write_to_log`,
+    `log_file`, `app_hash_index_file`, `restart_triggers` in the
+    `TM_RESTART_TRIGGERS` format and `tuning_profile`.
+    """
+    raw = (os.environ.get("TM_NODES", "") if raw is None else raw).strip()
+    if not raw.startswith("["):
+        raw = Path(raw).read_text(encoding=ENCODING)
+    specs = json.loads(raw)
+    ids = [str(spec["id"]) for spec in specs]
+    for node_id in ids:
+        if re.fullmatch(r"[A-Za-z0-9_.\-]+", node_id) is None:
+            raise ValueError(f"Invalid node id {node_id!r}")
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate node ids in {ids}")
+    return specs
+
+
+def node_env(spec: Dict[str, Any]) -> Dict[str, str]:
+    """Get the settings `create_app` expects for a node spec."""
+    home = Path(spec["home"])
+    env = {
+        "ID": str(spec["id"]),
+        "TMHOME": str(home),
+        "TMSTATE": str(spec.get("state", home.with_name(f"{home.name}_state"))),
+        "PROXY_APP": spec["proxy_app"],
+        "P2P_LADDR": spec.get("p2p_laddr") or f"{_TCP}0.0.0.0:{_free_port()}",
+        "RPC_LADDR": spec.get("rpc_laddr") or f"{_TCP}127.0.0.1:{_free_port()}",
+        "CREATE_EMPTY_BLOCKS": str(spec.get("create_empty_blocks", True)).lower(),
+        "USE_GRPC": str(spec.get("use_grpc", False)).lower(),
+        "WRITE_TO_LOG": str(
+            spec.get("write_to_log", os.environ.get("WRITE_TO_LOG", "false"))
+        ).lower(),
+        "LOG_FILE": spec.get("log_file", str(home / DEFAULT_TENDERMINT_LOG_FILE)),
+    }
+    if "tuning_profile" in spec:
+        env["TM_TUNING_PROFILE"] = spec["tuning_profile"]
+    if "app_hash_index_file" in spec:
+        env["TM_APP_HASH_INDEX_FILE"] = spec["app_hash_index_file"]
+    triggers = spec.get("restart_triggers")
+    if triggers is not None:
+        env["TM_RESTART_TRIGGERS"] = (
+            triggers if isinstance(triggers, str) else json.dumps(triggers)
+        )
+    return env
+
+
+def create_multi_app(
+    debug: bool = False,
+) -> Tuple["Flask", Dict[str, Tuple["Flask", TendermintNode]]]:
+    """
+    Create a server app controlling several Tendermint nodes.
+
+    Every node gets the app `create_app` builds for a single node, mounted
+    under `/nodes/<id>`, so each one has its own home, ports, restart triggers
+    and policies. `GET /nodes` lists the nodes and their addresses.
+    """
+    # pylint: disable-next=import-outside-toplevel,redefined-outer-name
+    from flask import Flask, jsonify
+    from werkzeug.middleware.dispatcher import (  # pylint: disable=import-outside-toplevel
+        DispatcherMiddleware,
+    )
+
+    nodes: Dict[str, Tuple[Flask, TendermintNode]] = {}
+    settings: Dict[str, Dict[str, str]] = {}
+    for spec in load_node_specs():
+        env = node_env(spec)
+        settings[env["ID"]] = env
+        nodes[env["ID"]] = create_app(debug=debug, env=env)
+
+    app = Flask(__name__)  # pylint: disable=redefined-outer-name
+    app.wsgi_app = DispatcherMiddleware(  # type: ignore[method-assign]
+        app.wsgi_app,
+        {f"/nodes/{node_id}": node_app for node_id, (node_app, _) in nodes.items()},
+    )
+
+    @app.get("/nodes")
+    def get_nodes() -> Tuple[Any, int]:
+        """List the managed nodes."""
+        return (
+            jsonify(
+                {
+                    node_id: {
+                        "home": settings[node_id]["TMHOME"],
+                        "proxy_app": settings[node_id]["PROXY_APP"],
+                        "p2p_laddr": settings[node_id]["P2P_LADDR"],
+                        "rpc_laddr": settings[node_id]["RPC_LADDR"],
+                        "pid": node.pid,
+                    }
+                    for node_id, (_, node) in nodes.items()
+                }
+            ),
+            HTTPStatus.OK,
+        )
+
+    return app, nodes
+
+
+class AsyncTendermintNode:  # pylint: disable=too-many-instance-attributes
+    """
+    asyncio implementation of the node manager.
+
+    The node runs under `asyncio.create_subprocess_exec`, its output is read
+    by a task awaiting the stdout stream, the liveness checks poll the RPC
+    with an async HTTP client and every wait is awaited, so one event loop
+    drives the node and stops as soon as the node process exits. Only the log
+    sink keeps its writer thread, so that console and file writes never block
+    the loop. Restart triggers, restart policies, liveness detection, the
+    app-hash index and the genesis and identity caches are shared with
+    `TendermintNode`.
+    """
+
+    def __init__(
+        self,
+        params: TendermintParams,
+        logger: Optional[Logger] = None,
+        write_to_log: bool = False,
+    ):
+        """
+        Initialize a Tendermint node.
+
+        :param params: the parameters.
+        :param logger: the logger.
+        :param write_to_log: Write to log file.
+        """
+        self.params = params
+        self.logger = logger or logging.getLogger()
+        self.log_file = os.environ.get("LOG_FILE", DEFAULT_TENDERMINT_LOG_FILE)
+        self.write_to_log = write_to_log
+        self.log_sink = LogSink.from_env(self.log_file, write_to_file=write_to_log)
+        self.log_ring = LogRing.from_env()
+        self.crash_bundles = CrashBundles.from_env()
+        self._log_waiters: Set["asyncio.Future[None]"] = set()
+        self.triggers = TriggerRegistry.from_env(logger=self.logger)
+        self.supervisor = LivenessSupervisor.from_env(self)
+        self.stdout_lines = 0
+        self.stdout_rate = RateMeter()
+        self.consensus = ConsensusAnalytics.from_env()
+        self.started_at: Optional[float] = None
+        home = Path(params.home or os.environ["TMHOME"])
+        rpc = TendermintRPC(params.rpc_url)
+        self.identity = NodeIdentity(home, rpc)
+        self.app_hashes = AppHashIndex.from_env(rpc)
+        self.genesis = GenesisManager(home / "config" / "genesis.json")
+        self.data_reset = DataDirReset.from_env(home)
+        self.limits = ResourceLimits.from_env(home)
+        self.resources = ResourceMonitor.from_env(lambda: self.pid, self.limits)
+        self.disk = DiskWatchdog.from_env(self)
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._monitoring: Optional["asyncio.Task[None]"] = None
+        self._supervising: Optional["asyncio.Task[None]"] = None
+        self._sampling: Optional["asyncio.Task[None]"] = None
+        self._watching_disk: Optional["asyncio.Task[None]"] = None
+        self._tasks: Set["asyncio.Task[Any]"] = set()
+        self._restart_lock = asyncio.Lock()
+        self._reset_lock = asyncio.Lock()
+        self._stop_requested = asyncio.Event()
+        self._session: Optional[Any] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        """Get the pid of the node process, if running."""
+        process = self._process
+        return None if process is None else process.pid
+
+    def log(self, line: str) -> None:
+        """Write a line to the console and the log file, and keep it in the ring."""
+        line = str(line)
+        self.log_ring.append(line)
+        self.log_sink.write(line)
+        if self._log_waiters:
+            for waiter in self._log_waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+            self._log_waiters.clear()
+
+    async def wait_for_logs(self, seq: int, timeout: float) -> bool:
+        """Wait until the log ring has lines from `seq` on, return whether it has."""
+        if self.log_ring.next_seq > seq:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._log_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._log_waiters.discard(waiter)
+        return self.log_ring.next_seq > seq
+
+    async def rpc_get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> Dict[str, Any]:
+        """Call an RPC endpoint and get its `result`."""
+        import aiohttp  # pylint: disable=import-outside-toplevel
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        async with self._session.get(
+            f"{self.params.rpc_url}/{path}",
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            body = await response.json(content_type=None)
+        if "result" not in body:
+            raise ValueError(body.get("error", {}).get("data", "no result"))
+        return body["result"]
+
+    async def identity_params(self) -> Dict[str, Any]:
+        """Get the params served by `/params`, asking the RPC only when needed."""
+        params = self.identity.validator_key()
+        file_key, peer_id = self.identity.cached_peer_id()
+        if peer_id is None:
+            peer_id = (await self.rpc_get("status"))["node_info"]["id"]
+            self.identity.remember_peer_id(file_key, peer_id)
+        params["peer_id"] = peer_id
+        return params
+
+    async def _run(self, *cmd: str) -> int:
+        """Run a tendermint command to completion."""
+        process = await asyncio.create_subprocess_exec(*cmd)
+        return await process.wait()
+
+    async def init(self) -> None:
+        """Initialize Tendermint node, unless its home already is."""
+        if is_initialized(Path(self.params.home or os.environ["TMHOME"])):
+            self.log("Tendermint home already initialized, skipping init\n")
+            return
+        cmd = ["tendermint", "init"]
+        if self.params.home is not None:  # pragma: nocover
+            cmd += ["--home", self.params.home]
+        await self._run(*cmd)
+
+    async def prune_blocks(self) -> int:
+        """Prune blocks from the Tendermint state and forget their app hashes"""
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.data_reset.reset
+            )
+        except OSError as e:
+            self.log(f"Error resetting the Tendermint state: {e}\n")
+            return 1
+        self.app_hashes.clear()
+        return 0
 
-    resets: int
-    dump_dir: Path
-    logger: logging.Logger
+    async def _start_tm_process(self, debug: bool = False) -> None:
+        """Start a Tendermint node process."""
+        if self._process is not None:
+            return
+        cmd = self.params.build_node_command(debug)
+        kwargs: Dict[str, Any] = {
+            "stdout": asyncio.subprocess.PIPE,
+            "stderr": asyncio.subprocess.STDOUT,
+        }
+        if platform.system() == "Windows":  # pragma: nocover
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP  # type: ignore
+        else:
+            kwargs["start_new_session"] = True
+            self.limits.before_spawn(self.log)
 
-    def __init__(self, logger: logging.Logger, dump_dir: Optional[Path] = None) -> None:
-        """Initialize object."""
+        self.log(f"Starting Tendermint: {cmd}\n")
+        self._process = process = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+        if os.name == "nt":
+            self._wh = WinHelper()  # pylint: disable=attribute-defined-outside-init
+            self._wh.assign_to_job(process.pid)
+        else:
+            self.limits.after_spawn(process.pid, self.log)
 
-        self.resets = 0
-        self.logger = logger
-        self.dump_dir = Path(dump_dir or "/tm_state")
+        self.started_at = monotonic()
+        self.identity.invalidate()
+        self.consensus.restarted()
+        self._monitoring = asyncio.create_task(
+            self._monitor_tendermint_process(process)
+        )
+        self.log("Tendermint process started\n")
 
-        if self.dump_dir.is_dir():
-            rmtree_kwargs: Dict[str, Callable] = {}
-            if "onexc" in inspect.signature(shutil.rmtree).parameters:
-                rmtree_kwargs["onexc"] = self.readonly_handler
+    async def _monitor_tendermint_process(
+        self, process: asyncio.subprocess.Process
+    ) -> None:
+        """Read the process output until it closes."""
+        stdout = cast(asyncio.StreamReader, process.stdout)
+        while True:
+            try:
+                data = await stdout.readline()
+            except ValueError:
+                # a line longer than the stream limit, read what is buffered
+                data = await stdout.read(DUMP_CHUNK_SIZE)
+            if not data:
+                break
+            line = data.decode(ENCODING, errors="replace")
+            self.log(line)
+            self.stdout_lines += 1
+            self.stdout_rate.mark()
+            self.consensus.feed(line)
+            if process is not self._process:
+                continue
+            trigger = self.triggers.match(line)
+            if trigger is not None:
+                self._spawn(self.restart_on_trigger(trigger, line, process))
+
+    def _spawn(self, coroutine: Any) -> None:
+        """Run a coroutine in the background, keeping a reference to it."""
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _stop_tm_process(
+        self,
+        timer: Optional[PhaseTimer] = None,
+        deadline: Optional[ShutdownDeadline] = None,
+    ) -> None:
+        """Stop a Tendermint node process, within the deadline if given."""
+        process = self._process
+        if process is None:
+            return
+        timer = timer or PhaseTimer()
+        if platform.system() == "Windows":  # pragma: nocover
+            os.kill(process.pid, signal.CTRL_C_EVENT)  # type: ignore  # pylint: disable=no-member
+        else:
+            _signal_process_group(process.pid, signal.SIGTERM)
+        timer.mark("signal")
+        grace = (
+            DEFAULT_STOP_GRACE
+            if deadline is None
+            else deadline.remaining(STOP_GRACE_SHARE)
+        )
+        try:
+            await asyncio.wait_for(process.wait(), grace)
+        except asyncio.TimeoutError:
+            self.log("Tendermint process did not stop gracefully\n")
+            timer.mark("grace")
+            if platform.system() == "Windows":  # pragma: nocover
+                process.kill()
             else:
-                # Keep compatibility with Python versions where only `onerror` exists.
-                rmtree_kwargs["onerror"] = self.readonly_handler
-            cast(Callable[..., None], shutil.rmtree)(
-                str(self.dump_dir), **rmtree_kwargs
-            )
-        self.dump_dir.mkdir(exist_ok=True)
+                _signal_process_group(process.pid, signal.SIGKILL)
+            await asyncio.wait_for(process.wait(), _kill_wait(deadline))
+        timer.mark("process_exit")
+        if self._monitoring is not None:
+            # the output closes with the process, drain what is left
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._monitoring, 1.0 if deadline is None else deadline.remaining()
+                )
+            self._monitoring = None
+        timer.mark("monitor_exit")
 
-    @staticmethod
-    def readonly_handler(
-        func: Callable, path: str, execinfo: Any  # pylint: disable=unused-argument
+        self._process = None
+        self.started_at = None
+        self.log("Tendermint process stopped\n")
+
+    async def start(self, debug: bool = False) -> None:
+        """Start the node and its liveness checks."""
+        self._stop_requested.clear()
+        self.log_sink.start()
+        await self._start_tm_process(debug)
+        if self._supervising is None or self._supervising.done():
+            self._supervising = asyncio.create_task(self._supervise())
+        if self.resources.interval > 0 and (
+            self._sampling is None or self._sampling.done()
+        ):
+            self._sampling = asyncio.create_task(self._sample_resources())
+        if self.disk.interval > 0 and (
+            self._watching_disk is None or self._watching_disk.done()
+        ):
+            self._watching_disk = asyncio.create_task(self._watch_disk())
+        self.data_reset.prepare()
+
+    async def stop(
+        self,
+        timer: Optional[PhaseTimer] = None,
+        deadline: Optional[ShutdownDeadline] = None,
     ) -> None:
-        """If permission is readonly, we change and retry."""
-        try:
-            os.chmod(path, stat.S_IWRITE)
-            func(path)
-        except (FileNotFoundError, OSError):
-            pass
+        """Stop the node, its liveness checks and any pending restart."""
+        self._stop_requested.set()
+        for task in (self._supervising, self._sampling, self._watching_disk):
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        self._supervising = None
+        self._sampling = None
+        self._watching_disk = None
+        if timer is None and deadline is not None:
+            timer = deadline.timer
+        async with self._restart_lock:
+            await self._stop_tm_process(timer, deadline)
+
+    async def close(self, deadline: Optional[ShutdownDeadline] = None) -> None:
+        """Stop the node and close the HTTP client and the log file."""
+        await self.stop(deadline=deadline)
+        # flushing waits on the writer thread, keep it off the loop
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            self.log_sink.close,
+            1.0 if deadline is None else deadline.remaining(),
+        )
+        if self._session is not None:
+            await self._session.close()
 
-    def dump_period(self) -> None:
-        """Dump tendermint run data for replay"""
-        store_dir = self.dump_dir / f"period_{self.resets}"
-        store_dir.mkdir(exist_ok=True)
-        try:
-            shutil.copytree(
-                os.environ["TMHOME"], str(store_dir / ("node" + os.environ["ID"]))
-            )
-            self.logger.info(f"Dumped data for period {self.resets}")
-        except OSError as e:
-            self.logger.info(
-                f"Error occurred while dumping data for period {self.resets}: {e}"
+    async def restart_on_trigger(
+        self,
+        trigger: RestartTrigger,
+        reason: str,
+        process: Optional[asyncio.subprocess.Process] = None,
+    ) -> bool:
+        """
+        Restart the node process if the trigger's restart policy allows it.
+
+        :param trigger: the trigger that fired.
+        :param reason: the message explaining the restart.
+        :param process: the process the trigger fired for, the restart is skipped if it was already replaced.
+        :return: whether the node was restarted.
+        """
+        async with self._restart_lock:
+            if self._stop_requested.is_set():
+                return False
+            if process is not None and process is not self._process:
+                return False
+            delay = trigger.policy.next_delay()
+            if delay is None:
+                trigger.suppressed += 1
+                self.log(
+                    f"Restart for trigger {trigger.name} suppressed, "
+                    f"{trigger.policy.max_restarts} restarts in the last {trigger.policy.window}s\n"
+                )
+                return False
+            if delay > 0:
+                self.log(
+                    f"Delaying restart for trigger {trigger.name} by {delay:.1f}s\n"
+                )
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._stop_requested.wait(), delay)
+                    return False
+            trigger.policy.record()
+            trigger.restarts += 1
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    self.crash_bundles.save,
+                    trigger.name,
+                    reason,
+                    self.log_ring.snapshot(),
+                )
+            except OSError as e:
+                self.log(f"Could not save the crash bundle: {e}\n")
+            await self._stop_tm_process()
+            await self._start_tm_process()
+            self.log(
+                f"Restarted the node on trigger {trigger.name}, with message:\n\t\t {reason}\n"
             )
-        self.resets += 1
+            return True
+
+    async def _sample_resources(self) -> None:
+        """Sample the resource usage of the node process."""
+        while True:
+            await asyncio.sleep(self.resources.interval)
+            self.resources.sample()
+
+    async def _watch_disk(self) -> None:
+        """Measure the data dir and run the maintenance it calls for."""
+        loop = asyncio.get_running_loop()
+        self.disk.warn_no_command()
+        while True:
+            await asyncio.sleep(self.disk.interval)
+            try:
+                # walking a large data dir blocks, keep it off the loop
+                await loop.run_in_executor(None, self.disk.measure)
+                action = self.disk.due()
+                if action is not None:
+                    await self.maintain_data_dir(action)
+            except Exception as e:  # pylint: disable=broad-except
+                self.log(f"Data dir check failed: {e}\n")
+
+    async def maintain_data_dir(self, action: str) -> Dict[str, float]:
+        """
+        Stop the node, maintain its data dir and start it again.
 
+        :param action: `DISK_ACTION_COMPACT`.
+        :return: the duration of every phase, in seconds, empty if the node was not running or a reset was.
+        """
+        if self._reset_lock.locked():
+            # a reset is running, the next check tries again
+            return {}
+        async with self._reset_lock:
+            if self._process is None:
+                return {}
+            timer = PhaseTimer()
+            self.log(f"Data dir maintenance: {action}\n")
+            self._stop_requested.set()
+            async with self._restart_lock:
+                await self._stop_tm_process(timer)
+            try:
+                record = await asyncio.get_running_loop().run_in_executor(
+                    None, self.disk.maintain, action
+                )
+            finally:
+                timer.mark(action)
+                await self.start()
+                timer.mark("spawn")
+            self.log(f"Data dir maintenance done: {record}\n")
+            return timer.timings()
+
+    async def hard_reset(
+        self, args: Mapping[str, str], dump: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Stop the node, prune its blocks, reset its genesis and start it again.
+
+        :param args: the `/hard_reset` arguments, with the new genesis.
+        :param dump: called off the loop once the node is stopped, before the blocks are pruned.
+        """
+        async with self._reset_lock:
+            await self.stop()
+            if dump is not None:
+                await asyncio.get_running_loop().run_in_executor(None, dump)
+            if await self.prune_blocks():
+                await self.start()
+                raise RuntimeError("Could not perform `unsafe-reset-all` successfully!")
+            _reset_genesis(self, args)
+            await self.start()
+
+    async def _supervise(self) -> None:
+        """Poll the node status, index app hashes and restart stalled nodes."""
+        import aiohttp  # pylint: disable=import-outside-toplevel
+
+        supervisor = self.supervisor
+        while True:
+            await asyncio.sleep(supervisor.interval)
+            if self.started_at is None:
+                continue
+            try:
+                status = await self.rpc_get("status", timeout=supervisor.rpc.timeout)
+                sync_info: Optional[Dict[str, Any]] = status["sync_info"]
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError):
+                sync_info = None
+            height = supervisor.observe(sync_info)
+            if height is not None:
+                try:
+                    for min_height, max_height in self.app_hashes.pending_pages(height):
+                        await self.fetch_app_hashes(min_height, max_height)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    self.log(f"Could not index app hashes: {e}\n")
+            reason = supervisor.check_stall()
+            if reason is not None:
+                await self.restart_on_trigger(supervisor.trigger, reason)
+
+    async def fetch_app_hashes(
+        self, min_height: Optional[int] = None, max_height: Optional[int] = None
+    ) -> int:
+        """Record the app hashes of up to 20 blocks, returning the latest height."""
+        params = {}
+        if min_height is not None:
+            params["minHeight"] = min_height
+        if max_height is not None:
+            params["maxHeight"] = max_height
+        result = await self.rpc_get("blockchain", params=params)
+        self.app_hashes.record([meta["header"] for meta in result["block_metas"]])
+        return int(result["last_height"])
+
+    async def app_hash(self, height: Optional[int] = None) -> Optional[str]:
+        """Get the app hash of a height, or of the latest block."""
+        if height is None:
+            height = await self.fetch_app_hashes()
+        app_hash = self.app_hashes.lookup(height)
+        if app_hash is None:
+            await self.fetch_app_hashes(height, height + BLOCKCHAIN_PAGE_SIZE - 1)
+            app_hash = self.app_hashes.lookup(height)
+        return app_hash
+
+    async def app_hash_range(self, from_height: int, to_height: int) -> Dict[int, str]:
+        """Get the app hashes of the heights in `[from_height, to_height]`."""
+        missing = self.app_hashes.missing(from_height, to_height)
+        while missing:
+            next_height = missing[0]
+            max_height = min(next_height + BLOCKCHAIN_PAGE_SIZE - 1, to_height)
+            try:
+                last_height = await self.fetch_app_hashes(next_height, max_height)
+            except ValueError:
+                # the range goes past the latest block
+                break
+            if last_height <= max_height:
+                break
+            missing = [height for height in missing if height > max_height]
+        return self.app_hashes.recorded(from_height, to_height)
+
+    async def wait_until_ready(self, timeout: float = DEFAULT_RESET_TIMEOUT) -> bool:
+        """Wait until the RPC server answers `/status`."""
+        import aiohttp  # pylint: disable=import-outside-toplevel
+
+        deadline = monotonic() + timeout
+        while True:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return False
+            if self._process is None or self._process.returncode is not None:
+                return False
+            try:
+                await self.rpc_get("status", timeout=min(remaining, DEFAULT_TIMEOUT))
+                return True
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                await asyncio.sleep(min(remaining, DEFAULT_READY_POLL_INTERVAL))
+
+    async def reset(
+        self, timeout: Optional[float] = DEFAULT_RESET_TIMEOUT, debug: bool = False
+    ) -> Dict[str, float]:
+        """
+        Restart the node and wait until its RPC server is ready.
 
-def create_app(  # pylint: disable=too-many-statements
+        :param timeout: seconds to wait for the RPC server after the restart, None to not wait.
+        :param debug: whether to start the node with debug logging.
+        :return: the duration of every phase, in seconds, with `rpc_ready` only if the RPC answered in time.
+        """
+        async with self._reset_lock:
+            timer = PhaseTimer()
+            self._stop_requested.set()
+            async with self._restart_lock:
+                await self._stop_tm_process(timer)
+            await self.start(debug=debug)
+            timer.mark("spawn")
+            if timeout is None:
+                return timer.timings()
+            if not await self.wait_until_ready(timeout):
+                self.log(f"Tendermint RPC not ready after {timeout}s\n")
+                return timer.timings()
+            timer.mark("rpc_ready")
+            return timer.timings()
+
+
+def create_async_app(  # pylint: disable=too-many-statements,too-many-locals
     debug: bool = False,
-) -> Tuple[Flask, TendermintNode]:
-    """Create the Tendermint server app"""
-    write_to_log = os.environ.get("WRITE_TO_LOG", "false").lower() == "true"
-    tendermint_params = TendermintParams(
-        proxy_app=os.environ["PROXY_APP"],
-        p2p_laddr=os.environ["P2P_LADDR"],
-        rpc_laddr=os.environ["RPC_LADDR"],
-        consensus_create_empty_blocks=os.environ["CREATE_EMPTY_BLOCKS"] == "true",
-        home=os.environ["TMHOME"],
-        use_grpc=os.environ["USE_GRPC"] == "true",
-    )
+) -> Tuple[Any, AsyncTendermintNode]:
+    """Create the asyncio Tendermint server app"""
+    import aiohttp  # pylint: disable=import-outside-toplevel
+    from aiohttp import web  # pylint: disable=import-outside-toplevel
 
-    app = Flask(__name__)  # pylint: disable=redefined-outer-name
-    # Route app.logger to stderr so exception logs land in the parent process's
-    # tm.log (deployment_runner pipes this subprocess's stderr there); without
-    # this they'd go to com.log, which isn't collected for support bundles.
-    _stderr_handler = logging.StreamHandler(sys.stderr)
-    _stderr_handler.setFormatter(
-        logging.Formatter(
-            "%(asctime)s %(levelname)s %(name)s %(threadName)s : %(message)s"
-        )
-    )
-    app.logger.addHandler(_stderr_handler)  # pylint: disable=no-member
-    app.logger.setLevel(logging.DEBUG)  # pylint: disable=no-member
-    app._is_on_exit = (  # pylint: disable=protected-access
-        False  # ugly but better than global ver
-    )
-    period_dumper = PeriodDumper(
-        logger=app.logger,
+    write_to_log = os.environ.get("WRITE_TO_LOG", "false").lower() == "true"
+    tendermint_params = TendermintParams.from_env(os.environ)
+    logger = logging.getLogger("tendermint")
+    _add_stderr_handler(logger)
+    logger.setLevel(logging.DEBUG)
+    period_dumper = PeriodDumper.from_env(
+        logger=logger,
         dump_dir=Path(os.environ["TMSTATE"]),
+        home=Path(os.environ["TMHOME"]),
+        node_id=os.environ["ID"],
     )
-    tendermint_node = TendermintNode(
+    tendermint_node = AsyncTendermintNode(
         tendermint_params,
-        logger=app.logger,
+        logger=logger,
         write_to_log=write_to_log,
     )
-    tendermint_node.init()
-    override_config_toml()
-    tendermint_node.start(debug=debug)
-
-    @app.get("/params")
-    def get_params() -> Dict:
+    metrics = ManagerMetrics(tendermint_node)
+    jobs = JobRegistry()
+    reset_timeout = _env_float("TM_RESET_TIMEOUT", DEFAULT_RESET_TIMEOUT)
+    # a gentle reset waits for the RPC of the restarted node, unless turned off
+    # per request with `wait_ready=false` or by default with the variable
+    reset_wait_ready = _env_bool("TM_RESET_WAIT_READY", True)
+    rpc_errors = (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError)
+    routes = web.RouteTableDef()
+    app = web.Application()
+    app["is_on_exit"] = False
+
+    tuning_profile = TuningProfile.from_env()
+
+    async def on_startup(_: Any) -> None:
+        await tendermint_node.init()
+        changed = override_config_toml(profile=tuning_profile)
+        if changed:
+            logger.info(f"Changed config keys: {changed}")
+        await tendermint_node.start(debug=debug)
+
+    async def on_cleanup(_: Any) -> None:
+        await tendermint_node.close()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+
+    @routes.get("/params")
+    async def get_params(_: Any) -> Any:
         """Get tendermint params."""
         try:
-            priv_key_file = (
-                Path(os.environ["TMHOME"]) / "config" / "priv_validator_key.json"
-            )
-            priv_key_data = json.loads(priv_key_file.read_text(encoding=ENCODING))
-            del priv_key_data["priv_key"]
-            status = requests.get(TM_STATUS_ENDPOINT, timeout=DEFAULT_TIMEOUT).json()
-            priv_key_data["peer_id"] = status["result"]["node_info"]["id"]
-            return {
-                "params": priv_key_data,
-                "status": True,
-                "error": None,
-            }
-        except (FileNotFoundError, json.JSONDecodeError):
-            app.logger.exception(  # pylint: disable=no-member
-                "Failed to read tendermint params."
+            return web.json_response(
+                {
+                    "params": await tendermint_node.identity_params(),
+                    "status": True,
+                    "error": None,
+                }
             )
-            return {"params": {}, "status": False, "error": "Failed to read tendermint params."}
+        except (OSError, *rpc_errors):
+            logger.exception("Failed to read tendermint params.")
+            return web.json_response(_params_failure())
 
-    @app.post("/params")
-    def update_params() -> Dict:
+    @routes.post("/params")
+    async def update_params(req: Any) -> Any:
         """Update validator params."""
+        return web.json_response(
+            _update_params(await req.text(), tendermint_node, logger)
+        )
 
+    async def run_gentle_reset(wait_ready: bool) -> Dict[str, Any]:
+        """Restart the node, optionally wait for its RPC, and record the outcome."""
+        reset_started = monotonic()
         try:
-            data: Dict = json.loads(request.get_data().decode(ENCODING))
-            app.logger.debug(  # pylint: disable=no-member
-                f"Data update requested with data={data}"
-            )
-
-            app.logger.info(  # pylint: disable=no-member
-                "Updating genesis config."
+            timings = await tendermint_node.reset(
+                timeout=reset_timeout if wait_ready else None
             )
-            update_genesis_config(data=data)
-
-            app.logger.info(  # pylint: disable=no-member
-                "Updating peristent peers."
-            )
-            config_path = Path(os.environ["TMHOME"]) / "config" / "config.toml"
-            update_peers(
-                validators=data["validators"],
-                config_path=config_path,
+        except Exception:
+            metrics.observe_reset("gentle", monotonic() - reset_started, False)
+            raise
+        metrics.observe_reset("gentle", timings["total"], True)
+        return _gentle_reset_body(timings, wait_ready)
+
+    @routes.get("/gentle_reset")
+    async def gentle_reset(req: Any) -> Any:
+        """Reset the tendermint node gently."""
+        if app["is_on_exit"]:
+            raise RuntimeError("server exit now")
+        wait_ready = (
+            req.query.get("wait_ready", str(reset_wait_ready)).lower() == "true"
+        )
+        if req.query.get("async", "false").lower() == "true":
+            job_id = jobs.submit_async("gentle_reset", run_gentle_reset(wait_ready))
+            return web.json_response(
+                {"message": "Reset scheduled.", "status": True, "job_id": job_id},
+                status=HTTPStatus.ACCEPTED,
             )
-            update_external_address(
-                external_address=data["external_address"],
-                config_path=config_path,
+        try:
+            body = await run_gentle_reset(wait_ready)
+            return web.json_response(
+                {"message": "Reset successful.", "status": True, **body}
             )
+        except Exception:  # pylint: disable=W0703
+            logger.exception("Gentle reset failed.")
+            return web.json_response({"message": "Reset failed.", "status": False})
 
-            return {"status": True, "error": None}
-        except (FileNotFoundError, json.JSONDecodeError, PermissionError):
-            app.logger.exception(  # pylint: disable=no-member
-                "Failed to update tendermint params."
+    @routes.get("/jobs/{job_id}")
+    async def get_job(req: Any) -> Any:
+        """Get a background job, optionally waiting `wait` seconds for it to finish."""
+        try:
+            wait = min(float(req.query.get("wait", "0")), reset_timeout)
+        except ValueError:
+            wait = 0
+        job = await jobs.get_async(req.match_info["job_id"], wait=wait)
+        if job is None:
+            return web.json_response(
+                {"error": "Unknown job."}, status=HTTPStatus.NOT_FOUND
             )
-            return {"status": False, "error": "Failed to update tendermint params."}
+        return web.json_response(job)
 
-    @app.route("/gentle_reset")
-    def gentle_reset() -> Tuple[Any, int]:
-        """Reset the tendermint node gently."""
-        if app._is_on_exit:  # pylint: disable=protected-access
-            raise RuntimeError("server exit now")
+    @routes.get("/app_hash")
+    async def app_hash(req: Any) -> Any:
+        """Get the app hash."""
         try:
-            tendermint_node.stop()
-            tendermint_node.start()
-            return (
-                jsonify({"message": "Reset successful.", "status": True}),
-                HTTPStatus.OK,
+            height = req.query.get("height")
+            app_hash_ = await tendermint_node.app_hash(
+                int(height) if height is not None else None
             )
+            if app_hash_ is None:
+                # no block at that height, answered like any other failure
+                return web.json_response({"error": "Could not get the app hash."})
+            return web.json_response({"app_hash": app_hash_})
         except Exception:  # pylint: disable=W0703
-            app.logger.exception(  # pylint: disable=no-member
-                "Gentle reset failed."
-            )
-            return (
-                jsonify({"message": "Reset failed.", "status": False}),
-                HTTPStatus.OK,
-            )
+            logger.exception("Could not get the app hash.")
+            return web.json_response({"error": "Could not get the app hash."})
 
-    @app.route("/app_hash")
-    def app_hash() -> Tuple[Any, int]:
-        """Get the app hash."""
+    @routes.get("/app_hashes")
+    async def app_hashes(req: Any) -> Any:
+        """Get the app hashes of the heights in `[from, to]`."""
         try:
-            non_routable, loopback = "0.0.0.0", "127.0.0.1"  # nosec
-            endpoint = f"{tendermint_params.rpc_laddr.replace('tcp', 'http').replace(non_routable, loopback)}/block"
-            height = request.args.get("height")
-            params = {"height": height} if height is not None else None
-            res = requests.get(endpoint, params, timeout=DEFAULT_TIMEOUT)
-            app_hash_ = res.json()["result"]["block"]["header"]["app_hash"]
-            return jsonify({"app_hash": app_hash_}), res.status_code
+            from_height, to_height = _app_hashes_range(req.query)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=HTTPStatus.BAD_REQUEST)
+        try:
+            hashes = await tendermint_node.app_hash_range(from_height, to_height)
         except Exception:  # pylint: disable=W0703
-            app.logger.exception(  # pylint: disable=no-member
-                "Could not get the app hash."
-            )
-            return (
-                jsonify({"error": "Could not get the app hash."}),
-                200,
-            )
+            logger.exception("Could not get the app hashes.")
+            return web.json_response({"error": "Could not get the app hashes."})
+        return web.json_response(_app_hashes_body(hashes))
 
-    @app.route("/hard_reset")
-    def hard_reset() -> Tuple[Any, int]:
+    @routes.get("/hard_reset")
+    async def hard_reset(req: Any) -> Any:
         """Reset the node forcefully, and prune the blocks"""
-        if app._is_on_exit:  # pylint: disable=protected-access
+        if app["is_on_exit"]:
             raise RuntimeError("server exit now")
+        reset_started = monotonic()
         try:
-            tendermint_node.stop()
-            if IS_DEV_MODE:
-                period_dumper.dump_period()
-
-            return_code = tendermint_node.prune_blocks()
-            if return_code:
-                tendermint_node.start()
-                raise RuntimeError("Could not perform `unsafe-reset-all` successfully!")
-            defaults = get_defaults()
-            tendermint_node.reset_genesis_file(
-                request.args.get("genesis_time", defaults["genesis_time"]),
-                # default should be 1: https://github.com/tendermint/tendermint/pull/5191/files
-                request.args.get("initial_height", "1"),
-                request.args.get("period_count", "0"),
-            )
-            tendermint_node.start()
-            return (
-                jsonify({"message": "Reset successful.", "status": True}),
-                HTTPStatus.OK,
+            await tendermint_node.hard_reset(
+                req.query, period_dumper.dump_period if IS_DEV_MODE else None
             )
+            metrics.observe_reset("hard", monotonic() - reset_started, True)
+            return web.json_response({"message": "Reset successful.", "status": True})
         except Exception:  # pylint: disable=W0703
-            app.logger.exception(  # pylint: disable=no-member
-                "Hard reset failed."
-            )
-            return (
-                jsonify({"message": "Reset failed.", "status": False}),
-                HTTPStatus.OK,
-            )
+            metrics.observe_reset("hard", monotonic() - reset_started, False)
+            logger.exception("Hard reset failed.")
+            return web.json_response({"message": "Reset failed.", "status": False})
 
-    @app.errorhandler(HTTPStatus.NOT_FOUND)  # type: ignore
-    def handle_notfound(e: NotFound) -> Response:
-        """Handle server error."""
-        app.logger.info(e)  # pylint: disable=E
-        return Response(
-            "Not Found", status=HTTPStatus.NOT_FOUND, mimetype="application/json"
-        )
+    @routes.get("/genesis")
+    async def get_genesis(_: Any) -> Any:
+        """Get the current genesis."""
+        try:
+            return web.json_response(tendermint_node.genesis.get())
+        except (FileNotFoundError, json.JSONDecodeError):
+            logger.exception("Could not read the genesis.")
+            return web.json_response({"error": "Could not read the genesis."})
 
-    @app.errorhandler(HTTPStatus.INTERNAL_SERVER_ERROR)  # type: ignore
-    def handle_server_error(e: InternalServerError) -> Response:
-        """Handle server error."""
-        app.logger.info(e)  # pylint: disable=E
-        return Response(
-            "Error Closing Node",
-            status=HTTPStatus.INTERNAL_SERVER_ERROR,
-            mimetype="application/json",
+    def json_route(getter: Callable[[], Any]) -> Callable[[Any], Any]:
+        """Serve the value of a getter as JSON."""
+
+        async def handler(_: Any) -> Any:
+            return web.json_response(getter())
+
+        return handler
+
+    for path, getter in _json_routes(
+        tendermint_node, period_dumper, tuning_profile
+    ).items():
+        routes.get(path)(json_route(getter))
+
+    @routes.get("/logs")
+    async def get_logs(req: Any) -> Any:
+        """
+        Get the recent node output from the log ring, see the threaded app.
+
+        Waiting and streaming requests hold no thread here and are not capped.
+        """
+        try:
+            since, limit, wait = _log_query(req.query)
+        except ValueError:
+            return web.json_response(
+                {"error": "`since`, `limit` and `wait` must be numbers."},
+                status=HTTPStatus.BAD_REQUEST,
+            )
+        ring = tendermint_node.log_ring
+        if req.query.get("stream", "false").lower() != "true":
+            if wait > 0 and since is not None:
+                await tendermint_node.wait_for_logs(since, wait)
+            return web.json_response(ring.since(since, limit))
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(req)
+        with contextlib.suppress(ConnectionResetError):
+            while True:
+                page = ring.since(since, limit)
+                since = page["next"]
+                if page["lines"] or page["missed"]:
+                    await response.write(_log_chunk(page).encode(ENCODING))
+                elif not await tendermint_node.wait_for_logs(
+                    since, LOG_STREAM_HEARTBEAT
+                ):
+                    await response.write(b"\n")
+        return response
+
+    @routes.get("/crash_bundles/{bundle_id}")
+    async def get_crash_bundle(req: Any) -> Any:
+        """Get a crash bundle with the node output preceding the restart."""
+        body, status = _crash_bundle(tendermint_node, req.match_info["bundle_id"])
+        return web.json_response(body, status=status)
+
+    @routes.get("/metrics")
+    async def get_metrics(_: Any) -> Any:
+        """Get the manager metrics in the Prometheus text format."""
+        return web.Response(
+            body=metrics.render().encode(ENCODING),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
         )
 
+    app.add_routes(routes)
     return app, tendermint_node
 
 
+async def serve_async_app(
+    q: Optional[multiprocessing.Queue] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    deadline_at: Optional[Any] = None,
+) -> None:  # pragma: no cover
+    """Serve the asyncio control API until the task is cancelled or SIGTERM."""
+    from aiohttp import web  # pylint: disable=import-outside-toplevel
+
+    app, tendermint_node = create_async_app()
+    terminated = asyncio.Event()
+    if os.name != "nt":
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, terminated.set)
+
+    async def shutdown(deadline: ShutdownDeadline) -> None:
+        if app["is_on_exit"]:
+            return
+        app["is_on_exit"] = True
+        await tendermint_node.stop(deadline=deadline)
+        tendermint_node.logger.info(f"Shutdown stages: {deadline.timings()}")
+
+    async def handle_server_exit(req: Any) -> Any:
+        """Handle server exit."""
+        try:
+            await shutdown(ShutdownDeadline.from_env())
+            response = web.json_response({"node": "stopped"})
+            await response.prepare(req)
+            await response.write_eof()
+        finally:
+            if q is not None:
+                q.put(True)
+        return response
+
+    app.router.add_get("/exit", handle_server_exit)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(
+        runner,
+        host or os.environ.get("TM_SERVER_HOST", DEFAULT_SERVER_HOST),
+        port or _env_int("TM_SERVER_PORT", DEFAULT_SERVER_PORT),
+    )
+    await site.start()
+    try:
+        await terminated.wait()
+        await shutdown(_shutdown_deadline(deadline_at))
+    finally:
+        await runner.cleanup()
+
+
+def serve_app(
+    app: "Flask",
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    mode: Optional[str] = None,
+) -> None:  # pragma: no cover
+    """Serve the control API with the development or the production server."""
+    host = host or os.environ.get("TM_SERVER_HOST", DEFAULT_SERVER_HOST)
+    port = port or _env_int("TM_SERVER_PORT", DEFAULT_SERVER_PORT)
+    mode = mode or os.environ.get("TM_SERVER_MODE", SERVER_MODE_DEVELOPMENT)
+    if mode == SERVER_MODE_DEVELOPMENT:
+        app.run(host=host, port=port)
+        return
+    if mode != SERVER_MODE_PRODUCTION:
+        raise ValueError(f"Unknown server mode {mode!r}")
+    # werkzeug's server module is only loaded by the production mode
+    from tendermint_server import (  # pylint: disable=import-outside-toplevel
+        PooledWSGIServer,
+    )
+
+    server = PooledWSGIServer(
+        host,
+        port,
+        app,
+        threads=_env_int("TM_SERVER_THREADS", DEFAULT_SERVER_THREADS),
+        request_timeout=_env_float(
+            "TM_SERVER_REQUEST_TIMEOUT", DEFAULT_SERVER_REQUEST_TIMEOUT
+        ),
+        keep_alive=_env_bool("TM_SERVER_KEEP_ALIVE", True),
+        keep_alive_timeout=_env_float(
+            "TM_SERVER_KEEP_ALIVE_TIMEOUT", DEFAULT_SERVER_KEEP_ALIVE_TIMEOUT
+        ),
+    )
+    app.logger.info(  # pylint: disable=no-member
+        f"Serving on http://{host}:{port} with {server.threads} threads"
+    )
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
 def create_server() -> Any:  # pragma: no cover
     """Function to retrieve just the app to be used by flask entry point."""
     flask_app, _ = create_app()
     return flask_app
 
 
-def run_app_in_subprocess(q: multiprocessing.Queue) -> None:  # pragma: no cover
-    """Run flask app in a subprocess to kill it when needed."""
+def _shutdown_deadline(deadline_at: Optional[Any] = None) -> ShutdownDeadline:
+    """Get the shutdown deadline the parent process set, or a new one."""
+    at = 0.0 if deadline_at is None else deadline_at.value
+    return ShutdownDeadline(at=at) if at > 0 else ShutdownDeadline.from_env()
+
+
+def _exit_on_sigterm(shutdown: Callable[[], None]) -> None:
+    """Run `shutdown` and exit when the process gets SIGTERM, POSIX only."""
+    if os.name == "nt":  # pragma: nocover
+        return
+
+    def handler(*_: Any) -> None:
+        try:
+            shutdown()
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+
+    signal.signal(signal.SIGTERM, handler)
+
+
+def run_app_in_subprocess(
+    q: multiprocessing.Queue, deadline_at: Optional[Any] = None
+) -> None:  # pragma: no cover
+    """
+    Run flask app in a subprocess to kill it when needed.
+
+    :param q: the queue the stop marker is sent to once `/exit` was served.
+    :param deadline_at: shared value with the shutdown deadline set by the parent before it sends SIGTERM.
+    """
     print("app in subprocess")
+    manager_mode = os.environ.get("TM_MANAGER_MODE", MANAGER_MODE_THREADED)
+    if manager_mode == MANAGER_MODE_ASYNCIO:
+        asyncio.run(serve_async_app(q, deadline_at=deadline_at))
+        return
+    if manager_mode == MANAGER_MODE_MULTI:
+        run_multi_app(q, deadline_at)
+        return
+    # pylint: disable-next=import-outside-toplevel,redefined-outer-name
+    from flask import jsonify
+
     app, tendermint_node = create_app()
     atexit.register(tendermint_node.stop)
 
+    def shutdown(deadline: ShutdownDeadline) -> None:
+        if app._is_on_exit:  # pylint: disable=protected-access
+            return
+        app._is_on_exit = True  # pylint: disable=protected-access
+        tendermint_node.stop(deadline=deadline)
+        app.logger.info(  # pylint: disable=no-member
+            f"Shutdown stages: {deadline.timings()}"
+        )
+
+    _exit_on_sigterm(lambda: shutdown(_shutdown_deadline(deadline_at)))
+
     @app.route("/exit")
-    def handle_server_exit() -> Response:
+    def handle_server_exit() -> "Response":
         """Handle server exit."""
-        app._is_on_exit = True  # pylint: disable=protected-access
         try:
-            tendermint_node.stop()
-        finally:
+            shutdown(ShutdownDeadline.from_env())
+        except BaseException:
+            q.put(True)
+            raise
+        response = jsonify({"node": "stopped"})
+        # the parent stops this process on the marker, send it once the response is out
+        response.call_on_close(lambda: q.put(True))
+        return response
+
+    serve_app(app)
+
+
+def run_multi_app(
+    q: multiprocessing.Queue, deadline_at: Optional[Any] = None
+) -> None:  # pragma: no cover
+    """Run the multi-node app in a subprocess to kill it when needed."""
+    # pylint: disable-next=import-outside-toplevel,redefined-outer-name
+    from flask import jsonify
+
+    app, nodes = create_multi_app()
+
+    stopped = Event()
+
+    def stop_nodes(deadline: Optional[ShutdownDeadline] = None) -> None:
+        if stopped.is_set():
+            return
+        stopped.set()
+        deadline = deadline or ShutdownDeadline.from_env()
+        for node_app, _ in nodes.values():
+            node_app._is_on_exit = True  # pylint: disable=protected-access
+        timers = {node_id: PhaseTimer() for node_id in nodes}
+        # the nodes are independent, stop them all at once within the deadline
+        with ThreadPoolExecutor(max_workers=max(1, len(nodes))) as executor:
+            for node_id, (_, node) in nodes.items():
+                executor.submit(node.stop, timers[node_id], deadline)
+        deadline.mark("nodes")
+        app.logger.info(  # pylint: disable=no-member
+            f"Shutdown stages: {deadline.timings()}, per node: "
+            f"{ {node_id: timer.timings() for node_id, timer in timers.items()} }"
+        )
+
+    atexit.register(stop_nodes)
+    _exit_on_sigterm(lambda: stop_nodes(_shutdown_deadline(deadline_at)))
+
+    @app.route("/exit")
+    def handle_server_exit() -> "Response":
+        """Handle server exit."""
+        try:
+            stop_nodes()
+        except BaseException:
             q.put(True)
-        return {"node": "stopped"}
+            raise
+        response = jsonify({"nodes": "stopped"})
+        response.call_on_close(lambda: q.put(True))
+        return response
 
-    app.run(host="localhost", port=8080)
+    serve_app(app)
 
 
 class WinHelper:
@@ -857,32 +6281,60 @@ def run_stoppable_main() -> None:
         else multiprocessing.get_context()
     )
     q: multiprocessing.Queue = context.Queue()
-    p = context.Process(target=run_app_in_subprocess, args=(q,))
+    deadline_at = context.Value("d", 0.0)
+    p = context.Process(target=run_app_in_subprocess, args=(q, deadline_at))
     p.start()
-    # wait for stop marker
     atexit.register(p.terminate)
 
     if os.name == "nt":
         win_helper = WinHelper()
         win_helper.assign_to_job(p.pid)  # type: ignore[arg-type]
 
+    # wait for the stop marker, a termination signal or the app process to exit
+    stop_requested = Event()
+
+    def wait_for_stop_marker() -> None:
+        with contextlib.suppress(Exception):
+            q.get(block=True)
+        stop_requested.set()
+
+    Thread(target=wait_for_stop_marker, name="stop-marker", daemon=True).start()
+    if os.name != "nt":
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stop_requested.set())
+
     try:
-        q.get(block=True)
-        sleep(1)
+        while p.is_alive() and not stop_requested.wait(DEFAULT_STOP_POLL_INTERVAL):
+            pass
     finally:
+        deadline = ShutdownDeadline.from_env()
+        deadline_at.value = deadline.at
+        _stop_app_process(p, deadline)
         with contextlib.suppress(Exception):
             q.close()
-            q.join_thread()
+        print(f"Shutdown stages: {deadline.timings()}")
+
+
+def _stop_app_process(p: Any, deadline: ShutdownDeadline) -> None:
+    """Stop the app process, which stops its nodes within the same deadline."""
+    if p.is_alive():
         p.terminate()
-        with contextlib.suppress(Exception):
-            p.join(timeout=10)
-            p.terminate()
+        p.join(deadline.remaining() + APP_EXIT_GRACE)
+    deadline.mark("app_exit")
+    if p.is_alive():
+        print("The app process did not stop in time, killing it")
+        p.kill()
+        p.join(DEFAULT_KILL_WAIT)
+        deadline.mark("app_kill")
 
 
 def main() -> None:  # pragma: no cover
     """Main entrance."""
+    if os.environ.get("TM_MANAGER_MODE", MANAGER_MODE_THREADED) == MANAGER_MODE_ASYNCIO:
+        asyncio.run(serve_async_app())
+        return
     app = create_server()
-    app.run(host="localhost", port=8080)
+    serve_app(app)
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2026 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""
+Production WSGI server of the Tendermint manager.
+
+`tendermint.py` imports this module only when the production serving mode is
+selected, so that werkzeug's server module is not loaded otherwise. It does
+not import `tendermint.py` back, the manager passes every setting in.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """Request handler keeping HTTP/1.1 connections open between requests."""
+
+    protocol_version = "HTTP/1.1"
+    server: "PooledWSGIServer"
+
+    def setup(self) -> None:
+        """Apply the request timeout to the connection."""
+        self.timeout = self.server.request_timeout
+        super().setup()
+        self._served = False
+
+    def handle_one_request(self) -> None:
+        """Handle a request, waiting at most the keep-alive timeout for the next one."""
+        if self._served:
+            self.connection.settimeout(self.server.keep_alive_timeout)
+        super().handle_one_request()
+        self._served = True
+        self.connection.settimeout(self.server.request_timeout)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    WSGI server handling connections on a fixed pool of worker threads.
+
+    Werkzeug's threaded server spawns a thread per connection and speaks
+    HTTP/1.0; this one bounds the threads serving concurrent pollers, keeps
+    connections alive and times out slow or idle clients.
+    """
+
+    multithread = True
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        host: str,
+        port: int,
+        app: Any,
+        threads: int,
+        request_timeout: float,
+        keep_alive: bool,
+        keep_alive_timeout: float,
+    ) -> None:
+        """
+        Initialize the server.
+
+        :param host: the host to bind.
+        :param port: the port to bind.
+        :param app: the WSGI application.
+        :param threads: the number of worker threads.
+        :param request_timeout: seconds a client may take to send a request.
+        :param keep_alive: whether connections are kept open between requests.
+        :param keep_alive_timeout: seconds an idle kept-alive connection stays open.
+        """
+        super().__init__(
+            host,
+            port,
+            app,
+            handler=KeepAliveRequestHandler if keep_alive else WSGIRequestHandler,
+        )
+        self.threads = threads
+        self.request_timeout = request_timeout
+        self.keep_alive_timeout = keep_alive_timeout
+        self._pool = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="manager-http"
+        )
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """Hand the connection over to the worker pool."""
+        self._pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request: Any, client_address: Any) -> None:
+        """Serve a connection on a worker thread."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # pylint: disable=broad-except
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        """Close the socket and drop the queued connections."""
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
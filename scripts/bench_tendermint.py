@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2026 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""
+Benchmark suite of the tendermint manager's own overhead.
+
+Runs `operate/tendermint.py` against `scripts/fake_tendermint.py`, so it works
+offline and without a tendermint build, and measures:
+
+- stdout lines per second read by the manager at several node log rates,
+  along with the manager's RSS and CPU usage;
+- gentle and hard reset latency, until the call returns and until the node
+  answers RPC again;
+- restart trigger reaction time, from the node printing a trigger line to
+  the restarted node answering RPC;
+- the ABCI flag the node is started with for `USE_GRPC=false` and `true`;
+- the disk watchdog against a synthetic data dir growing with every block,
+  the sizes it keeps the data dir at and how long the compactions take.
+
+The report is JSON, so runs of different releases can be diffed. Linux only,
+the resource usage is read from `/proc`.
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+import typing as t
+from pathlib import Path
+
+import requests
+
+
+ROOT = Path(__file__).resolve().parent.parent
+MANAGER = ROOT / "operate" / "tendermint.py"
+FAKE_TENDERMINT = ROOT / "scripts" / "fake_tendermint.py"
+MANAGER_MODES = ("threaded", "asyncio")
+TRIGGER_LINE = "Stopping abci.socketClient for error: read message: EOF"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+DISK_GROWTH_PER_BLOCK = 1024 * 1024
+DISK_COMPACT_THRESHOLD = 16 * 1024 * 1024
+
+
+def free_port() -> int:
+    """Get a free local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def summarize(samples: t.List[float]) -> t.Dict[str, float]:
+    """Summarize latencies in milliseconds."""
+    if not samples:
+        return {}
+    return {
+        "count": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def manager_pids(pid: int) -> t.List[int]:
+    """Get the manager process and its descendants, except the node."""
+    parents: t.Dict[int, int] = {}
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        parents[int(stat.parent.name)] = int(fields[1])
+    pids, found = [pid], [pid]
+    while found:
+        found = [child for child, parent in parents.items() if parent in found]
+        pids += found
+    manager = []
+    for process in pids:
+        try:
+            cmdline = Path(f"/proc/{process}/cmdline").read_text()
+        except OSError:
+            continue
+        if FAKE_TENDERMINT.name not in cmdline:
+            manager.append(process)
+    return manager
+
+
+def proc_usage(pid: int) -> t.Dict[str, float]:
+    """Get the CPU time and memory of the manager processes from /proc."""
+    usage = {"cpu_seconds": 0.0, "rss_bytes": 0, "peak_rss_bytes": 0}
+    for process in manager_pids(pid):
+        fields = Path(f"/proc/{process}/stat").read_text().rsplit(")", 1)[1].split()
+        status = dict(
+            line.split(":", 1)
+            for line in Path(f"/proc/{process}/status").read_text().splitlines()
+            if ":" in line
+        )
+        usage["cpu_seconds"] += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        usage["rss_bytes"] += int(status["VmRSS"].split()[0]) * 1024
+        usage["peak_rss_bytes"] += int(status["VmHWM"].split()[0]) * 1024
+    return usage
+
+
+class Manager:
+    """A tendermint manager running against the fake node in a temporary home."""
+
+    def __init__(
+        self, workdir: Path, mode: str, overrides: t.Dict[str, str], timeout: float
+    ) -> None:
+        """
+        Initialize the manager.
+
+        :param workdir: the temporary directory of the run.
+        :param mode: the manager mode, `TM_MANAGER_MODE`.
+        :param overrides: extra environment of the manager and the fake node.
+        :param timeout: seconds to wait for the manager and the node to come up.
+        """
+        self.workdir = workdir
+        self.timeout = timeout
+        self.port = free_port()
+        self.rpc_port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.rpc_url = f"http://127.0.0.1:{self.rpc_port}"
+        bin_dir = workdir / "bin"
+        bin_dir.mkdir(exist_ok=True)
+        shim = bin_dir / "tendermint"
+        shim.write_text(
+            f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_TENDERMINT}" "$@"\n'
+        )
+        shim.chmod(0o755)
+        self.env = dict(os.environ)
+        self.env.update(
+            {
+                "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+                "TMHOME": str(workdir / "node"),
+                "TMSTATE": str(workdir / "state"),
+                "ID": "0",
+                "PROXY_APP": f"tcp://127.0.0.1:{free_port()}",
+                "P2P_LADDR": f"tcp://127.0.0.1:{free_port()}",
+                "RPC_LADDR": f"tcp://127.0.0.1:{self.rpc_port}",
+                "CREATE_EMPTY_BLOCKS": "true",
+                "USE_GRPC": "false",
+                "LOG_FILE": str(workdir / "tendermint.log"),
+                "TM_MANAGER_MODE": mode,
+                "TM_SERVER_PORT": str(self.port),
+                # react to triggers immediately and never open the circuit
+                "TM_RESTART_BACKOFF_INITIAL": "0",
+                "TM_RESTART_MAX_PER_WINDOW": "0",
+                "FAKE_TM_BLOCK_INTERVAL": "0.2",
+            }
+        )
+        self.env.update(overrides)
+        self.process: t.Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "Manager":
+        """Start the manager and wait for the node."""
+        self.process = subprocess.Popen(  # nosec # pylint: disable=consider-using-with
+            [sys.executable, str(MANAGER)],
+            cwd=self.workdir,
+            env=self.env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            try:
+                requests.get(f"{self.url}/params", timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.05)
+        else:
+            raise TimeoutError(f"{self.url} did not come up within {self.timeout}s")
+        self.wait_for_node()
+        return self
+
+    def __exit__(self, *_: t.Any) -> None:
+        """Stop the manager."""
+        if self.process is None:
+            return
+        try:
+            requests.get(f"{self.url}/exit", timeout=10)
+            self.process.wait(timeout=15)
+        except (requests.RequestException, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+
+    @property
+    def pid(self) -> int:
+        """Get the pid of the manager's main process."""
+        return t.cast(subprocess.Popen, self.process).pid
+
+    def node_status(self) -> t.Optional[t.Dict[str, t.Any]]:
+        """Get the fake node status, None if it does not answer."""
+        try:
+            return requests.get(f"{self.rpc_url}/status", timeout=1).json()["result"]
+        except (requests.RequestException, ValueError, KeyError):
+            return None
+
+    def wait_for_node(self, other_than: t.Optional[int] = None) -> float:
+        """
+        Wait until the node answers RPC.
+
+        :param other_than: pid of a node process to wait to be replaced.
+        :return: the monotonic time the node answered.
+        """
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            status = self.node_status()
+            if status is not None and status["node_info"]["other"]["pid"] != other_than:
+                return time.monotonic()
+            time.sleep(0.01)
+        raise TimeoutError(f"the node did not answer within {self.timeout}s")
+
+    def stdout_lines(self) -> int:
+        """Get the lines the manager read from the node so far."""
+        metrics = requests.get(f"{self.url}/metrics", timeout=10).text
+        for line in metrics.splitlines():
+            if line.startswith("tendermint_stdout_lines_total "):
+                return int(float(line.split()[1]))
+        raise KeyError("tendermint_stdout_lines_total")
+
+
+def bench_throughput(
+    workdir: Path,
+    mode: str,
+    rate: int,
+    args: argparse.Namespace,
+    extra: t.Optional[t.Dict[str, str]] = None,
+) -> t.Dict[str, t.Any]:
+    """Measure the lines read per second and the manager's resource usage."""
+    overrides = {"FAKE_TM_LOG_RATE": str(rate), **(extra or {})}
+    with Manager(workdir, mode, overrides, args.startup_timeout) as manager:
+        lines_before, usage_before = manager.stdout_lines(), proc_usage(manager.pid)
+        started = time.monotonic()
+        time.sleep(args.duration)
+        elapsed = time.monotonic() - started
+        lines_after, usage_after = manager.stdout_lines(), proc_usage(manager.pid)
+    return {
+        "offered_lines_per_second": rate,
+        "lines_per_second": round((lines_after - lines_before) / elapsed, 1),
+        "manager_cpu_percent": round(
+            100 * (usage_after["cpu_seconds"] - usage_before["cpu_seconds"]) / elapsed,
+            1,
+        ),
+        "manager_rss_bytes": usage_after["rss_bytes"],
+        "manager_peak_rss_bytes": usage_after["peak_rss_bytes"],
+    }
+
+
+def bench_resets(
+    workdir: Path, mode: str, args: argparse.Namespace
+) -> t.Dict[str, t.Any]:
+    """Measure the gentle and hard reset latency."""
+    report: t.Dict[str, t.Any] = {}
+    with Manager(workdir, mode, {}, args.startup_timeout) as manager:
+        for kind in ("gentle_reset", "hard_reset"):
+            calls, recoveries = [], []
+            for _ in range(args.iterations):
+                started = time.monotonic()
+                response = requests.get(f"{manager.url}/{kind}", timeout=120).json()
+                if not response["status"]:
+                    raise RuntimeError(f"{kind} failed: {response}")
+                calls.append(time.monotonic() - started)
+                recoveries.append(manager.wait_for_node() - started)
+            report[kind] = {
+                "call": summarize(calls),
+                "until_rpc": summarize(recoveries),
+            }
+    return report
+
+
+def bench_trigger(
+    workdir: Path, mode: str, args: argparse.Namespace
+) -> t.Dict[str, t.Any]:
+    """Measure the time from a trigger line to the restarted node answering."""
+    reactions = []
+    with Manager(workdir, mode, {}, args.startup_timeout) as manager:
+        for _ in range(args.iterations):
+            status = t.cast(t.Dict[str, t.Any], manager.node_status())
+            pid = status["node_info"]["other"]["pid"]
+            started = time.monotonic()
+            requests.get(
+                f"{manager.rpc_url}/_fake/emit",
+                params={"line": TRIGGER_LINE},
+                timeout=10,
+            )
+            reactions.append(manager.wait_for_node(other_than=pid) - started)
+    return summarize(reactions)
+
+
+def bench_abci(
+    workdir: Path, mode: str, args: argparse.Namespace
+) -> t.Dict[str, t.Any]:
+    """Check the ABCI flag the node gets, and time the startup per flag."""
+    report = {}
+    for use_grpc, expected in (("false", "socket"), ("true", "grpc")):
+        started = time.monotonic()
+        overrides = {"USE_GRPC": use_grpc}
+        with Manager(workdir, mode, overrides, args.startup_timeout) as manager:
+            elapsed = time.monotonic() - started
+            status = t.cast(t.Dict[str, t.Any], manager.node_status())
+        abci = status["node_info"]["other"]["abci"]
+        report[expected] = {
+            "abci": abci,
+            "ok": abci == expected,
+            "startup_ms": round(elapsed * 1000, 3),
+        }
+    return report
+
+
+def bench_disk(
+    workdir: Path, mode: str, args: argparse.Namespace
+) -> t.Dict[str, t.Any]:
+    """Let the data dir grow past the compaction threshold and watch it kept in check."""
+    overrides = {
+        "FAKE_TM_DATA_GROWTH": str(DISK_GROWTH_PER_BLOCK),
+        "TM_DISK_CHECK_INTERVAL": "0.5",
+        "TM_DISK_COMPACT_THRESHOLD": str(DISK_COMPACT_THRESHOLD),
+        "TM_DISK_COMPACT_COMMAND": "tendermint fake-compact",
+        "TM_DISK_MAINTENANCE_MIN_INTERVAL": "0",
+    }
+    sizes = []
+    with Manager(workdir, mode, overrides, args.startup_timeout) as manager:
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            latest = requests.get(f"{manager.url}/disk", timeout=10).json()["latest"]
+            if latest is not None:
+                sizes.append(latest["total_bytes"])
+            time.sleep(0.5)
+        status = requests.get(f"{manager.url}/disk", timeout=10).json()
+    maintenance = status["maintenance"]
+    return {
+        "compact_threshold_bytes": DISK_COMPACT_THRESHOLD,
+        "max_data_dir_bytes": max(sizes, default=0),
+        "compactions": status["counts"]["compact"],
+        "errors": [run["error"] for run in maintenance if run["error"]],
+        "maintenance": summarize([run["duration"] for run in maintenance]),
+    }
+
+
+def main() -> None:
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--modes", nargs="+", choices=MANAGER_MODES, default=["threaded"]
+    )
+    parser.add_argument(
+        "--log-rates", nargs="+", type=int, default=[1000, 10000, 50000]
+    )
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--output", type=Path, help="write the report to a file")
+    args = parser.parse_args()
+
+    if not sys.platform.startswith("linux"):
+        parser.error("the benchmark reads /proc and only runs on Linux")
+
+    report: t.Dict[str, t.Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "modes": {},
+    }
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            report["modes"][mode] = {
+                "throughput": [
+                    bench_throughput(workdir, mode, rate, args)
+                    for rate in args.log_rates
+                ],
+                "resets": bench_resets(workdir, mode, args),
+                "trigger_reaction": bench_trigger(workdir, mode, args),
+                "abci": bench_abci(workdir, mode, args),
+                "disk": bench_disk(workdir, mode, args),
+                # the same load as the highest throughput run, parsing the lines
+                "consensus_analytics": bench_throughput(
+                    workdir,
+                    mode,
+                    max(args.log_rates),
+                    args,
+                    {"TM_CONSENSUS_ANALYTICS": "true"},
+                ),
+            }
+
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2026 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""
+Load benchmark of the tendermint manager's serving modes.
+
+Starts `operate/tendermint.py` once per serving mode in a temporary home and
+polls its API from concurrent clients, the way the agent and the middleware
+do. The endpoints measured read local files only, so by default the manager
+runs a minimal stand-in `tendermint` that writes the home files and idles as
+the node; `--tendermint` runs a real binary instead.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+
+ROOT = Path(__file__).resolve().parent.parent
+MANAGER = ROOT / "operate" / "tendermint.py"
+MODES = ("development", "production")
+
+STAND_IN = """#!{python}
+import base64, json, os, signal, sys
+from pathlib import Path
+
+args = sys.argv[1:]
+home = Path(args[args.index("--home") + 1] if "--home" in args else os.environ["TMHOME"])
+if args[0] == "init":
+    (home / "config").mkdir(parents=True, exist_ok=True)
+    (home / "data").mkdir(parents=True, exist_ok=True)
+    priv = {{"type": "tendermint/PrivKeyEd25519", "value": base64.b64encode(bytes(range(64))).decode()}}
+    pub = {{"type": "tendermint/PubKeyEd25519", "value": base64.b64encode(bytes(range(32, 64))).decode()}}
+    files = {{
+        "config/config.toml": "",
+        "config/node_key.json": {{"priv_key": priv}},
+        "config/priv_validator_key.json": {{"address": "00" * 20, "pub_key": pub, "priv_key": priv}},
+        "config/genesis.json": {{"genesis_time": "2026-01-01T00:00:00Z", "chain_id": "bench", "validators": []}},
+        "data/priv_validator_state.json": {{"height": "0", "round": 0, "step": 0}},
+    }}
+    for name, content in files.items():
+        if not (home / name).exists():
+            (home / name).write_text(content if isinstance(content, str) else json.dumps(content))
+elif args[0] == "node":
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.pause()
+"""
+
+
+def write_stand_in(directory: Path) -> None:
+    """Write the stand-in `tendermint` executable into `directory`."""
+    path = directory / "tendermint"
+    path.write_text(STAND_IN.format(python=sys.executable), encoding="utf-8")
+    path.chmod(0o755)
+
+
+def manager_env(home: Path, port: int, mode: str, stand_in: bool) -> t.Dict[str, str]:
+    """Environment of a manager running in a temporary home."""
+    env = dict(os.environ)
+    if stand_in:
+        env["PATH"] = os.pathsep.join([str(home), env.get("PATH", "")])
+    env.update(
+        {
+            "TMHOME": str(home / "node"),
+            "TMSTATE": str(home / "state"),
+            "ID": "0",
+            "PROXY_APP": "tcp://127.0.0.1:36658",
+            "P2P_LADDR": "tcp://0.0.0.0:36656",
+            "RPC_LADDR": "tcp://0.0.0.0:36657",
+            "CREATE_EMPTY_BLOCKS": "true",
+            "USE_GRPC": "false",
+            "LOG_FILE": str(home / "tendermint.log"),
+            "TM_SERVER_MODE": mode,
+            "TM_SERVER_PORT": str(port),
+        }
+    )
+    return env
+
+
+def wait_until_up(url: str, timeout: float) -> None:
+    """Wait for the manager to answer."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{url}/params", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} did not come up within {timeout}s")
+
+
+def load(url: str, path: str, clients: int, duration: float) -> t.Dict[str, t.Any]:
+    """Poll `path` from `clients` threads for `duration` seconds."""
+    deadline = time.monotonic() + duration
+
+    def client() -> t.Tuple[t.List[float], int]:
+        latencies, errors = [], 0
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    session.get(f"{url}{path}", timeout=10).raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except requests.RequestException:
+                    errors += 1
+        return latencies, errors
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(executor.map(lambda _: client(), range(clients)))
+    latencies = sorted(latency for result, _ in results for latency in result)
+    errors = sum(error for _, error in results)
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / duration, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def bench_mode(mode: str, args: argparse.Namespace) -> t.Dict[str, t.Any]:
+    """Benchmark a serving mode."""
+    url = f"http://localhost:{args.port}"
+    with tempfile.TemporaryDirectory() as home:
+        if not args.tendermint:
+            write_stand_in(Path(home))
+        process = subprocess.Popen(  # nosec # pylint: disable=consider-using-with
+            [sys.executable, str(MANAGER)],
+            cwd=home,
+            env=manager_env(Path(home), args.port, mode, not args.tendermint),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_up(url, args.startup_timeout)
+            return {
+                path: load(url, path, args.clients, args.duration)
+                for path in args.paths
+            }
+        finally:
+            try:
+                requests.get(f"{url}/exit", timeout=10)
+                process.wait(timeout=15)
+            except (requests.RequestException, subprocess.TimeoutExpired):
+                process.kill()
+                process.wait()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--paths", nargs="+", default=["/params", "/metrics"])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=38080)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument(
+        "--tendermint",
+        action="store_true",
+        help="run the `tendermint` binary on the PATH instead of the stand-in",
+    )
+    args = parser.parse_args()
+
+    report = {mode: bench_mode(mode, args) for mode in args.modes}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
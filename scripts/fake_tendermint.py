@@ -0,0 +1,765 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2026 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""
+Stand-in `tendermint` executable for benchmarking the Tendermint manager.
+
+It understands the `init`, `node`, `unsafe-reset-all`, `fake-compact` and
+`version` commands, serves enough of the `/status`, `/block` and `/blockchain` RPC for
+the manager, and writes scripted log lines at a configurable rate. Behaviour
+is controlled through environment variables:
+
+- FAKE_TM_BLOCK_INTERVAL: seconds between blocks (default 1.0).
+- FAKE_TM_LOG_RATE: filler log lines per second (default 0).
+- FAKE_TM_STALL_AFTER: stop producing blocks after this height (default never).
+- FAKE_TM_STARTUP_DELAY: seconds before the RPC server starts (default 0).
+- FAKE_TM_DATA_GROWTH: bytes appended to a synthetic `blockstore.db` per block
+  (default 0), which `fake-compact` shrinks to a quarter. Tendermint has no
+  such command, it stands in for the one set with `TM_DISK_COMPACT_COMMAND`.
+
+`GET /_fake/emit?line=...` prints an arbitrary line, which is used to
+measure the reaction time of restart triggers.
+
+When an ABCI app listens on `--proxy_app`, `node` replays the stored blocks to
+it before serving RPC, like Tendermint's handshake: it panics when a commit
+returns an app hash other than the next stored block's, skipping the check
+for empty hashes, or when the last one differs from the stored state. Without
+an app the blocks are produced as before.
+"""
+
+# pylint: disable=too-many-locals
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+# the `Request` oneof fields, the `Response` ones are one more
+ABCI_INFO = 3
+ABCI_INIT_CHAIN = 5
+ABCI_BEGIN_BLOCK = 7
+ABCI_END_BLOCK = 10
+ABCI_COMMIT = 11
+ABCI_EXCEPTION = 1
+
+CONFIG_TOML = """# This is a TOML config file.
+# For more information, see https://github.com/toml-lang/toml
+
+#######################################################################
+###                   Main Base Config Options                      ###
+#######################################################################
+
+# TCP or UNIX socket address of the ABCI application,
+# or the name of an ABCI application compiled in with the Tendermint binary
+proxy_app = "tcp://127.0.0.1:26658"
+
+# A custom human readable name for this node
+moniker = "fake"
+
+# If this node is many blocks behind the tip of the chain, FastSync
+# allows them to catchup quickly by downloading blocks in parallel
+# and verifying their commits
+fast_sync = true
+
+# Database backend: goleveldb | cleveldb | boltdb | rocksdb | badgerdb
+db_backend = "goleveldb"
+
+# Database directory
+db_dir = "data"
+
+# Output level for logging, including package level options
+log_level = "info"
+
+# Output format: 'plain' (colored text) or 'json'
+log_format = "plain"
+
+genesis_file = "config/genesis.json"
+priv_validator_key_file = "config/priv_validator_key.json"
+priv_validator_state_file = "data/priv_validator_state.json"
+node_key_file = "config/node_key.json"
+
+#######################################################################
+###                 Advanced Configuration Options                  ###
+#######################################################################
+
+#######################################################
+###       RPC Server Configuration Options          ###
+#######################################################
+[rpc]
+
+# TCP or UNIX socket address for the RPC server to listen on
+laddr = "tcp://127.0.0.1:26657"
+
+cors_allowed_origins = []
+max_open_connections = 900
+timeout_broadcast_tx_commit = "10s"
+
+#######################################################
+###           P2P Configuration Options             ###
+#######################################################
+[p2p]
+
+# Address to listen for incoming connections
+laddr = "tcp://0.0.0.0:26656"
+
+# Address to advertise to peers for them to dial
+external_address = ""
+
+# Comma separated list of seed nodes to connect to
+seeds = ""
+
+# Comma separated list of nodes to keep persistent connections to
+persistent_peers = ""
+
+# Maximum number of inbound peers
+max_num_inbound_peers = 40
+
+# Maximum number of outbound peers to connect to, excluding persistent peers
+max_num_outbound_peers = 10
+
+# Time to wait before flushing messages out on the connection
+flush_throttle_timeout = "100ms"
+
+# Maximum size of a message packet payload, in bytes
+max_packet_msg_payload_size = 1024
+
+# Rate at which packets can be sent, in bytes/second
+send_rate = 5120000
+
+# Rate at which packets can be received, in bytes/second
+recv_rate = 5120000
+
+# Set true to enable the peer-exchange reactor
+pex = true
+
+#######################################################
+###          Mempool Configuration Option          ###
+#######################################################
+[mempool]
+
+recheck = true
+broadcast = true
+size = 5000
+max_txs_bytes = 1073741824
+cache_size = 10000
+
+#######################################################
+###         Consensus Configuration Options         ###
+#######################################################
+[consensus]
+
+wal_file = "data/cs.wal/wal"
+
+timeout_propose = "3s"
+timeout_propose_delta = "500ms"
+timeout_prevote = "1s"
+timeout_prevote_delta = "500ms"
+timeout_precommit = "1s"
+timeout_precommit_delta = "500ms"
+timeout_commit = "1s"
+
+skip_timeout_commit = false
+
+create_empty_blocks = true
+create_empty_blocks_interval = "0s"
+
+peer_gossip_sleep_duration = "100ms"
+peer_query_maj23_sleep_duration = "2s"
+
+#######################################################
+###   Transaction Indexer Configuration Options     ###
+#######################################################
+[tx_index]
+
+indexer = "kv"
+
+#######################################################
+###       Instrumentation Configuration Options     ###
+#######################################################
+[instrumentation]
+
+prometheus = false
+"""
+
+
+def _log_line(level: str, message: str, **fields: Any) -> str:
+    """Format a line like Tendermint's plain logger."""
+    now = datetime.now(timezone.utc)
+    stamp = now.strftime("%Y-%m-%d|%H:%M:%S.") + f"{now.microsecond // 1000:03d}"
+    pairs = " ".join(f"{key}={value}" for key, value in fields.items())
+    return f"{level}[{stamp}] {message:<44} {pairs}\n"
+
+
+def _key_pair(home: Path, name: str) -> Dict[str, Any]:
+    """Derive a deterministic fake ed25519 key pair for a home."""
+    seed = hashlib.sha256(f"{home}:{name}".encode()).digest()
+    pub = hashlib.sha256(seed).digest()
+    return {
+        "address": hashlib.sha256(pub).hexdigest()[:40].upper(),
+        "pub_key": {
+            "type": "tendermint/PubKeyEd25519",
+            "value": base64.b64encode(pub).decode(),
+        },
+        "priv_key": {
+            "type": "tendermint/PrivKeyEd25519",
+            "value": base64.b64encode(seed + pub).decode(),
+        },
+    }
+
+
+def _write_priv_validator_state(data_dir: Path) -> None:
+    """Write a fresh validator state."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    (data_dir / "priv_validator_state.json").write_text(
+        json.dumps({"height": "0", "round": 0, "step": 0}, indent=2)
+    )
+
+
+def _uvarint(value: int) -> bytes:
+    """Encode an unsigned varint."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _field(number: int, value: Any) -> bytes:
+    """Encode a protobuf field, a varint for ints and length-delimited otherwise."""
+    if isinstance(value, int):
+        return _uvarint(number << 3) + _uvarint(value)
+    return _uvarint(number << 3 | 2) + _uvarint(len(value)) + value
+
+
+def _read_uvarint(data: bytes, pos: int) -> Any:
+    """Decode an unsigned varint at `pos`, returning it and the next position."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def _fields(data: bytes) -> Dict[int, Any]:
+    """Decode the fields of a protobuf message, the last one wins."""
+    fields: Dict[int, Any] = {}
+    pos = 0
+    while pos < len(data):
+        key, pos = _read_uvarint(data, pos)
+        wire_type = key & 7
+        if wire_type == 0:
+            value, pos = _read_uvarint(data, pos)
+        elif wire_type == 2:
+            length, pos = _read_uvarint(data, pos)
+            value, pos = data[pos : pos + length], pos + length
+        else:
+            size = 8 if wire_type == 1 else 4
+            value, pos = data[pos : pos + size], pos + size
+        fields[key >> 3] = value
+    return fields
+
+
+def _read_message(stream: BinaryIO) -> bytes:
+    """Read a length-delimited message from a stream."""
+    length = shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            raise EOFError("ABCI connection closed")
+        length |= (byte[0] & 0x7F) << shift
+        shift += 7
+        if not byte[0] & 0x80:
+            return stream.read(length)
+
+
+class AbciClient:
+    """A blocking client of the ABCI socket protocol."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        """Initialize the client on a connected socket."""
+        self.sock = sock
+        self.stream = sock.makefile("rb")
+
+    def request(self, kind: int, payload: bytes = b"") -> Dict[int, Any]:
+        """Send a request and get the fields of its response."""
+        message = _field(kind, payload)
+        self.sock.sendall(_uvarint(len(message)) + message)
+        response = _fields(_read_message(self.stream))
+        if ABCI_EXCEPTION in response:
+            raise RuntimeError(_fields(response[ABCI_EXCEPTION]).get(1, b"").decode())
+        return _fields(response[kind + 1])
+
+
+def cmd_init(home: Path) -> int:
+    """Initialise a home directory."""
+    config = home / "config"
+    config.mkdir(parents=True, exist_ok=True)
+    if not (config / "config.toml").exists():
+        (config / "config.toml").write_text(CONFIG_TOML)
+    if not (config / "priv_validator_key.json").exists():
+        (config / "priv_validator_key.json").write_text(
+            json.dumps(_key_pair(home, "validator"), indent=2)
+        )
+    if not (config / "node_key.json").exists():
+        key = _key_pair(home, "node")
+        (config / "node_key.json").write_text(
+            json.dumps({"priv_key": key["priv_key"]}, indent=2)
+        )
+    if not (config / "genesis.json").exists():
+        validator = _key_pair(home, "validator")
+        genesis = {
+            "genesis_time": "2026-01-01T00:00:00.000000Z",
+            "chain_id": "fake-chain",
+            "initial_height": "1",
+            "consensus_params": {"block": {"max_bytes": "22020096"}},
+            "validators": [
+                {
+                    "address": validator["address"],
+                    "pub_key": validator["pub_key"],
+                    "power": "10",
+                    "name": "",
+                }
+            ],
+            "app_hash": "",
+        }
+        (config / "genesis.json").write_text(json.dumps(genesis, indent=2))
+    if not (home / "data" / "priv_validator_state.json").exists():
+        _write_priv_validator_state(home / "data")
+    return 0
+
+
+def cmd_unsafe_reset_all(home: Path) -> int:
+    """Remove the data directory."""
+    data = home / "data"
+    for path in sorted(data.rglob("*"), reverse=True) if data.exists() else []:
+        if path.is_dir():
+            path.rmdir()
+        else:
+            path.unlink()
+    (home / "config" / "addrbook.json").unlink(missing_ok=True)
+    _write_priv_validator_state(data)
+    return 0
+
+
+def cmd_compact(home: Path) -> int:
+    """Compact the synthetic stores, every `*.db` dir to a quarter of its size."""
+    for store in (home / "data").glob("*.db"):
+        files = [path for path in store.iterdir() if path.is_file()]
+        size = sum(path.stat().st_size for path in files)
+        for path in files:
+            path.unlink()
+        (store / "000002.ldb").write_bytes(b"\0" * (size // 4))
+    return 0
+
+
+class FakeChain:  # pylint: disable=too-many-instance-attributes
+    """Block production and log output of the fake node."""
+
+    def __init__(self, home: Path, args: argparse.Namespace) -> None:
+        """Initialize the chain."""
+        self.home = home
+        self.args = args
+        genesis = json.loads((home / "config" / "genesis.json").read_text())
+        self.chain_id = genesis.get("chain_id", "fake-chain")
+        self.initial_height = max(1, int(genesis.get("initial_height") or 1))
+        self.blocks_file = home / "data" / "fake_blocks.jsonl"
+        self.blocks: List[Dict[str, Any]] = []
+        if self.blocks_file.exists():
+            for line in self.blocks_file.read_text().splitlines():
+                self.blocks.append(json.loads(line))
+        self.block_interval = float(os.environ.get("FAKE_TM_BLOCK_INTERVAL", "1.0"))
+        self.log_rate = float(os.environ.get("FAKE_TM_LOG_RATE", "0"))
+        self.data_growth = int(os.environ.get("FAKE_TM_DATA_GROWTH", "0"))
+        stall = os.environ.get("FAKE_TM_STALL_AFTER", "")
+        self.stall_after: Optional[int] = int(stall) if stall else None
+        self.started = time.time()
+        self.stop_event = threading.Event()
+        self.write_lock = threading.Lock()
+        node_key = json.loads((home / "config" / "node_key.json").read_text())
+        self.node_id = hashlib.sha256(
+            base64.b64decode(node_key["priv_key"]["value"])[32:]
+        ).hexdigest()[:40]
+
+    @property
+    def height(self) -> int:
+        """Get the latest height."""
+        return self.blocks[-1]["height"] if self.blocks else 0
+
+    def handshake(self, proxy_app: str) -> Optional[str]:
+        """Replay the stored blocks to the app, returning why it failed."""
+        host, port = proxy_app.replace("tcp://", "").rsplit(":", 1)
+        try:
+            sock = socket.create_connection((host, int(port)), timeout=1)
+        except OSError:
+            return None
+        sock.settimeout(None)
+        with sock:
+            client = AbciClient(sock)
+            info = client.request(ABCI_INFO)
+            app_height = info.get(4, 0)
+            self.emit(
+                _log_line(
+                    "I",
+                    "ABCI Handshake App Info",
+                    module="consensus",
+                    height=app_height,
+                )
+            )
+            if app_height == 0:
+                client.request(
+                    ABCI_INIT_CHAIN,
+                    _field(2, self.chain_id.encode()) + _field(6, self.initial_height),
+                )
+            app_hash = info.get(5, b"")
+            for block in self.blocks:
+                height = block["height"]
+                if height <= app_height:
+                    continue
+                expected = bytes.fromhex(block["app_hash"])
+                if app_hash and app_hash != expected:
+                    return (
+                        "block.AppHash does not match AppHash after replay. Got "
+                        f"{app_hash.hex().upper()}, expected {expected.hex().upper()}."
+                    )
+                self.emit(
+                    _log_line("I", "Applying block", module="consensus", height=height)
+                )
+                header = (
+                    _field(2, self.chain_id.encode())
+                    + _field(3, height)
+                    + _field(11, expected)
+                )
+                client.request(ABCI_BEGIN_BLOCK, _field(2, header))
+                client.request(ABCI_END_BLOCK, _field(1, height))
+                app_hash = client.request(ABCI_COMMIT).get(2, b"")
+            state_hash = bytes.fromhex(
+                self.blocks[-1]["next_app_hash"] if self.blocks else ""
+            )
+            if app_hash != state_hash:
+                return (
+                    "state.AppHash does not match AppHash after replay. Got\n"
+                    f"{app_hash.hex().upper()}, expected {state_hash.hex().upper()}."
+                )
+        self.emit(
+            _log_line(
+                "I",
+                "Completed ABCI Handshake - Tendermint and App are synced",
+                module="consensus",
+                appHeight=self.height,
+                appHash=app_hash.hex().upper(),
+            )
+        )
+        return None
+
+    def emit(self, line: str) -> None:
+        """Write a line to stdout."""
+        with self.write_lock:
+            sys.stdout.write(line if line.endswith("\n") else line + "\n")
+            sys.stdout.flush()
+
+    def produce(self) -> None:
+        """Produce blocks until stopped."""
+        self.blocks_file.parent.mkdir(parents=True, exist_ok=True)
+        while not self.stop_event.wait(self.block_interval):
+            if self.stall_after is not None and self.height >= self.stall_after:
+                continue
+            height = max(self.height + 1, self.initial_height)
+            previous = self.blocks[-1]["next_app_hash"] if self.blocks else ""
+            app_hash = hashlib.sha256(f"{previous}{height}".encode()).hexdigest()
+            block = {
+                "height": height,
+                "time": datetime.now(timezone.utc).isoformat(),
+                "app_hash": previous.upper(),
+                "next_app_hash": app_hash.upper(),
+            }
+            self.blocks.append(block)
+            with open(self.blocks_file, "a", encoding="utf-8") as file:
+                file.write(json.dumps(block) + "\n")
+            if self.data_growth:
+                store = self.home / "data" / "blockstore.db"
+                store.mkdir(exist_ok=True)
+                with open(store / "000001.log", "ab") as file:
+                    file.write(b"\0" * self.data_growth)
+            for step in ("new round", "propose step"):
+                self.emit(self._step_line(step, height))
+            self.emit(
+                _log_line(
+                    "I",
+                    "received proposal",
+                    module="consensus",
+                    proposal=f'"Proposal{{{height}/0 (0:1:0, -1) 0 @ {block["time"]}}}"',
+                )
+            )
+            for step in ("prevote step", "precommit step", "commit step"):
+                self.emit(self._step_line(step, height))
+            self.emit(
+                _log_line(
+                    "I",
+                    "finalizing commit of block",
+                    module="consensus",
+                    height=height,
+                    hash=hashlib.sha256(str(height).encode()).hexdigest()[:40].upper(),
+                    root=block["app_hash"],
+                    num_txs=0,
+                )
+            )
+            self.emit(
+                _log_line(
+                    "I",
+                    "committed state",
+                    module="state",
+                    height=height,
+                    num_txs=0,
+                    app_hash=block["next_app_hash"],
+                )
+            )
+
+    @staticmethod
+    def _step_line(step: str, height: int) -> str:
+        """Format the debug line of a consensus step transition."""
+        return _log_line(
+            "D", f"entering {step}", module="consensus", height=height, round=0
+        )
+
+    def chatter(self) -> None:
+        """Write filler lines at the configured rate."""
+        if self.log_rate <= 0:
+            return
+        batch = max(1, int(self.log_rate / 100))
+        period = batch / self.log_rate
+        sent = 0
+        start = time.monotonic()
+        while not self.stop_event.is_set():
+            for _ in range(batch):
+                self.emit(
+                    _log_line(
+                        "D",
+                        "Receive",
+                        module="p2p",
+                        src="Peer{MConn{127.0.0.1:26656} out}",
+                        seq=sent,
+                    )
+                )
+                sent += 1
+            delay = start + (sent // batch) * period - time.monotonic()
+            if delay > 0:
+                self.stop_event.wait(delay)
+
+    def block_json(self, height: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Get a block in RPC format."""
+        if not self.blocks:
+            return None
+        if height is None:
+            block = self.blocks[-1]
+        else:
+            index = height - self.blocks[0]["height"]
+            if index < 0 or index >= len(self.blocks):
+                return None
+            block = self.blocks[index]
+        return {
+            "header": {
+                "chain_id": self.chain_id,
+                "height": str(block["height"]),
+                "time": block["time"],
+                "app_hash": block["app_hash"],
+            }
+        }
+
+
+def make_handler(chain: FakeChain) -> Any:
+    """Create the RPC request handler."""
+
+    class Handler(BaseHTTPRequestHandler):
+        """RPC request handler."""
+
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: Any) -> None:  # pylint: disable=arguments-differ
+            """Silence the default access log."""
+
+        def _reply(self, payload: Dict[str, Any], status: int = 200) -> None:
+            """Send a JSON-RPC response."""
+            body = json.dumps({"jsonrpc": "2.0", "id": -1, **payload}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            """Handle a GET request."""
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            if url.path == "/status":
+                latest = chain.blocks[-1] if chain.blocks else None
+                self._reply(
+                    {
+                        "result": {
+                            "node_info": {
+                                "id": chain.node_id,
+                                "network": chain.chain_id,
+                                "other": {
+                                    "abci": chain.args.abci,
+                                    "pid": os.getpid(),
+                                    "started": chain.started,
+                                },
+                            },
+                            "sync_info": {
+                                "latest_block_height": str(chain.height),
+                                "latest_block_time": (latest["time"] if latest else ""),
+                                "latest_app_hash": (
+                                    latest["next_app_hash"] if latest else ""
+                                ),
+                                "catching_up": False,
+                            },
+                        }
+                    }
+                )
+            elif url.path == "/block":
+                height = query.get("height")
+                block = chain.block_json(int(height) if height else None)
+                if block is None:
+                    self._reply(
+                        {"error": {"code": -32603, "data": "height not available"}},
+                        500,
+                    )
+                else:
+                    self._reply({"result": {"block": block}})
+            elif url.path == "/blockchain":
+                low = int(query.get("minHeight", "1"))
+                high = int(query.get("maxHeight", str(chain.height)))
+                high = min(high, chain.height, low + 19)
+                metas = []
+                for height in range(high, low - 1, -1):
+                    block = chain.block_json(height)
+                    if block is not None:
+                        metas.append({"header": block["header"]})
+                self._reply(
+                    {
+                        "result": {
+                            "last_height": str(chain.height),
+                            "block_metas": metas,
+                        }
+                    }
+                )
+            elif url.path == "/_fake/emit":
+                chain.emit(query.get("line", ""))
+                self._reply({"result": {}})
+            else:
+                self._reply({"error": {"code": -32601, "data": url.path}}, 404)
+
+    return Handler
+
+
+def cmd_node(home: Path, args: argparse.Namespace) -> int:
+    """Run the fake node."""
+    chain = FakeChain(home, args)
+
+    def _shutdown(*_: Any) -> None:
+        chain.stop_event.set()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    chain.emit(
+        _log_line(
+            "I",
+            "starting node",
+            module="main",
+            abci=args.abci,
+            proxy_app=args.proxy_app,
+        )
+    )
+    delay = float(os.environ.get("FAKE_TM_STARTUP_DELAY", "0"))
+    if delay and chain.stop_event.wait(delay):
+        return 0
+    failure = chain.handshake(args.proxy_app)
+    if failure is not None:
+        sys.stderr.write(f"panic: {failure}\n")
+        return 2
+    host, port = args.rpc_laddr.replace("tcp://", "").rsplit(":", 1)
+    server = ThreadingHTTPServer((host, int(port)), make_handler(chain))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    chain.emit(
+        _log_line("I", "Starting RPC HTTP server", module="rpc-server", laddr=port)
+    )
+    threading.Thread(target=chain.produce, daemon=True).start()
+    threading.Thread(target=chain.chatter, daemon=True).start()
+    chain.stop_event.wait()
+    server.shutdown()
+    chain.emit(_log_line("I", "RPC HTTP server stopped", module="rpc-server"))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the fake tendermint command."""
+    parser = argparse.ArgumentParser(prog="tendermint")
+    parser.add_argument("--home", default=os.environ.get("TMHOME", "."))
+    parser.add_argument("command")
+    parser.add_argument("--proxy_app", default="tcp://127.0.0.1:26658")
+    parser.add_argument(
+        "--rpc.laddr", dest="rpc_laddr", default="tcp://127.0.0.1:26657"
+    )
+    parser.add_argument("--p2p.laddr", dest="p2p_laddr", default="")
+    parser.add_argument("--p2p.seeds", dest="p2p_seeds", default="")
+    parser.add_argument(
+        "--p2p.persistent_peers", dest="p2p_persistent_peers", default=""
+    )
+    parser.add_argument(
+        "--consensus.create_empty_blocks", dest="create_empty_blocks", default="true"
+    )
+    parser.add_argument("--abci", default="socket")
+    parser.add_argument("--log_level", default="info")
+    args = parser.parse_args(argv)
+    home = Path(args.home)
+    if args.command == "init":
+        return cmd_init(home)
+    if args.command == "unsafe-reset-all":
+        return cmd_unsafe_reset_all(home)
+    if args.command == "node":
+        return cmd_node(home, args)
+    if args.command == "fake-compact":
+        return cmd_compact(home)
+    if args.command == "version":
+        print("0.34.19-fake")
+        return 0
+    print(f"unknown command {args.command}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2026 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""
+Offline replay of a period dump of the tendermint manager.
+
+In dev mode `PeriodDumper` keeps the node home of every period, as
+`period_N/nodeX`, or `period_N/nodeX.tar.<compression>` in archive mode. This
+boots a `tendermint` node from such a dump against a stand-in ABCI app, so the
+node replays its stored blocks through the ABCI handshake as fast as it can,
+without network or the agent, and reports:
+
+- blocks per second and the per-block apply latency, from `BeginBlock` to the
+  `Commit` answer, as seen by the app;
+- the time until the node answers RPC, the handshake included;
+- whether the final app hash agrees with the state stored in the dump.
+
+Tendermint checks every replayed app hash against the next stored block, so
+the stand-in has to answer the recorded hashes. A first pass answers empty
+ones, which Tendermint does not check, to learn them from the block headers,
+and the last one from the panic closing the handshake. The measured passes
+then answer them and boot the node. `scripts/fake_tendermint.py` can stand in
+for `tendermint`, it replays its own block store the same way.
+"""
+
+import argparse
+import json
+import re
+import shutil
+import socket
+import socketserver
+import statistics
+import subprocess  # nosec
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+import requests
+
+
+# the `Request` oneof fields, the `Response` ones are one more
+ABCI_ECHO = 1
+ABCI_BEGIN_BLOCK = 7
+ABCI_COMMIT = 11
+STATE_HASH_PANIC = re.compile(
+    r"state\.AppHash does not match AppHash after replay\. Got\s*([0-9A-F]*), "
+    r"expected ([0-9A-F]*)"
+)
+
+
+def _uvarint(value: int) -> bytes:
+    """Encode an unsigned varint."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _field(number: int, value: t.Any) -> bytes:
+    """Encode a protobuf field, a varint for ints and length-delimited otherwise."""
+    if isinstance(value, int):
+        return _uvarint(number << 3) + _uvarint(value)
+    return _uvarint(number << 3 | 2) + _uvarint(len(value)) + value
+
+
+def _read_uvarint(data: bytes, pos: int) -> t.Tuple[int, int]:
+    """Decode an unsigned varint at `pos`, returning it and the next position."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def _fields(data: bytes) -> t.Dict[int, t.Any]:
+    """Decode the fields of a protobuf message, the last one wins."""
+    fields: t.Dict[int, t.Any] = {}
+    pos = 0
+    while pos < len(data):
+        key, pos = _read_uvarint(data, pos)
+        wire_type = key & 7
+        value: t.Any
+        if wire_type == 0:
+            value, pos = _read_uvarint(data, pos)
+        elif wire_type == 2:
+            length, pos = _read_uvarint(data, pos)
+            value, pos = data[pos : pos + length], pos + length
+        else:
+            size = 8 if wire_type == 1 else 4
+            value, pos = data[pos : pos + size], pos + size
+        fields[key >> 3] = value
+    return fields
+
+
+def _read_message(stream: t.BinaryIO) -> bytes:
+    """Read a length-delimited message from a stream."""
+    length = shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            raise EOFError("ABCI connection closed")
+        length |= (byte[0] & 0x7F) << shift
+        shift += 7
+        if not byte[0] & 0x80:
+            return stream.read(length)
+
+
+def free_port() -> int:
+    """Get a free local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def summarize(samples: t.List[float]) -> t.Dict[str, float]:
+    """Summarize latencies in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p99_ms": round(ordered[max(0, int(len(ordered) * 0.99) - 1)] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+class StandInApp:
+    """ABCI app answering the recorded app hashes and timing every block."""
+
+    def __init__(self, app_hashes: t.Dict[int, bytes]) -> None:
+        """
+        Initialize the app.
+
+        :param app_hashes: the app hash to answer on the commit of every height.
+        """
+        self.app_hashes = app_hashes
+        self.header_hashes: t.Dict[int, bytes] = {}
+        self.blocks: t.Dict[int, t.Tuple[float, float]] = {}
+        self.last_hash = b""
+        self._height = 0
+        self._began = 0.0
+        self._lock = threading.Lock()
+
+    def handle(self, kind: int, request: bytes) -> bytes:
+        """Answer a request, returning the payload of the response."""
+        if kind == ABCI_ECHO:
+            return _field(1, _fields(request).get(1, b""))
+        if kind == ABCI_BEGIN_BLOCK:
+            header = _fields(_fields(request).get(2, b""))
+            with self._lock:
+                self._height = header.get(3, 0)
+                self.header_hashes[self._height] = header.get(11, b"")
+                self._began = time.perf_counter()
+            return b""
+        if kind == ABCI_COMMIT:
+            with self._lock:
+                self.blocks[self._height] = (self._began, time.perf_counter())
+                self.last_hash = self.app_hashes.get(self._height, b"")
+            return _field(2, self.last_hash) if self.last_hash else b""
+        return b""
+
+    def learned_hashes(self, final: bytes) -> t.Dict[int, bytes]:
+        """Get the app hash after every replayed height, the last one is `final`."""
+        hashes = {
+            height - 1: value
+            for height, value in self.header_hashes.items()
+            if height - 1 in self.header_hashes
+        }
+        if self.header_hashes:
+            hashes[max(self.header_hashes)] = final
+        return hashes
+
+
+class AbciHandler(socketserver.StreamRequestHandler):
+    """A connection of the node to the stand-in app."""
+
+    def handle(self) -> None:
+        """Answer the requests of the connection until it closes."""
+        app = t.cast(t.Any, self.server).app
+        while True:
+            try:
+                request = _fields(_read_message(self.rfile))
+            except (EOFError, OSError):
+                return
+            for kind, payload in request.items():
+                response = _field(kind + 1, app.handle(kind, payload))
+                self.wfile.write(_uvarint(len(response)) + response)
+
+
+def restore(dump: Path, target: Path) -> Path:
+    """Restore a dumped home, a directory or an archive, into `target`."""
+    if dump.is_dir():
+        # snapshot dumps hardlink read-only objects, the node needs its own copy
+        shutil.copytree(dump, target, copy_function=shutil.copyfile)
+        return target
+    extracted = target.with_name(f"{target.name}.extracted")
+    with tarfile.open(dump) as tar:
+        tar.extractall(extracted, filter="data")
+    (root,) = list(extracted.iterdir())
+    root.rename(target)
+    extracted.rmdir()
+    return target
+
+
+def run_node(
+    dump: Path,
+    app_hashes: t.Dict[int, bytes],
+    workdir: Path,
+    args: argparse.Namespace,
+) -> t.Dict[str, t.Any]:
+    """Boot a node from a fresh copy of the dump, until it answers RPC or exits."""
+    home = restore(dump, workdir / "home")
+    app = StandInApp(app_hashes)
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), AbciHandler)
+    server.daemon_threads = True
+    t.cast(t.Any, server).app = app
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    rpc_url = f"http://127.0.0.1:{free_port()}"
+    cmd = [
+        args.tendermint,
+        "node",
+        "--home",
+        str(home),
+        f"--proxy_app=tcp://127.0.0.1:{server.server_address[1]}",
+        f"--rpc.laddr={rpc_url.replace('http', 'tcp')}",
+        f"--p2p.laddr=tcp://127.0.0.1:{free_port()}",
+        "--p2p.seeds=",
+        "--p2p.persistent_peers=",
+    ]
+    log_path = workdir / "node.log"
+    status = None
+    started = time.monotonic()
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(  # nosec # pylint: disable=consider-using-with
+            cmd, stdout=log, stderr=subprocess.STDOUT
+        )
+    try:
+        deadline = started + args.timeout
+        while time.monotonic() < deadline and process.poll() is None:
+            try:
+                status = requests.get(f"{rpc_url}/status", timeout=1).json()["result"]
+                break
+            except (requests.RequestException, ValueError, KeyError):
+                time.sleep(0.05)
+        elapsed = time.monotonic() - started
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        server.shutdown()
+        server.server_close()
+    return {
+        "app": app,
+        "status": status,
+        "elapsed": elapsed,
+        "until_rpc": elapsed if status is not None else None,
+        "output": log_path.read_text(encoding="utf-8", errors="replace"),
+    }
+
+
+def report_run(run: t.Dict[str, t.Any], final: bytes, last: int) -> t.Dict[str, t.Any]:
+    """Report the replay speed and the app hash agreement of a measured run."""
+    app: StandInApp = run["app"]
+    # the node may commit new blocks once it booted, only the replay counts
+    blocks = [span for height, span in sorted(app.blocks.items()) if height <= last]
+    elapsed = blocks[-1][1] - blocks[0][0] if blocks else 0.0
+    node_hash = None
+    if run["status"] is not None:
+        node_hash = run["status"]["sync_info"]["latest_app_hash"]
+    report = {
+        "booted": run["status"] is not None,
+        "blocks": len(blocks),
+        "replay_seconds": round(elapsed, 6),
+        "blocks_per_second": round(len(blocks) / elapsed, 1) if elapsed else None,
+        "apply": summarize([end - begin for begin, end in blocks]),
+        "until_rpc_seconds": (
+            None if run["until_rpc"] is None else round(run["until_rpc"], 6)
+        ),
+        "app_hash": {
+            "expected": final.hex().upper(),
+            "node": node_hash,
+            "agree": node_hash is not None and node_hash.upper() == final.hex().upper(),
+        },
+    }
+    if run["status"] is None:
+        report["output_tail"] = run["output"][-2000:]
+    return report
+
+
+def summarize_rates(runs: t.List[t.Dict[str, t.Any]]) -> t.Optional[float]:
+    """Get the median replay speed of the runs."""
+    rates = [run["blocks_per_second"] for run in runs if run["blocks_per_second"]]
+    return round(statistics.median(rates), 1) if rates else None
+
+
+def main() -> None:
+    """Replay a period dump and report the replay speed."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("dump", type=Path, help="a period_N/nodeX dump or archive")
+    parser.add_argument("--tendermint", default="tendermint")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--output", type=Path, help="write the report to a file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "learn").mkdir()
+        learn = run_node(args.dump, {}, Path(tmp) / "learn", args)
+        if learn["status"] is not None:
+            # nothing for the handshake to check, the store is empty
+            final = bytes.fromhex(learn["status"]["sync_info"]["latest_app_hash"])
+        else:
+            match = STATE_HASH_PANIC.search(learn["output"])
+            if match is None:
+                sys.exit(
+                    "The node stopped before the end of the replay:\n"
+                    + learn["output"][-2000:]
+                )
+            final = bytes.fromhex(match.group(2))
+        app_hashes = learn["app"].learned_hashes(final)
+        last = max(app_hashes, default=0)
+        runs = []
+        for iteration in range(args.iterations):
+            workdir = Path(tmp) / f"run_{iteration}"
+            workdir.mkdir()
+            runs.append(
+                report_run(run_node(args.dump, app_hashes, workdir, args), final, last)
+            )
+
+    report = {
+        "dump": str(args.dump),
+        "tendermint": args.tendermint,
+        "first_height": min(app_hashes, default=None),
+        "last_height": last or None,
+        "learn_seconds": round(learn["elapsed"], 6),
+        "runs": runs,
+        "blocks_per_second": summarize_rates(runs),
+        "app_hash_agree": bool(runs) and all(run["app_hash"]["agree"] for run in runs),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()